@@ -0,0 +1,74 @@
+"""add original_host and original_url search indexes
+
+Revision ID: 2dc053ee7b03
+Revises: d1a17876be70
+Create Date: 2026-10-19 04:52:35.534530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from core.services import get_original_host
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2dc053ee7b03'
+down_revision: Union[str, None] = 'd1a17876be70'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 10000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('shorted_urls', sa.Column('original_host', sa.String(), nullable=True))
+    # Хост вычисляется той же get_original_host, что и при создании ссылки,
+    # пачками по id, чтобы не держать весь url в памяти.
+    bind = op.get_bind()
+    select_urls_stmt = sa.text(
+        "SELECT id, original_url FROM shorted_urls "
+        "WHERE id > :last_id ORDER BY id LIMIT :batch_size"
+    )
+    update_hosts_stmt = sa.text(
+        "UPDATE shorted_urls SET original_host = hosts.original_host "
+        "FROM unnest(:ids, :original_hosts) AS hosts(id, original_host) "
+        "WHERE shorted_urls.id = hosts.id"
+    ).bindparams(
+        sa.bindparam("ids", type_=ARRAY(sa.Integer())),
+        sa.bindparam("original_hosts", type_=ARRAY(sa.String())),
+    )
+    last_id = 0
+    while rows := bind.execute(select_urls_stmt, {
+        "last_id": last_id, "batch_size": BACKFILL_BATCH_SIZE
+    }).all():
+        bind.execute(update_hosts_stmt, {
+            "ids": [row.id for row in rows],
+            "original_hosts": [get_original_host(row.original_url) for row in rows],
+        })
+        last_id = rows[-1].id
+    op.create_index('idx_original_host_and_id', 'shorted_urls', ['original_host', 'id'], unique=False)
+    # Как ORIGINAL_URL_TRGM_INDEX_DDL: без pg_trgm индекс не создается.
+    op.execute("""
+        DO $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+                CREATE EXTENSION IF NOT EXISTS pg_trgm;
+                CREATE INDEX IF NOT EXISTS idx_original_url_trgm
+                    ON shorted_urls USING gin (original_url gin_trgm_ops);
+            ELSE
+                RAISE NOTICE 'pg_trgm is not available, idx_original_url_trgm is skipped';
+            END IF;
+        END
+        $$
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS idx_original_url_trgm")
+    op.drop_index('idx_original_host_and_id', table_name='shorted_urls')
+    op.drop_column('shorted_urls', 'original_host')
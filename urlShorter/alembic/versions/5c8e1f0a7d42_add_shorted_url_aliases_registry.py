@@ -0,0 +1,56 @@
+"""add shorted_url_aliases registry
+
+Revision ID: 5c8e1f0a7d42
+Revises: bd4bd0d32368
+Create Date: 2026-10-19 09:12:31.204117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c8e1f0a7d42'
+down_revision: Union[str, None] = 'bd4bd0d32368'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('shorted_url_aliases',
+    sa.Column('alias', sa.String(), nullable=False),
+    sa.PrimaryKeyConstraint('alias')
+    )
+    # Без записи в shorted_urls между заполнением и триггером.
+    op.execute('LOCK TABLE shorted_urls IN SHARE ROW EXCLUSIVE MODE')
+    # Упадет на unique violation, если алиас уже есть в обеих партициях.
+    op.execute('INSERT INTO shorted_url_aliases (alias) SELECT alias FROM shorted_urls')
+    # Как SHORTED_URL_ALIASES_*_DDL в database.models.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION register_shorted_url_alias() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('DELETE', 'UPDATE') THEN
+                DELETE FROM shorted_url_aliases WHERE alias = OLD.alias;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO shorted_url_aliases (alias) VALUES (NEW.alias);
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER shorted_urls_register_alias
+            AFTER INSERT OR DELETE OR UPDATE OF alias ON shorted_urls
+            FOR EACH ROW EXECUTE FUNCTION register_shorted_url_alias()
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('DROP TRIGGER shorted_urls_register_alias ON shorted_urls')
+    op.execute('DROP FUNCTION register_shorted_url_alias()')
+    op.drop_table('shorted_url_aliases')
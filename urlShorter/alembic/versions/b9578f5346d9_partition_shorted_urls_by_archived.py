@@ -0,0 +1,106 @@
+"""partition shorted_urls by archived
+
+Revision ID: b9578f5346d9
+Revises: 1e60bfe4ee67
+Create Date: 2026-10-19 04:58:03.611274
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b9578f5346d9'
+down_revision: Union[str, None] = '1e60bfe4ee67'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+COLUMNS = ('id, created_at, original_url, created_by_ip, alias, alias_len, '
+           'available_after, clicks, original_url_hash, expires_at')
+
+
+def drop_indexes() -> None:
+    """Drop shorted_urls indexes (names are reused by the new table)."""
+    op.drop_index('idx_expires_at', table_name='shorted_urls', postgresql_where=sa.text('expires_at IS NOT NULL'))
+    op.drop_index('idx_original_url_hash', table_name='shorted_urls')
+    op.drop_index(op.f('ix_shorted_urls_alias_len'), table_name='shorted_urls')
+    op.drop_index('idx_alias_len_desc_and_alias_desc', table_name='shorted_urls')
+    op.drop_index('idx_alias_len_and_alias', table_name='shorted_urls')
+
+
+def create_indexes(original_url_hash_columns: list[str]) -> None:
+    """Create shorted_urls indexes."""
+    op.create_index('idx_alias_len_and_alias', 'shorted_urls', ['alias_len', 'alias'], unique=False)
+    op.create_index('idx_alias_len_desc_and_alias_desc', 'shorted_urls', [sa.literal_column('alias_len DESC'), sa.literal_column('alias DESC')], unique=False)
+    op.create_index(op.f('ix_shorted_urls_alias_len'), 'shorted_urls', ['alias_len'], unique=False)
+    op.create_index('idx_original_url_hash', 'shorted_urls', original_url_hash_columns, unique=True)
+    op.create_index('idx_expires_at', 'shorted_urls', ['expires_at'], unique=False, postgresql_where=sa.text('expires_at IS NOT NULL'))
+
+
+def detach_old_table() -> None:
+    """Rename shorted_urls and free its constraint names and id sequence."""
+    drop_indexes()
+    op.rename_table('shorted_urls', 'shorted_urls_old')
+    op.execute('ALTER TABLE shorted_urls_old DROP CONSTRAINT shorted_urls_alias_key')
+    op.execute('ALTER TABLE shorted_urls_old DROP CONSTRAINT shorted_urls_pkey')
+    op.execute('ALTER SEQUENCE shorted_urls_id_seq OWNED BY NONE')
+
+
+def common_columns() -> list[sa.Column]:
+    """Columns shared by the plain and the partitioned table."""
+    return [
+        sa.Column('original_url', sa.String(), nullable=False),
+        sa.Column('created_by_ip', sa.String(), nullable=True),
+        sa.Column('alias', sa.String(), nullable=False),
+        sa.Column('alias_len', sa.Integer(), nullable=False),
+        sa.Column('available_after', sa.Boolean(), nullable=False),
+        sa.Column('clicks', sa.Integer(), nullable=False),
+        sa.Column('original_url_hash', sa.LargeBinary(length=32), nullable=True),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('id', sa.Integer(), server_default=sa.text("nextval('shorted_urls_id_seq'::regclass)"), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    ]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    detach_old_table()
+
+    op.create_table('shorted_urls',
+    sa.Column('archived', sa.Boolean(), nullable=False),
+    *common_columns(),
+    sa.Column('last_clicked_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id', 'archived'),
+    sa.UniqueConstraint('alias', 'archived', name='shorted_urls_alias_key'),
+    postgresql_partition_by='LIST (archived)'
+    )
+    op.execute('CREATE TABLE shorted_urls_hot PARTITION OF shorted_urls FOR VALUES IN (false)')
+    op.execute('CREATE TABLE shorted_urls_cold PARTITION OF shorted_urls FOR VALUES IN (true)')
+    op.execute('ALTER SEQUENCE shorted_urls_id_seq OWNED BY shorted_urls.id')
+
+    op.execute(f'INSERT INTO shorted_urls (archived, {COLUMNS}) '
+               f'SELECT false, {COLUMNS} FROM shorted_urls_old')
+    op.drop_table('shorted_urls_old')
+
+    create_indexes(['original_url_hash', 'archived'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    detach_old_table()
+
+    op.create_table('shorted_urls',
+    *common_columns(),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('alias', name='shorted_urls_alias_key')
+    )
+    op.execute('ALTER SEQUENCE shorted_urls_id_seq OWNED BY shorted_urls.id')
+
+    op.execute(f'INSERT INTO shorted_urls ({COLUMNS}) '
+               f'SELECT {COLUMNS} FROM shorted_urls_old')
+    op.drop_table('shorted_urls_old')
+
+    create_indexes(['original_url_hash'])
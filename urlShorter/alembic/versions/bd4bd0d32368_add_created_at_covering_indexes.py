@@ -0,0 +1,33 @@
+"""add created_at covering indexes
+
+Revision ID: bd4bd0d32368
+Revises: 2dc053ee7b03
+Create Date: 2026-10-19 04:54:53.560390
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'bd4bd0d32368'
+down_revision: Union[str, None] = '2dc053ee7b03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('idx_created_by_ip_created_at_and_id', 'shorted_urls', ['created_by_ip', 'created_at', 'id'], unique=False)
+    op.create_index('idx_created_at_and_id', 'shorted_urls', ['created_at', 'id'], unique=False)
+    # Новый индекс по ip покрывает и подсчет для лимита создания.
+    op.drop_index('idx_created_by_ip_and_created_at', table_name='shorted_urls')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('idx_created_by_ip_and_created_at', 'shorted_urls', ['created_by_ip', 'created_at'], unique=False)
+    op.drop_index('idx_created_at_and_id', table_name='shorted_urls')
+    op.drop_index('idx_created_by_ip_created_at_and_id', table_name='shorted_urls')
@@ -1,57 +1,330 @@
 """Модуль метода /links ."""
-from fastapi import APIRouter, Depends
+from datetime import datetime
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Header
+from fastapi.responses import Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from core.exceptions import AliasNotFoundException
-from core.schemas import ShortedUrlDetailResponseSchema, ShortedUrlResponseSchema
-from core.services import get_urls_service
+from core.cache import get_redirect_cache
+from core.clicks import get_click_events_service
+from core.config import (
+    LINK_DETAIL_CACHE_CONTROL,
+    LINKS_LIST_CACHE_CONTROL,
+    MAX_PER_PAGE_URLS_COUNT,
+    SEARCH_MAX_RESULTS,
+)
+from core.edge_cache import get_edge_cache_purger
+from core.exceptions import (
+    AliasNotFoundException,
+    LinksListQueryException,
+    SearchQueryException,
+)
+from core.http_cache import (
+    get_cache_headers,
+    get_not_modified_response,
+    is_not_modified,
+    make_weak_etag,
+)
+from core.schemas import (
+    SHORTED_URLS_RESPONSE_ADAPTER,
+    BulkDeleteRequestSchema,
+    BulkDeleteResponseSchema,
+    ClicksBucketSchema,
+    ShortedUrlDetailResponseSchema,
+    ShortedUrlResponseSchema,
+    ShortedUrlStatsResponseSchema,
+)
+from core.services import (
+    decode_created_at_cursor,
+    encode_created_at_cursor,
+    get_urls_service,
+)
+from core.shared_cache import get_shared_redirect_cache
+from core.visitors import get_visitor_sketches_service
 from database.database import get_db
 from database.models import ShortedUrl
 
 links_router = APIRouter()
 
 
-@links_router.get("", status_code=200)
-async def get_links(
+@links_router.get("", status_code=200,
+                  response_model=list[ShortedUrlResponseSchema])
+async def get_links(  # noqa: PLR0913
     page: int = 0,
     per_page: int = 10,
+    created_by_ip: str | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    order_by: Literal["alias", "created_at", "-created_at"] | None = None,
+    cursor: str | None = None,
+    if_none_match: str | None = Header(default=None),
     db: AsyncSession = Depends(get_db)
-) -> list[ShortedUrlResponseSchema]:
+) -> Response:
     """Получение инфомрации ссылок на странице.
 
+    Без фильтров ссылки отдаются страницами page в порядке alias'ов.
+    С фильтрами или order_by по created_at - keyset'ом: если страница полная,
+    заголовок X-Next-Cursor содержит cursor следующей страницы.
+
     Args:
         page (int, optional): Номер страницы. Defaults to 0.
         per_page (int, optional): Количество ссылок на страницу. Defaults to 10.
+        created_by_ip (str | None, optional): IP, с которого созданы ссылки.
+            Defaults to None.
+        created_from (datetime | None, optional): Созданы не раньше.
+            Defaults to None.
+        created_to (datetime | None, optional): Созданы раньше. Defaults to None.
+        order_by (Literal["alias", "created_at", "-created_at"] | None, optional):
+            Порядок ссылок. Defaults to None (alias, с фильтрами -created_at).
+        cursor (str | None, optional): Курсор из X-Next-Cursor. Defaults to None.
+        if_none_match (str | None, optional): ETag'и версий страницы у клиента.
+            Defaults to Header(default=None).
         db (AsyncSession, optional): Сессия базы данных. Defaults to Depends(get_db).
 
+    Raises:
+        LinksListQueryException: Если фильтры несовместимы с порядком
+            или курсор некорректен (400).
+
     Returns:
-        list[ShortedUrlResponseSchema]: Список информации ссылок на странице.
+        Response: JSON список информации ссылок на странице или 304.
 
     """
-    shorted_urls: list[ShortedUrl] = (
-        await get_urls_service(db).get_shorted_urls(page, per_page)
+    urls_service = get_urls_service(db)
+
+    is_filtered = created_by_ip is not None or created_from is not None \
+        or created_to is not None
+    if order_by is None:
+        order_by = "-created_at" if is_filtered else "alias"
+    if order_by != "alias":
+        return await _get_links_by_created_at(
+            created_by_ip=created_by_ip,
+            created_from=created_from,
+            created_to=created_to,
+            descending=order_by == "-created_at",
+            cursor=cursor,
+            per_page=per_page,
+            if_none_match=if_none_match,
+            db=db,
+        )
+    if is_filtered or cursor is not None:
+        msg = "filters and cursor require order_by created_at or -created_at"
+        raise LinksListQueryException(msg)
+
+    # Опрашивающим клиентам версия страницы отдается узким запросом,
+    # без чтения url'ов и сериализации.
+    if if_none_match is not None:
+        page_version_rows = await urls_service.get_shorted_urls_page_version_rows(
+            page, per_page
+        )
+        etag = make_weak_etag(*map(tuple, page_version_rows))
+        if is_not_modified(if_none_match, etag):
+            return get_not_modified_response(etag, LINKS_LIST_CACHE_CONTROL)
+
+    shorted_url_rows = await urls_service.get_shorted_url_rows(page, per_page)
+    etag = make_weak_etag(*((shorted_url_id, clicks, created_at)
+                            for shorted_url_id, _, _, clicks, created_at
+                            in shorted_url_rows))
+
+    # Строки из базы уже корректны: схемы собираются без валидации и сразу
+    # сериализуются в байты, FastAPI отдает Response как есть.
+    return Response(SHORTED_URLS_RESPONSE_ADAPTER.dump_json([
+        ShortedUrlResponseSchema.model_construct(
+            original_url=original_url, alias=alias, clicks=clicks, created_at=created_at
+        )
+        for _, original_url, alias, clicks, created_at in shorted_url_rows
+    ]), media_type="application/json",
+        headers=get_cache_headers(etag, LINKS_LIST_CACHE_CONTROL))
+
+
+async def _get_links_by_created_at(  # noqa: PLR0913
+    *,
+    created_by_ip: str | None,
+    created_from: datetime | None,
+    created_to: datetime | None,
+    descending: bool,
+    cursor: str | None,
+    per_page: int,
+    if_none_match: str | None,
+    db: AsyncSession
+) -> Response:
+    """Получение страницы ссылок по фильтрам в порядке created_at (keyset).
+
+    Args:
+        created_by_ip (str | None): IP, с которого созданы ссылки.
+        created_from (datetime | None): Созданы не раньше.
+        created_to (datetime | None): Созданы раньше.
+        descending (bool): Новые ссылки первыми.
+        cursor (str | None): Курсор из X-Next-Cursor.
+        per_page (int): Количество ссылок на страницу.
+        if_none_match (str | None): ETag'и версий страницы у клиента.
+        db (AsyncSession): Сессия базы данных.
+
+    Raises:
+        LinksListQueryException: Если курсор некорректен (400).
+
+    Returns:
+        Response: JSON список информации ссылок на странице или 304.
+
+    """
+    try:
+        page_cursor = decode_created_at_cursor(cursor) if cursor is not None else None
+    except ValueError as e:
+        raise LinksListQueryException(str(e)) from e
+
+    per_page = max(1, min(MAX_PER_PAGE_URLS_COUNT, per_page))
+    shorted_url_rows = await get_urls_service(db).get_filtered_shorted_url_rows(
+        created_by_ip=created_by_ip,
+        created_from=created_from,
+        created_to=created_to,
+        descending=descending,
+        cursor=page_cursor,
+        per_page=per_page,
     )
+    etag = make_weak_etag(*((shorted_url_id, clicks, created_at)
+                            for shorted_url_id, _, _, clicks, created_at
+                            in shorted_url_rows))
+    if is_not_modified(if_none_match, etag):
+        return get_not_modified_response(etag, LINKS_LIST_CACHE_CONTROL)
+
+    headers = get_cache_headers(etag, LINKS_LIST_CACHE_CONTROL)
+    if len(shorted_url_rows) == per_page:
+        headers["X-Next-Cursor"] = encode_created_at_cursor(
+            shorted_url_rows[-1].created_at, shorted_url_rows[-1].id
+        )
 
-    return [ShortedUrlResponseSchema.model_validate(shorted_url)
-            for shorted_url in shorted_urls]
+    return Response(SHORTED_URLS_RESPONSE_ADAPTER.dump_json([
+        ShortedUrlResponseSchema.model_construct(
+            original_url=original_url, alias=alias, clicks=clicks, created_at=created_at
+        )
+        for _, original_url, alias, clicks, created_at in shorted_url_rows
+    ]), media_type="application/json", headers=headers)
 
 
-@links_router.get("/{alias}", status_code=200)
+@links_router.get("/search", status_code=200,
+                  response_model=list[ShortedUrlResponseSchema])
+async def search_links(
+    q: str | None = None,
+    host: str | None = None,
+    cursor: int | None = None,
+    limit: int = 10,
+    db: AsyncSession = Depends(get_db)
+) -> Response:
+    """Поиск ссылок по подстроке оригинального url и/или его хосту.
+
+    Ссылки отдаются от новых к старым. Если страница полная, заголовок
+    X-Next-Cursor содержит курсор следующей страницы.
+
+    Args:
+        q (str | None, optional): Подстрока оригинального url. Defaults to None.
+        host (str | None, optional): Хост оригинального url. Defaults to None.
+        cursor (int | None, optional): Курсор из X-Next-Cursor. Defaults to None.
+        limit (int, optional): Количество ссылок (не больше SEARCH_MAX_RESULTS).
+            Defaults to 10.
+        db (AsyncSession, optional): Сессия базы данных. Defaults to Depends(get_db).
+
+    Raises:
+        SearchQueryException: Если запрос некорректен или слишком широк (400).
+
+    Returns:
+        Response: JSON список информации найденных ссылок.
+
+    """
+    limit = max(1, min(SEARCH_MAX_RESULTS, limit))
+    try:
+        shorted_url_rows = await get_urls_service(db).search_shorted_url_rows(
+            q, host, cursor, limit
+        )
+    except ValueError as e:
+        raise SearchQueryException(str(e)) from e
+
+    headers = {}
+    if len(shorted_url_rows) == limit:
+        headers["X-Next-Cursor"] = str(shorted_url_rows[-1].id)
+
+    return Response(SHORTED_URLS_RESPONSE_ADAPTER.dump_json([
+        ShortedUrlResponseSchema.model_construct(
+            original_url=original_url, alias=alias, clicks=clicks, created_at=created_at
+        )
+        for _, original_url, alias, clicks, created_at in shorted_url_rows
+    ]), media_type="application/json", headers=headers)
+
+
+@links_router.get("/{alias}", status_code=200,
+                  response_model=ShortedUrlDetailResponseSchema)
 async def get_link(
     alias: str,
+    if_none_match: str | None = Header(default=None),
     db: AsyncSession = Depends(get_db)
-) -> ShortedUrlDetailResponseSchema:
+) -> Response:
     """Получение информации о ссылке по alias'у.
 
     Args:
         alias (str): alias ссылки
+        if_none_match (str | None, optional): ETag'и версий ссылки у клиента.
+            Defaults to Header(default=None).
+        db (AsyncSession, optional): Сессия базы данных. Defaults to Depends(get_db).
+
+    Raises:
+        AliasNotFoundException: Если alias не найден (404).
+
+    Returns:
+        Response: JSON информация о ссылке по alias'у или 304.
+
+    """
+    shorted_url_row = await get_urls_service(db).get_shorted_url_detail_row_by_alias(
+        alias
+    )
+
+    if shorted_url_row is None:
+        raise AliasNotFoundException
+
+    # Оценка посетителей меняется и без кликов (слияние скетчей воркеров),
+    # поэтому входит в ETag вместе со сроком жизни. Неизменившейся ссылке
+    # не нужна сериализация.
+    unique_visitors = await get_visitor_sketches_service(db).get_unique_visitors(
+        shorted_url_row.id
+    )
+    etag = make_weak_etag(
+        shorted_url_row.id, shorted_url_row.clicks, shorted_url_row.created_at,
+        shorted_url_row.expires_at, unique_visitors,
+    )
+    if is_not_modified(if_none_match, etag):
+        return get_not_modified_response(etag, LINK_DETAIL_CACHE_CONTROL)
+
+    shorted_url_detail = ShortedUrlDetailResponseSchema.model_construct(
+        original_url=shorted_url_row.original_url,
+        created_at=shorted_url_row.created_at,
+        clicks=shorted_url_row.clicks,
+        expires_at=shorted_url_row.expires_at,
+        unique_visitors=unique_visitors,
+    )
+
+    return Response(shorted_url_detail.model_dump_json(),
+                    media_type="application/json",
+                    headers=get_cache_headers(etag, LINK_DETAIL_CACHE_CONTROL))
+
+
+@links_router.get("/{alias}/stats", status_code=200)
+async def get_link_stats(
+    alias: str,
+    hours: int = 24,
+    days: int = 30,
+    db: AsyncSession = Depends(get_db)
+) -> ShortedUrlStatsResponseSchema:
+    """Получение статистики переходов по ссылке (только из агрегатов).
+
+    Args:
+        alias (str): alias ссылки.
+        hours (int, optional): За сколько последних часов. Defaults to 24.
+        days (int, optional): За сколько последних дней. Defaults to 30.
         db (AsyncSession, optional): Сессия базы данных. Defaults to Depends(get_db).
 
     Raises:
         AliasNotFoundException: Если alias не найден (404).
 
     Returns:
-        ShortedUrlDetailResponseSchema: Информация о ссылке по alias'у.
+        ShortedUrlStatsResponseSchema: Почасовые и дневные переходы по ссылке.
 
     """
     shorted_url: ShortedUrl | None = (
@@ -61,7 +334,17 @@ async def get_link(
     if shorted_url is None:
         raise AliasNotFoundException
 
-    return ShortedUrlDetailResponseSchema.model_validate(shorted_url)
+    click_events_service = get_click_events_service(db)
+    hourly = await click_events_service.get_hourly_clicks(shorted_url.id, hours)
+    daily = await click_events_service.get_daily_clicks(shorted_url.id, days)
+
+    return ShortedUrlStatsResponseSchema(
+        alias=alias,
+        hourly=[ClicksBucketSchema(bucket=bucket, clicks=clicks)
+                for bucket, clicks in hourly],
+        daily=[ClicksBucketSchema(bucket=bucket, clicks=clicks)
+               for bucket, clicks in daily],
+    )
 
 
 @links_router.delete("/{alias}", status_code=204)
@@ -83,3 +366,54 @@ async def delete_link(alias: str, db: AsyncSession = Depends(get_db)) -> None:
         raise AliasNotFoundException
 
     await urls_service.delete_url_by_alias_with_lock(alias)
+    await _purge_redirect_caches([alias])
+
+
+@links_router.post("/delete", status_code=200)
+async def delete_links(
+    bulk_delete_data: BulkDeleteRequestSchema,
+    db: AsyncSession = Depends(get_db)
+) -> BulkDeleteResponseSchema:
+    """Пакетное удаление ссылок по alias'ам (транзакциями по BULK_DELETE_BATCH_SIZE).
+
+    Кэши очищаются после коммита каждой пачки, поэтому ошибка в следующей
+    пачке не оставляет уже удаленные ссылки в кэшах. Алиасы пачек, которые
+    удалить не удалось, возвращаются в failed.
+
+    Args:
+        bulk_delete_data (BulkDeleteRequestSchema): Тело запроса.
+        db (AsyncSession, optional): Сессия базы данных. Defaults to Depends(get_db).
+
+    Returns:
+        BulkDeleteResponseSchema: Удаленные, отсутствовавшие и неудаленные alias'ы.
+
+    """
+    deleted_aliases, failed_aliases = \
+        await get_urls_service(db).delete_urls_by_aliases_with_lock(
+            bulk_delete_data.aliases, on_batch_deleted=_purge_redirect_caches
+        )
+
+    processed = {*deleted_aliases, *failed_aliases}
+    return BulkDeleteResponseSchema(
+        deleted=deleted_aliases,
+        missing=list(dict.fromkeys(
+            alias for alias in bulk_delete_data.aliases if alias not in processed
+        )),
+        failed=failed_aliases,
+    )
+
+
+async def _purge_redirect_caches(aliases: list[str]) -> None:
+    """Очистка редиректов удаленных ссылок из всех кэшей.
+
+    Общий кэш очищается до кэша прокси: очистка прокси читает редирект заново.
+
+    Args:
+        aliases (list[str]): Удаленные алиасы.
+
+    """
+    await get_shared_redirect_cache().delete(aliases)
+    redirect_cache = get_redirect_cache()
+    for alias in aliases:
+        redirect_cache.invalidate(alias)
+    await get_edge_cache_purger().purge(aliases)
@@ -4,21 +4,26 @@ from datetime import datetime, timedelta
 from fastapi import APIRouter, Depends, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from core.cache import CachedRedirect
 from core.config import USER_CREATE_URL_IN_MINUTE_LIMIT
 from core.exceptions import (
     InvalidConnectingClientException,
     ShortUrlCreatingException,
     UserCreateUrlLimitExceedException,
 )
+from core.profiler import profile_every_nth_request
 from core.schemas import CreatedShortedUrlResponseSchema, ShortUrlRequestSchema
 from core.services import get_urls_service
+from core.shared_cache import get_shared_redirect_cache
 from database.database import get_db
 from database.models import ShortedUrl
 
 shorten_router = APIRouter()
 
 
-@shorten_router.post("", status_code=200)
+@shorten_router.post(
+    "", status_code=200, dependencies=[Depends(profile_every_nth_request)]
+)
 async def create_shorted_url(request: Request,
                              shorted_url_data: ShortUrlRequestSchema,
                              db: AsyncSession = Depends(get_db)
@@ -60,9 +65,17 @@ async def create_shorted_url(request: Request,
 
     try:
         shorted_url: ShortedUrl = await urls_service.create_new_url_with_lock(
-            shorted_url_data.url, shorted_url_data.custom_alias, client_ip
+            shorted_url_data.url,
+            shorted_url_data.custom_alias,
+            client_ip,
+            shorted_url_data.expires_at,
         )
     except ValueError as e:
         raise ShortUrlCreatingException(str(e))
 
+    # Новая ссылка сразу попадает в общий кэш: первый переход не идет в базу.
+    await get_shared_redirect_cache().set(shorted_url.alias, CachedRedirect(
+        shorted_url.id, shorted_url.original_url, shorted_url.expires_at
+    ))
+
     return CreatedShortedUrlResponseSchema(alias=shorted_url.alias)
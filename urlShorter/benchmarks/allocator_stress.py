@@ -0,0 +1,397 @@
+"""Нагрузочная проверка аллокатора алиасов.
+
+Параллельные создатели и удалители работают напрямую с UrlsService
+против локальной Postgres, после каждого раунда проверяются инварианты:
+    - алиас встречается в таблице не больше одного раза (уникальность
+      между партициями обеспечивают только блокировки alias_numeric);
+    - available_after ссылки равен отсутствию ссылки со следующим алиасом;
+    - ссылка существует ровно тогда, когда созданий ее алиаса было
+      на одно больше, чем удалений (нет потерянных удалений и созданий).
+Также замеряются созданий/удалений в секунду, доля повторов и ожидание
+advisory-блокировок при разной конкурентности и заполненности таблицы.
+
+Созданные ссылки помечаются префиксом original_url и удаляются в конце.
+Запускать только на локальной базе: чужие ссылки в затронутых диапазонах
+алиасов тоже попадут в проверку инвариантов.
+
+Пример:
+    python -m benchmarks.allocator_stress --concurrency 1,8,32 \
+        --fill 0,10000 --strategy sequential
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import uuid
+from collections import Counter
+
+from sqlalchemy import ColumnElement, String, any_, bindparam, func, select
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from core import services
+from core.config import DATABASE_ASYNC_URL
+from core.exceptions import UnexpectedException
+from core.metrics import ADVISORY_LOCK_WAIT, ALLOCATOR_PROBES
+from core.services import get_alias_numeric_service, get_urls_service
+from database.models import ShortedUrl
+
+# Количество повторов одной операции до признания ее неуспешной.
+MAX_OPERATION_ATTEMPTS = 5
+
+
+def _alias_in(aliases: list[str]) -> ColumnElement[bool]:
+    """Условие alias = ANY(массив): одна привязка вместо параметра на алиас."""
+    return ShortedUrl.alias == any_(
+        bindparam("aliases", aliases, type_=ARRAY(String))
+    )
+
+
+class StressRound:
+    """Один раунд: creators создателей и deleters удалителей duration секунд."""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        url_prefix: str,
+        history: Counter[str],
+        live_aliases: list[str],
+    ) -> None:
+        """Инициализация раунда.
+
+        Args:
+            session_factory (async_sessionmaker[AsyncSession]): Фабрика сессий.
+            url_prefix (str): Префикс original_url ссылок этого запуска.
+            history (Counter[str]): Созданий минус удалений по алиасам.
+            live_aliases (list[str]): Созданные и еще не удаленные алиасы.
+
+        """
+        self.session_factory = session_factory
+        self.url_prefix = url_prefix
+        self.history = history
+        self.live_aliases = live_aliases
+        self.creates = 0
+        self.deletes = 0
+        self.retries: Counter[str] = Counter()
+        self.failures: Counter[str] = Counter()
+
+    async def _run_with_retries(self, operation: str, alias: str | None) -> str | None:
+        """Выполнение создания или удаления с повторами.
+
+        Args:
+            operation (str): "create" или "delete".
+            alias (str | None): Удаляемый алиас.
+
+        Returns:
+            str | None: Созданный или удаленный алиас, None при неуспехе.
+
+        """
+        for _ in range(MAX_OPERATION_ATTEMPTS):
+            async with self.session_factory() as db:
+                urls_service = get_urls_service(db)
+                try:
+                    if operation == "delete":
+                        await urls_service.delete_url_by_alias_with_lock(alias)
+                        return alias
+                    shorted_url = await urls_service.create_new_url_with_lock(
+                        f"{self.url_prefix}{uuid.uuid4().hex}",
+                        created_by_ip="allocator-stress",
+                    )
+                except (UnexpectedException, DBAPIError) as e:
+                    await db.rollback()
+                    self.retries[f"{operation}:{type(e).__name__}"] += 1
+                    continue
+                else:
+                    return shorted_url.alias
+
+        self.failures[operation] += 1
+        return None
+
+    async def creator(self, deadline: float) -> None:
+        """Создание ссылок до deadline."""
+        while time.perf_counter() < deadline:
+            alias = await self._run_with_retries("create", None)
+            if alias is not None:
+                self.creates += 1
+                self.history[alias] += 1
+                self.live_aliases.append(alias)
+
+    async def deleter(self, deadline: float) -> None:
+        """Удаление случайных созданных ссылок до deadline."""
+        while time.perf_counter() < deadline:
+            if not self.live_aliases:
+                await asyncio.sleep(0.001)
+                continue
+
+            index = random.randrange(len(self.live_aliases))
+            self.live_aliases[index], self.live_aliases[-1] = \
+                self.live_aliases[-1], self.live_aliases[index]
+            alias = self.live_aliases.pop()
+
+            if await self._run_with_retries("delete", alias) is None:
+                self.live_aliases.append(alias)
+                continue
+            self.deletes += 1
+            self.history[alias] -= 1
+
+    async def run(self, creators: int, deleters: int, duration: float) -> float:
+        """Прогон раунда.
+
+        Returns:
+            float: Фактическая длительность раунда в секундах.
+
+        """
+        started_at = time.perf_counter()
+        deadline = started_at + duration
+        await asyncio.gather(
+            *(self.creator(deadline) for _ in range(creators)),
+            *(self.deleter(deadline) for _ in range(deleters)),
+        )
+
+        return time.perf_counter() - started_at
+
+
+async def prefill(
+    session_factory: async_sessionmaker[AsyncSession],
+    url_prefix: str,
+    start_alias: str,
+    count: int,
+) -> list[str]:
+    """Заполнение count подряд идущих алиасов, начиная со start_alias.
+
+    Занятые алиасы пропускаются, available_after затронутого диапазона
+    пересчитывается. Не должно выполняться параллельно с приложением.
+
+    Returns:
+        list[str]: Созданные алиасы.
+
+    """
+    if count <= 0:
+        return []
+
+    alias_numeric_service = get_alias_numeric_service()
+    start_alias_numeric = alias_numeric_service.get_alias_numeric_from_alias(
+        start_alias
+    )
+    aliases = [alias_numeric_service.get_alias_from_alias_numeric(alias_numeric)
+               for alias_numeric in range(start_alias_numeric,
+                                          start_alias_numeric + count + 1)]
+    # Последний алиас не создается, нужен для available_after.
+    next_alias = aliases.pop()
+    previous_alias = alias_numeric_service.get_alias_from_alias_numeric(
+        start_alias_numeric - 1
+    )
+
+    async with session_factory() as db:
+        existing_aliases = set(await db.scalars(
+            select(ShortedUrl.alias).where(_alias_in(aliases))
+        ))
+        created_aliases = [alias for alias in aliases if alias not in existing_aliases]
+        if created_aliases:
+            await db.execute(insert(ShortedUrl), [{
+                "original_url": f"{url_prefix}{alias}",
+                "alias": alias,
+                "alias_len": len(alias),
+                "created_by_ip": "allocator-stress",
+            } for alias in created_aliases])
+
+        next_exists = await db.scalar(
+            select(func.count()).where(ShortedUrl.alias == next_alias)
+        )
+        await db.execute(
+            ShortedUrl.__table__.update()
+            .where(_alias_in([previous_alias, *aliases[:-1]]))
+            .values(available_after=False)
+        )
+        await db.execute(
+            ShortedUrl.__table__.update()
+            .where(ShortedUrl.alias == aliases[-1])
+            .values(available_after=not next_exists)
+        )
+        await db.commit()
+
+    return created_aliases
+
+
+async def check_invariants(
+    session_factory: async_sessionmaker[AsyncSession],
+    history: Counter[str],
+) -> list[str]:
+    """Проверка инвариантов аллокатора для затронутых алиасов и их соседей.
+
+    Returns:
+        list[str]: Описания нарушений.
+
+    """
+    alias_numeric_service = get_alias_numeric_service()
+    neighbours: dict[str, str] = {}
+    for alias in history:
+        alias_numeric = alias_numeric_service.get_alias_numeric_from_alias(alias)
+        for checked_alias_numeric in (alias_numeric - 1, alias_numeric):
+            if checked_alias_numeric <= 0:
+                continue
+            neighbours[alias_numeric_service.get_alias_from_alias_numeric(
+                checked_alias_numeric
+            )] = alias_numeric_service.get_alias_from_alias_numeric(
+                checked_alias_numeric + 1
+            )
+
+    async with session_factory() as db:
+        rows = (await db.execute(
+            select(ShortedUrl.alias, ShortedUrl.available_after).where(
+                _alias_in([*neighbours, *neighbours.values()])
+            )
+        )).all()
+
+    violations = []
+    alias_counts = Counter(alias for alias, _ in rows)
+    violations.extend(f"duplicate alias {alias!r} ({count} rows)"
+                      for alias, count in alias_counts.items() if count > 1)
+
+    available_after_by_alias = dict(rows)
+    for alias, next_alias in neighbours.items():
+        if alias not in available_after_by_alias:
+            continue
+        expected = next_alias not in available_after_by_alias
+        if available_after_by_alias[alias] != expected:
+            violations.append(
+                f"alias {alias!r} available_after="
+                f"{available_after_by_alias[alias]}, expected {expected}"
+            )
+
+    for alias, balance in history.items():
+        if balance not in {0, 1}:
+            violations.append(f"alias {alias!r} created-deleted balance {balance}")
+        elif (alias in available_after_by_alias) != (balance == 1):
+            state = "exists" if alias in available_after_by_alias else "is missing"
+            violations.append(f"alias {alias!r} {state}, balance {balance}")
+
+    return violations
+
+
+async def cleanup(
+    session_factory: async_sessionmaker[AsyncSession],
+    aliases: list[str],
+) -> None:
+    """Удаление ссылок запуска через UrlsService (с блокировками)."""
+    for alias in aliases:
+        async with session_factory() as db:
+            await get_urls_service(db).delete_url_by_alias_with_lock(alias)
+
+
+def _lock_wait() -> tuple[float, float]:
+    """Количество и сумма ожиданий advisory-блокировок этого процесса."""
+    counts = ADVISORY_LOCK_WAIT.values.get((), [0.0, 0.0])
+    return sum(counts[:-1]), counts[-1]
+
+
+async def run_stress(args: argparse.Namespace) -> bool:
+    """Прогон всех сочетаний заполненности и конкурентности.
+
+    Returns:
+        bool: True, если инварианты не нарушены.
+
+    """
+    if args.strategy == "sequential":
+        services.MAX_GET_RANDOM_ALIAS_ATTEMPT_COUNT = 0
+
+    engine = create_async_engine(
+        DATABASE_ASYNC_URL, pool_size=max(args.concurrency) + 1, max_overflow=0
+    )
+    session_factory = async_sessionmaker(engine)
+    url_prefix = f"https://allocator-stress.example/{uuid.uuid4().hex}/"
+    history: Counter[str] = Counter()
+    live_aliases: list[str] = []
+    succeeded = True
+
+    try:
+        for fill in args.fill:
+            prefilled_aliases = await prefill(
+                session_factory, url_prefix, args.fill_start, fill
+            )
+            history.update(prefilled_aliases)
+
+            for concurrency in args.concurrency:
+                deleters = round(concurrency * args.deleters_ratio)
+                creators = max(1, concurrency - deleters)
+                stress_round = StressRound(
+                    session_factory, url_prefix, history, live_aliases
+                )
+                lock_waits_before, lock_wait_before = _lock_wait()
+                probes_before = dict(ALLOCATOR_PROBES.values)
+
+                elapsed = await stress_round.run(creators, deleters, args.duration)
+
+                lock_waits_after, lock_wait_after = _lock_wait()
+                lock_waits = lock_waits_after - lock_waits_before
+                operations = stress_round.creates + stress_round.deletes
+                violations = await check_invariants(session_factory, history)
+                succeeded = succeeded and not violations
+
+                sys.stdout.write(json.dumps({
+                    "fill": fill,
+                    "strategy": args.strategy,
+                    "creators": creators,
+                    "deleters": deleters,
+                    "elapsed_seconds": round(elapsed, 3),
+                    "creates_per_second": round(stress_round.creates / elapsed, 2),
+                    "deletes_per_second": round(stress_round.deletes / elapsed, 2),
+                    "retries": dict(stress_round.retries),
+                    "retry_rate": round(
+                        sum(stress_round.retries.values()) / operations, 4
+                    ) if operations else 0.0,
+                    "failures": dict(stress_round.failures),
+                    "allocator_probes": {
+                        labelvalues[0]: value - probes_before.get(labelvalues, 0.0)
+                        for labelvalues, value in ALLOCATOR_PROBES.values.items()
+                    },
+                    "lock_waits": lock_waits,
+                    "mean_lock_wait_ms": round(
+                        (lock_wait_after - lock_wait_before) / lock_waits * 1000, 3
+                    ) if lock_waits else 0.0,
+                    "violations": violations[:args.max_violations],
+                    "violations_count": len(violations),
+                }) + "\n")
+    finally:
+        if not args.keep:
+            await cleanup(session_factory, [alias for alias, balance
+                                            in history.items() if balance > 0])
+        await engine.dispose()
+
+    return succeeded
+
+
+def _parse_ints(value: str) -> list[int]:
+    """Разбор списка чисел через запятую."""
+    return [int(item) for item in value.split(",")]
+
+
+def main() -> None:
+    """Запуск проверки аллокатора из командной строки."""
+    parser = argparse.ArgumentParser(description="Alias allocator stress test.")
+    parser.add_argument("--concurrency", type=_parse_ints, default=[1, 8, 32])
+    parser.add_argument("--fill", type=_parse_ints, default=[0])
+    parser.add_argument(
+        "--fill-start", default="-",
+        help='First alias of the prefilled range ("----" for the random range).',
+    )
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--deleters-ratio", type=float, default=0.25)
+    parser.add_argument(
+        "--strategy", choices=("mixed", "sequential"), default="mixed",
+        help="sequential disables random probing.",
+    )
+    parser.add_argument("--max-violations", type=int, default=20)
+    parser.add_argument("--keep", action="store_true",
+                        help="Do not delete created links.")
+    args = parser.parse_args()
+
+    if not asyncio.run(run_stress(args)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
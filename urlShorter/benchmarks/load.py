@@ -0,0 +1,380 @@
+r"""Нагрузочный бенчмарк API.
+
+Гоняет смесь запросов (редирект, создание, список, детали, удаление)
+с заданной конкурентностью через ASGI (в процессе) или через настоящий
+uvicorn сокет и сохраняет RPS и p50/p95/p99 в JSON для сравнения между
+коммитами. Нужна локальная Postgres с примененными миграциями.
+
+Примеры:
+    python -m benchmarks.load run --transport asgi --concurrency 32
+    python -m benchmarks.load run --transport uvicorn --workers 4 \
+        --mix redirect=90,shorten=5,list=5
+    python -m benchmarks.load compare old.json new.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from collections.abc import AsyncGenerator, Callable
+from contextlib import asynccontextmanager
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from httpx import ASGITransport, AsyncClient, Response, TransportError
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+OPERATIONS = ("redirect", "shorten", "list", "detail", "delete")
+DEFAULT_MIX = "redirect=80,shorten=5,list=5,detail=5,delete=5"
+# Созданием ссылок упирается в лимит на IP раньше, чем в базу.
+BENCHMARK_ENV = {"USER_CREATE_URL_IN_MINUTE_LIMIT": "1000000000"}
+
+
+def parse_mix(mix: str) -> dict[str, int]:
+    """Разбор смеси запросов вида "redirect=80,shorten=20".
+
+    Args:
+        mix (str): Веса операций.
+
+    Returns:
+        dict[str, int]: Веса по операциям.
+
+    """
+    weights: dict[str, int] = {}
+    for item in mix.split(","):
+        operation, weight = item.split("=")
+        if operation not in OPERATIONS:
+            message = f"Unknown operation {operation!r}, expected one of {OPERATIONS}"
+            raise argparse.ArgumentTypeError(message)
+        weights[operation] = int(weight)
+
+    return weights
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """Перцентиль отсортированных значений (nearest-rank).
+
+    Args:
+        sorted_values (list[float]): Отсортированные значения.
+        fraction (float): Доля от 0 до 1.
+
+    Returns:
+        float: Значение перцентиля или 0 для пустого списка.
+
+    """
+    if not sorted_values:
+        return 0.0
+
+    rank = max(1, round(fraction * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float) -> dict[str, Any]:
+    """Сводка по одной операции или по всем запросам.
+
+    Args:
+        latencies (list[float]): Длительности запросов в секундах.
+        errors (int): Количество ответов с неожиданным статусом.
+        elapsed (float): Длительность прогона в секундах.
+
+    Returns:
+        dict[str, Any]: Количество, RPS и перцентили в миллисекундах.
+
+    """
+    sorted_latencies = sorted(latencies)
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(sorted_latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(sorted_latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(sorted_latencies, 0.99) * 1000, 3),
+    }
+
+
+class Workload:
+    """Состояние прогона: алиасы для чтения/удаления и собранные замеры."""
+
+    def __init__(self, aliases: list[str], weights: dict[str, int]) -> None:
+        """Инициализация прогона.
+
+        Args:
+            aliases (list[str]): Алиасы заранее созданных ссылок.
+            weights (dict[str, int]): Веса операций.
+
+        """
+        self.aliases = aliases
+        self.operations = list(weights)
+        self.weights = list(weights.values())
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.random = random.Random(0)
+
+    async def run_operation(self, client: AsyncClient, operation: str) -> None:
+        """Выполнение одной операции с замером.
+
+        Args:
+            client (AsyncClient): Клиент приложения.
+            operation (str): Имя операции.
+
+        """
+        requests: dict[str, Callable[[], Any]] = {
+            "redirect": lambda: client.get(f"/{self.random.choice(self.aliases)}"),
+            "shorten": lambda: client.post("/api/shorten", json={
+                "url": f"https://bench.example/{self.random.getrandbits(64)}"
+            }),
+            "list": lambda: client.get("/api/links", params={
+                "page": self.random.randint(1, 20), "per_page": 50
+            }),
+            "detail": lambda: client.get(
+                f"/api/links/{self.random.choice(self.aliases)}"
+            ),
+            "delete": lambda: client.delete(f"/api/links/{self.aliases.pop()}"),
+        }
+        expected_statuses = {"redirect": 301, "delete": 204}
+
+        # Удалять нечего: ссылки кончились, замер не делается.
+        if operation == "delete" and len(self.aliases) <= 1:
+            return
+
+        started_at = time.perf_counter()
+        response: Response = await requests[operation]()
+        self.latencies[operation].append(time.perf_counter() - started_at)
+
+        if response.status_code != expected_statuses.get(operation, 200):
+            self.errors[operation] += 1
+        elif operation == "shorten":
+            self.aliases.append(response.json()["alias"])
+
+    async def run(
+        self,
+        client: AsyncClient,
+        requests_count: int,
+        concurrency: int
+    ) -> float:
+        """Прогон requests_count операций в concurrency корутинах.
+
+        Args:
+            client (AsyncClient): Клиент приложения.
+            requests_count (int): Общее количество запросов.
+            concurrency (int): Количество одновременных запросов.
+
+        Returns:
+            float: Длительность прогона в секундах.
+
+        """
+        operations = self.random.choices(
+            self.operations, self.weights, k=requests_count
+        )
+        operations.reverse()
+
+        async def worker() -> None:
+            while operations:
+                await self.run_operation(client, operations.pop())
+
+        started_at = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+        return time.perf_counter() - started_at
+
+
+async def seed_dataset(client: AsyncClient, dataset_size: int) -> list[str]:
+    """Создание ссылок для чтения и удаления через API.
+
+    Args:
+        client (AsyncClient): Клиент приложения.
+        dataset_size (int): Количество ссылок.
+
+    Returns:
+        list[str]: Алиасы созданных ссылок.
+
+    """
+    aliases = []
+    for i in range(dataset_size):
+        response = await client.post(
+            "/api/shorten", json={"url": f"https://seed.example/{i}"}
+        )
+        response.raise_for_status()
+        aliases.append(response.json()["alias"])
+
+    return aliases
+
+
+@asynccontextmanager
+async def asgi_client() -> AsyncGenerator[AsyncClient]:
+    """Клиент приложения в этом же процессе, без сети."""
+    os.environ.update(BENCHMARK_ENV)
+    from asgi_lifespan import LifespanManager
+
+    from fast import app
+
+    async with LifespanManager(app), AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://benchmark"
+    ) as client:
+        yield client
+
+
+def _get_free_port() -> int:
+    """Свободный локальный TCP порт."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@asynccontextmanager
+async def uvicorn_client(workers: int) -> AsyncGenerator[AsyncClient]:
+    """Клиент приложения, запущенного в uvicorn на локальном сокете."""
+    port = _get_free_port()
+    server = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "uvicorn", "fast:app", "--port", str(port),
+        "--workers", str(workers), "--log-level", "warning",
+        cwd=PROJECT_DIR,
+        env={**os.environ, **BENCHMARK_ENV},
+    )
+
+    try:
+        async with AsyncClient(base_url=f"http://127.0.0.1:{port}") as client:
+            for _ in range(100):
+                try:
+                    await client.get("/api/links")
+                    break
+                except TransportError:
+                    await asyncio.sleep(0.1)
+            yield client
+    finally:
+        server.terminate()
+        await server.wait()
+
+
+def get_commit() -> str:
+    """Текущий коммит репозитория (или "unknown")."""
+    try:
+        return subprocess.check_output(  # noqa: S603
+            ["git", "rev-parse", "--short", "HEAD"],  # noqa: S607
+            cwd=PROJECT_DIR, text=True, stderr=subprocess.DEVNULL,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def run_benchmark(args: argparse.Namespace) -> dict[str, Any]:
+    """Прогон бенчмарка с параметрами командной строки.
+
+    Args:
+        args (argparse.Namespace): Параметры командной строки.
+
+    Returns:
+        dict[str, Any]: Результаты прогона.
+
+    """
+    client_factory = asgi_client() if args.transport == "asgi" \
+        else uvicorn_client(args.workers)
+
+    async with client_factory as client:
+        aliases = await seed_dataset(client, args.dataset_size)
+        workload = Workload(aliases, args.mix)
+        if args.warmup_requests:
+            await workload.run(client, args.warmup_requests, args.concurrency)
+            workload.latencies.clear()
+            workload.errors.clear()
+
+        elapsed = await workload.run(client, args.requests, args.concurrency)
+
+    all_latencies = [latency for latencies in workload.latencies.values()
+                     for latency in latencies]
+
+    return {
+        "commit": get_commit(),
+        "timestamp": datetime.now(UTC).isoformat(),
+        "config": {
+            "transport": args.transport,
+            "workers": args.workers if args.transport == "uvicorn" else 1,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "dataset_size": args.dataset_size,
+            "mix": args.mix,
+        },
+        "elapsed_seconds": round(elapsed, 3),
+        "total": summarize(all_latencies, sum(workload.errors.values()), elapsed),
+        "operations": {
+            operation: summarize(latencies, workload.errors[operation], elapsed)
+            for operation, latencies in sorted(workload.latencies.items())
+        },
+    }
+
+
+def compare_results(old_path: Path, new_path: Path) -> str:
+    """Таблица изменений RPS и перцентилей между двумя прогонами.
+
+    Args:
+        old_path (Path): JSON результатов базового прогона.
+        new_path (Path): JSON результатов нового прогона.
+
+    Returns:
+        str: Таблица для вывода в консоль.
+
+    """
+    old_results = json.loads(old_path.read_text())
+    new_results = json.loads(new_path.read_text())
+    old_operations = {"total": old_results["total"], **old_results["operations"]}
+    new_operations = {"total": new_results["total"], **new_results["operations"]}
+
+    lines = [f"{old_results['commit']} -> {new_results['commit']}"]
+    for operation, new_summary in new_operations.items():
+        old_summary = old_operations.get(operation)
+        if old_summary is None:
+            continue
+        changes = []
+        for metric in ("rps", "p50_ms", "p95_ms", "p99_ms"):
+            old_value, new_value = old_summary[metric], new_summary[metric]
+            change = (new_value - old_value) / old_value * 100 if old_value else 0.0
+            changes.append(f"{metric} {old_value} -> {new_value} ({change:+.1f}%)")
+        lines.append(f"{operation:>8}: " + ", ".join(changes))
+
+    return "\n".join(lines) + "\n"
+
+
+def main() -> None:
+    """Запуск бенчмарка или сравнения результатов из командной строки."""
+    parser = argparse.ArgumentParser(description="API load benchmark.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run")
+    run_parser.add_argument("--transport", choices=("asgi", "uvicorn"), default="asgi")
+    run_parser.add_argument("--workers", type=int, default=1)
+    run_parser.add_argument("--concurrency", type=int, default=16)
+    run_parser.add_argument("--requests", type=int, default=5000)
+    run_parser.add_argument("--warmup-requests", type=int, default=500)
+    run_parser.add_argument("--dataset-size", type=int, default=1000)
+    run_parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX))
+    run_parser.add_argument("--output", type=Path, default=None)
+
+    compare_parser = subparsers.add_parser("compare")
+    compare_parser.add_argument("old", type=Path)
+    compare_parser.add_argument("new", type=Path)
+
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        sys.stdout.write(compare_results(args.old, args.new))
+        return
+
+    results = asyncio.run(run_benchmark(args))
+    output = args.output or RESULTS_DIR / (
+        f"{datetime.now(UTC):%Y%m%dT%H%M%S}-{results['commit']}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    sys.stdout.write(json.dumps(results["total"]) + f"\nSaved to {output}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""Модуль контроля допуска запросов (admission control).
+
+Каждый воркер пропускает в обработку не больше ADMISSION_MAX_CONCURRENCY
+запросов, а каждый класс маршрутов - не больше своего лимита. Остальные ждут
+в ограниченной очереди класса и получают 503 с Retry-After, если очередь
+заполнена или ожидание превысило бюджет класса. Так при медленной базе
+запросы не копятся в ожидании пула соединений, а отклоняются сразу.
+
+Освободившееся место сначала получают редиректы, затем POST /api/shorten,
+затем остальные методы /api: под перегрузкой отклоняются в первую очередь
+менее важные запросы. Лимит редиректов меньше общего лимита, поэтому
+остальные классы не вытесняются редиректами полностью.
+"""
+import asyncio
+import time
+from collections import deque
+from functools import lru_cache
+from typing import NamedTuple
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from core.config import (
+    ADMISSION_API_LIMIT,
+    ADMISSION_API_QUEUE_SIZE,
+    ADMISSION_API_QUEUE_TIMEOUT_SECONDS,
+    ADMISSION_MAX_CONCURRENCY,
+    ADMISSION_REDIRECT_LIMIT,
+    ADMISSION_REDIRECT_QUEUE_SIZE,
+    ADMISSION_REDIRECT_QUEUE_TIMEOUT_SECONDS,
+    ADMISSION_RETRY_AFTER_SECONDS,
+    ADMISSION_SHORTEN_LIMIT,
+    ADMISSION_SHORTEN_QUEUE_SIZE,
+    ADMISSION_SHORTEN_QUEUE_TIMEOUT_SECONDS,
+)
+from core.metrics import ADMISSION_QUEUE_WAIT, ADMISSION_REQUESTS
+
+# Пути без контроля допуска: документация и проверки состояния воркера.
+ADMISSION_EXEMPT_PATHS = frozenset((
+    "/docs", "/redoc", "/openapi.json", "/healthz", "/readyz"
+))
+
+
+class RouteClass(NamedTuple):
+    """Класс маршрутов со своим лимитом и очередью."""
+
+    name: str
+    # Меньше - важнее: место в первую очередь получает класс с меньшим priority.
+    priority: int
+    limit: int
+    queue_size: int
+    queue_timeout_seconds: float
+
+
+class AdmissionController:
+    """Приоритетный семафор с лимитами и ограниченными очередями по классам."""
+
+    def __init__(self, max_concurrency: int, route_classes: list[RouteClass]) -> None:
+        """Инициализация контроля допуска.
+
+        Args:
+            max_concurrency (int): Общий лимит одновременных запросов.
+            route_classes (list[RouteClass]): Классы маршрутов.
+
+        """
+        self.max_concurrency = max_concurrency
+        self.route_classes = sorted(route_classes, key=lambda route_class:
+                                    route_class.priority)
+        self.active_count = 0
+        self.active_counts = {route_class.name: 0 for route_class in route_classes}
+        self.waiters: dict[str, deque[asyncio.Future[None]]] = {
+            route_class.name: deque() for route_class in route_classes
+        }
+
+    def _can_admit(self, route_class: RouteClass) -> bool:
+        """Проверка свободного места в общем лимите и в лимите класса."""
+        return self.active_count < self.max_concurrency and \
+            self.active_counts[route_class.name] < route_class.limit
+
+    def _has_admittable_waiters_before(self, route_class: RouteClass) -> bool:
+        """Проверка ожидающих того же или более важного класса, которым есть место.
+
+        Ожидающие класса, упершегося в свой лимит, не задерживают запросы
+        других классов, для которых место есть.
+        """
+        return any(self.waiters[other_class.name] and self._can_admit(other_class)
+                   for other_class in self.route_classes
+                   if other_class.priority <= route_class.priority)
+
+    def _admit(self, route_class: RouteClass) -> None:
+        """Занятие места запросом класса."""
+        self.active_count += 1
+        self.active_counts[route_class.name] += 1
+
+    async def acquire(self, route_class: RouteClass) -> bool:
+        """Ожидание места для запроса.
+
+        Args:
+            route_class (RouteClass): Класс маршрута запроса.
+
+        Returns:
+            bool: True, если запрос допущен (место нужно освободить release),
+            False, если очередь заполнена или бюджет ожидания исчерпан.
+
+        """
+        if self._can_admit(route_class) \
+                and not self._has_admittable_waiters_before(route_class):
+            self._admit(route_class)
+            return True
+
+        waiters = self.waiters[route_class.name]
+        if len(waiters) >= route_class.queue_size:
+            return False
+
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        waiters.append(waiter)
+        try:
+            async with asyncio.timeout(route_class.queue_timeout_seconds):
+                await waiter
+        except TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            self._discard_waiter(route_class, waiter)
+            raise
+
+        # Место могло быть выдано одновременно с таймаутом: тогда запрос допущен.
+        if waiter.done() and not waiter.cancelled():
+            return True
+
+        self._discard_waiter(route_class, waiter)
+        return False
+
+    def _discard_waiter(
+        self,
+        route_class: RouteClass,
+        waiter: asyncio.Future[None]
+    ) -> None:
+        """Снятие ожидания (уже выданное ожидающему место освобождается)."""
+        if waiter.done() and not waiter.cancelled():
+            self.release(route_class)
+        elif waiter in self.waiters[route_class.name]:
+            self.waiters[route_class.name].remove(waiter)
+
+    def release(self, route_class: RouteClass) -> None:
+        """Освобождение места и передача его ожидающим в порядке приоритета.
+
+        Args:
+            route_class (RouteClass): Класс маршрута завершенного запроса.
+
+        """
+        self.active_count -= 1
+        self.active_counts[route_class.name] -= 1
+
+        for waiting_class in self.route_classes:
+            waiters = self.waiters[waiting_class.name]
+            while waiters and self._can_admit(waiting_class):
+                waiter = waiters.popleft()
+                # Отмененное по таймауту ожидание еще могло не успеть сняться.
+                if not waiter.done():
+                    self._admit(waiting_class)
+                    waiter.set_result(None)
+
+
+REDIRECT_ROUTE_CLASS = RouteClass(
+    "redirect", 0, ADMISSION_REDIRECT_LIMIT, ADMISSION_REDIRECT_QUEUE_SIZE,
+    ADMISSION_REDIRECT_QUEUE_TIMEOUT_SECONDS,
+)
+SHORTEN_ROUTE_CLASS = RouteClass(
+    "shorten", 1, ADMISSION_SHORTEN_LIMIT, ADMISSION_SHORTEN_QUEUE_SIZE,
+    ADMISSION_SHORTEN_QUEUE_TIMEOUT_SECONDS,
+)
+API_ROUTE_CLASS = RouteClass(
+    "api", 2, ADMISSION_API_LIMIT, ADMISSION_API_QUEUE_SIZE,
+    ADMISSION_API_QUEUE_TIMEOUT_SECONDS,
+)
+
+
+def get_route_class(scope: Scope) -> RouteClass | None:
+    """Определение класса маршрута по пути запроса (до роутинга).
+
+    Args:
+        scope (Scope): ASGI scope запроса.
+
+    Returns:
+        RouteClass | None: Класс маршрута или None, если запрос не ограничивается.
+
+    """
+    path: str = scope["path"]
+    method: str = scope["method"]
+
+    if path.startswith("/internal/") or path in ADMISSION_EXEMPT_PATHS:
+        return None
+    if path.rstrip("/") == "/api/shorten" and method == "POST":
+        return SHORTEN_ROUTE_CLASS
+    if path.startswith("/api/"):
+        return API_ROUTE_CLASS
+    if method in {"GET", "HEAD"} and path.count("/") == 1:
+        return REDIRECT_ROUTE_CLASS
+
+    return None
+
+
+class AdmissionControlMiddleware:
+    """ASGI middleware, отклоняющий запросы сверх лимитов с 503."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        admission_controller: AdmissionController | None = None
+    ) -> None:
+        """Инициализация middleware.
+
+        Args:
+            app (ASGIApp): Оборачиваемое приложение.
+            admission_controller (AdmissionController | None, optional): Контроль
+                допуска (для тестов). Defaults to None (контроль воркера).
+
+        """
+        self.app = app
+        self.admission_controller = admission_controller or get_admission_controller()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Обработка запроса после получения места."""
+        route_class = get_route_class(scope) if scope["type"] == "http" else None
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.perf_counter()
+        is_admitted = await self.admission_controller.acquire(route_class)
+        ADMISSION_QUEUE_WAIT.observe(time.perf_counter() - started_at, route_class.name)
+
+        if not is_admitted:
+            ADMISSION_REQUESTS.inc(route_class.name, "rejected")
+            response = JSONResponse(
+                {"detail": "Service is overloaded, please, repeat request later"},
+                status_code=503,
+                headers={"Retry-After": str(ADMISSION_RETRY_AFTER_SECONDS)},
+            )
+            await response(scope, receive, send)
+            return
+
+        ADMISSION_REQUESTS.inc(route_class.name, "admitted")
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.admission_controller.release(route_class)
+
+
+@lru_cache
+def get_admission_controller() -> AdmissionController:
+    """Получение контроля допуска текущего воркера.
+
+    Raises:
+        ValueError: Если лимит редиректов не меньше общего лимита.
+
+    Returns:
+        AdmissionController: Контроль допуска.
+
+    """
+    if REDIRECT_ROUTE_CLASS.limit >= ADMISSION_MAX_CONCURRENCY:
+        msg = "ADMISSION_REDIRECT_LIMIT must be less than ADMISSION_MAX_CONCURRENCY"
+        raise ValueError(msg)
+
+    return AdmissionController(ADMISSION_MAX_CONCURRENCY, [
+        REDIRECT_ROUTE_CLASS, SHORTEN_ROUTE_CLASS, API_ROUTE_CLASS,
+    ])
@@ -0,0 +1,185 @@
+"""Модуль кэша редиректов в памяти воркера."""
+import time
+from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
+from typing import NamedTuple
+
+from core.config import (
+    REDIRECT_CACHE_REVALIDATE_SECONDS,
+    REDIRECT_CACHE_SIZE,
+    REDIRECT_CACHE_TTL_SECONDS,
+)
+
+
+class CachedRedirect(NamedTuple):
+    """Все, что нужно редиректу: без ORM объекта и обращений к базе."""
+
+    shorted_url_id: int
+    original_url: str
+    expires_at: datetime | None
+
+
+# Запись кэша: срок жизни, срок следующей проверки и редирект.
+RedirectCacheEntry = tuple[float, float, CachedRedirect]
+
+
+class RedirectCache:
+    """LRU кэш редиректов с TTL и закрепленными (популярными) алиасами.
+
+    Закрепленные алиасы не вытесняются LRU, но тоже устаревают по TTL:
+    их периодически перезагружает из базы фоновая задача.
+
+    Кэш у каждого воркера свой, и удаление ссылки очищает его только в
+    воркере, обработавшем удаление. Поэтому запись, к которой обращаются
+    дольше revalidate_seconds, перепроверяется вызывающим кодом по надгробию
+    общего кэша (needs_revalidation/mark_revalidated): удаленная в другом
+    воркере ссылка отдается не дольше revalidate_seconds при общем кэше
+    и не дольше ttl_seconds без него (или при его недоступности).
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl_seconds: float,
+        revalidate_seconds: float = float("inf"),
+    ) -> None:
+        """Инициализация кэша.
+
+        Args:
+            max_size (int): Максимальное количество незакрепленных алиасов.
+            ttl_seconds (float): Время жизни записи.
+            revalidate_seconds (float, optional): Через сколько секунд запись
+                нужно перепроверить. Defaults to float("inf").
+
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.revalidate_seconds = revalidate_seconds
+        self.entries: OrderedDict[str, RedirectCacheEntry] = OrderedDict()
+        self.pinned_entries: dict[str, RedirectCacheEntry] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, alias: str) -> CachedRedirect | None:
+        """Получение редиректа из кэша.
+
+        Args:
+            alias (str): alias ссылки.
+
+        Returns:
+            CachedRedirect | None: Редирект или None, если его нет или он устарел.
+
+        """
+        entry = self.pinned_entries.get(alias)
+        if entry is None:
+            entry = self.entries.get(alias)
+            if entry is not None:
+                self.entries.move_to_end(alias)
+
+        if entry is None or entry[0] < time.monotonic():
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return entry[2]
+
+    def _get_entry(self, alias: str) -> RedirectCacheEntry | None:
+        """Получение записи алиаса без учета LRU и статистики."""
+        entry = self.pinned_entries.get(alias)
+        return entry if entry is not None else self.entries.get(alias)
+
+    def needs_revalidation(self, alias: str) -> bool:
+        """Проверка того, что запись пора перепроверить по общему кэшу.
+
+        Args:
+            alias (str): alias ссылки.
+
+        Returns:
+            bool: True, если с последней проверки прошло revalidate_seconds.
+
+        """
+        entry = self._get_entry(alias)
+        return entry is not None and entry[1] <= time.monotonic()
+
+    def mark_revalidated(self, alias: str) -> None:
+        """Откладывание следующей проверки записи (срок жизни не продлевается).
+
+        Args:
+            alias (str): alias ссылки.
+
+        """
+        entry = self._get_entry(alias)
+        if entry is None:
+            return
+
+        entry = (entry[0], time.monotonic() + self.revalidate_seconds, entry[2])
+        if alias in self.pinned_entries:
+            self.pinned_entries[alias] = entry
+        else:
+            self.entries[alias] = entry
+
+    def set(self, alias: str, cached_redirect: CachedRedirect) -> None:
+        """Добавление редиректа в кэш.
+
+        Args:
+            alias (str): alias ссылки.
+            cached_redirect (CachedRedirect): Редирект.
+
+        """
+        if self.max_size <= 0:
+            return
+
+        now = time.monotonic()
+        entry = (now + self.ttl_seconds, now + self.revalidate_seconds, cached_redirect)
+        if alias in self.pinned_entries:
+            self.pinned_entries[alias] = entry
+            return
+
+        self.entries[alias] = entry
+        self.entries.move_to_end(alias)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def pin(self, cached_redirects: dict[str, CachedRedirect]) -> None:
+        """Замена закрепленных алиасов.
+
+        Args:
+            cached_redirects (dict[str, CachedRedirect]): Редиректы по alias'ам.
+
+        """
+        if self.max_size <= 0:
+            return
+
+        now = time.monotonic()
+        deadline = now + self.ttl_seconds
+        revalidate_at = now + self.revalidate_seconds
+        self.pinned_entries = {
+            alias: (deadline, revalidate_at, cached_redirect)
+            for alias, cached_redirect in cached_redirects.items()
+        }
+
+        for alias in self.pinned_entries:
+            self.entries.pop(alias, None)
+
+    def invalidate(self, alias: str) -> None:
+        """Удаление алиаса из кэша (например, при удалении ссылки).
+
+        Args:
+            alias (str): alias ссылки.
+
+        """
+        self.entries.pop(alias, None)
+        self.pinned_entries.pop(alias, None)
+
+
+@lru_cache
+def get_redirect_cache() -> RedirectCache:
+    """Получение кэша редиректов текущего воркера.
+
+    Returns:
+        RedirectCache: Кэш редиректов.
+
+    """
+    return RedirectCache(REDIRECT_CACHE_SIZE, REDIRECT_CACHE_TTL_SECONDS,
+                         REDIRECT_CACHE_REVALIDATE_SECONDS)
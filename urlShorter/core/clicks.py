@@ -0,0 +1,429 @@
+"""Модуль аналитики переходов по ссылкам.
+
+Редирект только кладет событие в кольцевой буфер в памяти воркера, а фоновая
+задача пачками пишет события через COPY в партиционированную по дням таблицу
+click_events и инкрементально обновляет почасовые и дневные агрегаты.
+"""
+import time
+from collections import Counter, deque
+from datetime import UTC, datetime, timedelta
+from enum import IntEnum
+from functools import lru_cache
+from urllib.parse import urlsplit
+
+from sqlalchemy import Table, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import CLICK_EVENTS_BUFFER_SIZE, CLICK_EVENTS_RETENTION_DAYS
+from database.models import (
+    click_events_table,
+    click_rollups_daily_table,
+    click_rollups_hourly_table,
+)
+
+# Максимальные периоды, за которые можно получить агрегаты.
+MAX_STATS_HOURS = 24 * 7
+MAX_STATS_DAYS = 366
+
+# Сырое событие в буфере: shorted_url_id, unix-время, Referer, User-Agent.
+RawClickEvent = tuple[int, float, str | None, str | None]
+# Событие в формате таблицы click_events.
+ClickEventRecord = tuple[int, datetime, str | None, int]
+
+
+class UserAgentClass(IntEnum):
+    """Класс клиента, определенный по User-Agent."""
+
+    UNKNOWN = 0
+    DESKTOP = 1
+    MOBILE = 2
+    BOT = 3
+
+
+def get_user_agent_class(user_agent: str | None) -> UserAgentClass:
+    """Грубое определение класса клиента по User-Agent.
+
+    Args:
+        user_agent (str | None): Заголовок User-Agent.
+
+    Returns:
+        UserAgentClass: Класс клиента.
+
+    """
+    if not user_agent:
+        return UserAgentClass.UNKNOWN
+
+    user_agent = user_agent.lower()
+
+    if any(marker in user_agent for marker in ("bot", "crawl", "spider")):
+        return UserAgentClass.BOT
+    if any(marker in user_agent for marker in ("mobi", "android", "iphone")):
+        return UserAgentClass.MOBILE
+    if "mozilla" in user_agent:
+        return UserAgentClass.DESKTOP
+
+    return UserAgentClass.UNKNOWN
+
+
+def get_referrer_host(referrer: str | None) -> str | None:
+    """Получение хоста из заголовка Referer.
+
+    Args:
+        referrer (str | None): Заголовок Referer.
+
+    Returns:
+        str | None: Хост в нижнем регистре или None.
+
+    """
+    if not referrer:
+        return None
+
+    try:
+        return urlsplit(referrer).hostname
+    except ValueError:
+        return None
+
+
+class ClickEventsBuffer:
+    """Кольцевой буфер событий переходов в памяти воркера."""
+
+    def __init__(self, max_size: int) -> None:
+        """Инициализация буфера.
+
+        Args:
+            max_size (int): Максимальное количество событий. При переполнении
+                вытесняются самые старые.
+
+        """
+        self.events: deque[RawClickEvent] = deque(maxlen=max_size)
+        # Количество вытесненных без записи событий.
+        self.dropped_count = 0
+
+    def add(
+        self,
+        shorted_url_id: int,
+        referrer: str | None,
+        user_agent: str | None
+    ) -> None:
+        """Добавление события перехода (без обращений к базе).
+
+        Args:
+            shorted_url_id (int): id ссылки.
+            referrer (str | None): Заголовок Referer.
+            user_agent (str | None): Заголовок User-Agent.
+
+        """
+        if len(self.events) == self.events.maxlen:
+            self.dropped_count += 1
+
+        self.events.append((shorted_url_id, time.time(), referrer, user_agent))
+
+    def drain(self) -> list[RawClickEvent]:
+        """Забрать все накопленные события.
+
+        Returns:
+            list[RawClickEvent]: События в порядке поступления.
+
+        """
+        events = list(self.events)
+        self.events.clear()
+
+        return events
+
+    def restore(self, events: list[RawClickEvent]) -> None:
+        """Вернуть в буфер события, которые не удалось записать.
+
+        Если буфер успел заполниться новыми событиями, вытесняются самые старые
+        из возвращаемых (как при add), а не новые.
+
+        Args:
+            events (list[RawClickEvent]): События из drain().
+
+        """
+        overflow = len(events) + len(self.events) - (self.events.maxlen or 0)
+        if overflow > 0:
+            self.dropped_count += overflow
+            events = events[overflow:]
+
+        self.events.extendleft(reversed(events))
+
+
+class ClickEventsService:
+    """Сервис для записи событий переходов и чтения агрегатов."""
+
+    def __init__(self, db: AsyncSession) -> None:
+        """Инициализация сервиса событий переходов.
+
+        Args:
+            db (AsyncSession): Сессия базы данных.
+
+        """
+        self.db: AsyncSession = db
+
+    async def _create_click_events_partitions(
+        self,
+        days: set[datetime]
+    ) -> set[datetime]:
+        """Создание недостающих дневных партиций click_events (без коммита).
+
+        Args:
+            days (set[datetime]): Начала дней (UTC), для которых нужны партиции.
+
+        Returns:
+            set[datetime]: Дни, партиции которых создаются в текущей транзакции.
+            Запоминать их можно только после коммита.
+
+        """
+        missing_days = days - get_known_click_events_partitions()
+        if not missing_days:
+            return set()
+
+        # Защита от параллельного создания одной партиции разными воркерами.
+        await self.db.execute(text(
+            "SELECT pg_advisory_xact_lock(hashtext('click_events_partitions'));"
+        ))
+
+        for day in sorted(missing_days):
+            next_day = day + timedelta(days=1)
+            await self.db.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {get_click_events_partition_name(day)} "
+                "PARTITION OF click_events "
+                f"FOR VALUES FROM ('{day.isoformat()}') TO ('{next_day.isoformat()}');"
+            ))
+
+        return missing_days
+
+    async def _upsert_rollups(
+        self,
+        rollups_table: Table,
+        clicks_by_bucket: Counter[tuple[int, datetime]]
+    ) -> None:
+        """Инкрементальное обновление агрегатов.
+
+        Args:
+            rollups_table (Table): Таблица агрегатов.
+            clicks_by_bucket (Counter[tuple[int, datetime]]): Количество
+                переходов по (shorted_url_id, bucket).
+
+        """
+        # Сортировка ключей исключает deadlock'и между воркерами.
+        rollups = [
+            {"shorted_url_id": shorted_url_id, "bucket": bucket, "clicks": clicks}
+            for (shorted_url_id, bucket), clicks in sorted(clicks_by_bucket.items())
+        ]
+
+        insert_rollups_stmt = insert(rollups_table)
+        upsert_rollups_stmt = insert_rollups_stmt.on_conflict_do_update(
+            index_elements=[rollups_table.c.shorted_url_id, rollups_table.c.bucket],
+            set_={"clicks": rollups_table.c.clicks
+                  + insert_rollups_stmt.excluded.clicks},
+        )
+
+        await self.db.execute(upsert_rollups_stmt, rollups)
+
+    async def write_click_events(self, events: list[RawClickEvent]) -> int:
+        """Запись пачки событий через COPY и обновление агрегатов в одной транзакции.
+
+        Args:
+            events (list[RawClickEvent]): События из буфера.
+
+        Returns:
+            int: Количество записанных событий.
+
+        """
+        if not events:
+            return 0
+
+        records: list[ClickEventRecord] = [
+            (
+                shorted_url_id,
+                datetime.fromtimestamp(occurred_at, UTC),
+                get_referrer_host(referrer),
+                get_user_agent_class(user_agent),
+            )
+            for shorted_url_id, occurred_at, referrer, user_agent in events
+        ]
+
+        hourly_clicks: Counter[tuple[int, datetime]] = Counter()
+        daily_clicks: Counter[tuple[int, datetime]] = Counter()
+        for shorted_url_id, occurred_at, _, _ in records:
+            hour = occurred_at.replace(minute=0, second=0, microsecond=0)
+            hourly_clicks[shorted_url_id, hour] += 1
+            daily_clicks[shorted_url_id, hour.replace(hour=0)] += 1
+
+        created_days = await self._create_click_events_partitions(
+            {day for _, day in daily_clicks}
+        )
+
+        # COPY идет через то же asyncpg соединение, внутри уже начатой транзакции.
+        connection = await self.db.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(  # type: ignore
+            click_events_table.name,
+            records=records,
+            columns=[column.name for column in click_events_table.columns],
+        )
+
+        await self._upsert_rollups(click_rollups_hourly_table, hourly_clicks)
+        await self._upsert_rollups(click_rollups_daily_table, daily_clicks)
+
+        await self.db.commit()
+        # При откате транзакции партиции не созданы и не запоминаются.
+        get_known_click_events_partitions().update(created_days)
+
+        return len(records)
+
+    async def drop_expired_click_events_partitions(self) -> None:
+        """Удаление партиций click_events старше CLICK_EVENTS_RETENTION_DAYS."""
+        oldest_kept_day = get_day_start(
+            datetime.now(UTC) - timedelta(days=CLICK_EVENTS_RETENTION_DAYS)
+        )
+        oldest_kept_partition = get_click_events_partition_name(oldest_kept_day)
+
+        select_partitions_stmt = text(
+            "SELECT inhrelid::regclass::text FROM pg_inherits "
+            "WHERE inhparent = 'click_events'::regclass;"
+        )
+        partitions = list(await self.db.scalars(select_partitions_stmt))
+
+        # Имена партиций сравнимы как строки: click_events_YYYYMMDD.
+        for partition in partitions:
+            if partition < oldest_kept_partition:
+                await self.db.execute(text(f"DROP TABLE IF EXISTS {partition};"))
+
+        await self.db.commit()
+        get_known_click_events_partitions().clear()
+
+    async def get_clicks_rollups(
+        self,
+        rollups_table: Table,
+        shorted_url_id: int,
+        after_time: datetime
+    ) -> list[tuple[datetime, int]]:
+        """Получение агрегатов переходов по ссылке.
+
+        Args:
+            rollups_table (Table): Таблица агрегатов.
+            shorted_url_id (int): id ссылки.
+            after_time (datetime): Начало периода.
+
+        Returns:
+            list[tuple[datetime, int]]: Пары (bucket, clicks) по возрастанию bucket.
+
+        """
+        select_rollups_stmt = select(
+            rollups_table.c.bucket, rollups_table.c.clicks
+        ).where(
+            rollups_table.c.shorted_url_id == shorted_url_id,
+            rollups_table.c.bucket >= after_time,
+        ).order_by(rollups_table.c.bucket)
+
+        result = await self.db.execute(select_rollups_stmt)
+        return [(bucket, clicks) for bucket, clicks in result]
+
+    async def get_hourly_clicks(
+        self,
+        shorted_url_id: int,
+        hours: int
+    ) -> list[tuple[datetime, int]]:
+        """Получение почасовых переходов по ссылке за последние hours часов.
+
+        Args:
+            shorted_url_id (int): id ссылки.
+            hours (int): Количество часов.
+
+        Returns:
+            list[tuple[datetime, int]]: Пары (час, clicks).
+
+        """
+        hours = min(max(1, hours), MAX_STATS_HOURS)
+        after_time = datetime.now(UTC).replace(minute=0, second=0, microsecond=0) \
+            - timedelta(hours=hours - 1)
+
+        return await self.get_clicks_rollups(
+            click_rollups_hourly_table, shorted_url_id, after_time
+        )
+
+    async def get_daily_clicks(
+        self,
+        shorted_url_id: int,
+        days: int
+    ) -> list[tuple[datetime, int]]:
+        """Получение дневных переходов по ссылке за последние days дней.
+
+        Args:
+            shorted_url_id (int): id ссылки.
+            days (int): Количество дней.
+
+        Returns:
+            list[tuple[datetime, int]]: Пары (день, clicks).
+
+        """
+        days = min(max(1, days), MAX_STATS_DAYS)
+        after_time = get_day_start(datetime.now(UTC)) - timedelta(days=days - 1)
+
+        return await self.get_clicks_rollups(
+            click_rollups_daily_table, shorted_url_id, after_time
+        )
+
+
+def get_day_start(moment: datetime) -> datetime:
+    """Начало дня (UTC) для момента времени.
+
+    Args:
+        moment (datetime): Момент времени с часовым поясом.
+
+    Returns:
+        datetime: Полночь по UTC.
+
+    """
+    return moment.astimezone(UTC).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def get_click_events_partition_name(day: datetime) -> str:
+    """Имя дневной партиции click_events.
+
+    Args:
+        day (datetime): Начало дня (UTC).
+
+    Returns:
+        str: Имя партиции.
+
+    """
+    return f"click_events_{day:%Y%m%d}"
+
+
+@lru_cache
+def get_known_click_events_partitions() -> set[datetime]:
+    """Получение множества дней, партиции которых уже созданы этим воркером.
+
+    Returns:
+        set[datetime]: Начала дней (UTC).
+
+    """
+    return set()
+
+
+@lru_cache
+def get_click_events_buffer() -> ClickEventsBuffer:
+    """Получение буфера событий переходов текущего воркера.
+
+    Returns:
+        ClickEventsBuffer: Буфер событий переходов.
+
+    """
+    return ClickEventsBuffer(CLICK_EVENTS_BUFFER_SIZE)
+
+
+def get_click_events_service(db: AsyncSession) -> ClickEventsService:
+    """Получение сервиса для работы с событиями переходов.
+
+    Args:
+        db (AsyncSession): Сессия базы данных.
+
+    Returns:
+        ClickEventsService: Сервис для работы с событиями переходов.
+
+    """
+    return ClickEventsService(db)
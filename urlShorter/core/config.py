@@ -26,6 +26,235 @@ MAX_PER_PAGE_URLS_COUNT = int(os.getenv("MAX_PER_PAGE_URLS_COUNT", "50"))
 MAX_GET_RANDOM_ALIAS_ATTEMPT_COUNT = int(os.getenv(
     "MAX_GET_RANDOM_ALIAS_ATTEMPT_COUNT", "5"
 ))
+# Возвращать уже существующую ссылку для того же url вместо создания новой.
+URL_DEDUPLICATION_ENABLED = os.getenv(
+    "URL_DEDUPLICATION_ENABLED", "false"
+).lower() == "true"
+
+# EXPIRED URLS REAPER BLOCK
+# Как часто удалять истекшие ссылки (0 - не удалять).
+EXPIRED_URLS_REAPER_INTERVAL_SECONDS = float(os.getenv(
+    "EXPIRED_URLS_REAPER_INTERVAL_SECONDS", "60"
+))
+EXPIRED_URLS_REAPER_BATCH_SIZE = int(os.getenv("EXPIRED_URLS_REAPER_BATCH_SIZE", "500"))
+
+# URLS TIERING BLOCK
+# Как часто переносить давно не кликаемые ссылки в холодную партицию (0 - никогда).
+URLS_TIERING_INTERVAL_SECONDS = float(os.getenv(
+    "URLS_TIERING_INTERVAL_SECONDS", "3600"
+))
+# Через сколько дней без кликов ссылка считается холодной.
+URLS_COLD_AFTER_DAYS = float(os.getenv("URLS_COLD_AFTER_DAYS", "7"))
+URLS_TIERING_BATCH_SIZE = int(os.getenv("URLS_TIERING_BATCH_SIZE", "1000"))
 
 # LIMITS BLOCK
 USER_CREATE_URL_IN_MINUTE_LIMIT = int(os.getenv("USER_CREATE_URL_IN_MINUTE_LIMIT", "5"))
+
+# REDIRECT SNAPSHOT BLOCK
+# Путь до снимка редиректов (пусто - снимок не используется).
+REDIRECT_SNAPSHOT_PATH = os.getenv("REDIRECT_SNAPSHOT_PATH", "")
+REDIRECT_SNAPSHOT_DELTA_PATH = os.getenv("REDIRECT_SNAPSHOT_DELTA_PATH", "")
+REDIRECT_SNAPSHOT_REFRESH_SECONDS = float(os.getenv(
+    "REDIRECT_SNAPSHOT_REFRESH_SECONDS", "5"
+))
+# Искать ли в базе алиасы, которых нет в снимке.
+REDIRECT_SNAPSHOT_DB_FALLBACK = os.getenv(
+    "REDIRECT_SNAPSHOT_DB_FALLBACK", "true"
+).lower() == "true"
+
+# CLICK EVENTS BLOCK
+# Размер кольцевого буфера событий переходов в памяти воркера.
+CLICK_EVENTS_BUFFER_SIZE = int(os.getenv("CLICK_EVENTS_BUFFER_SIZE", "100000"))
+# Как часто записывать события переходов в базу (0 - не записывать).
+CLICK_EVENTS_FLUSH_INTERVAL_SECONDS = float(os.getenv(
+    "CLICK_EVENTS_FLUSH_INTERVAL_SECONDS", "5"
+))
+# Сколько дней хранить сырые события (агрегаты хранятся всегда).
+CLICK_EVENTS_RETENTION_DAYS = int(os.getenv("CLICK_EVENTS_RETENTION_DAYS", "30"))
+
+# VISITOR SKETCHES BLOCK
+# Как часто сливать скетчи уникальных посетителей в базу (0 - не считать).
+VISITOR_SKETCHES_FLUSH_INTERVAL_SECONDS = float(os.getenv(
+    "VISITOR_SKETCHES_FLUSH_INTERVAL_SECONDS", "30"
+))
+# Максимум ссылок со скетчами в памяти воркера между сливами (4 КБ на ссылку).
+VISITOR_SKETCHES_MAX_LINKS = int(os.getenv("VISITOR_SKETCHES_MAX_LINKS", "10000"))
+
+# REDIRECT CACHE BLOCK
+# Размер кэша редиректов в памяти воркера (0 - кэш не используется).
+REDIRECT_CACHE_SIZE = int(os.getenv("REDIRECT_CACHE_SIZE", "10000"))
+# Сколько секунд удаленная в другом воркере ссылка может отдаваться из кэша
+# без общего кэша (или при его недоступности).
+REDIRECT_CACHE_TTL_SECONDS = float(os.getenv("REDIRECT_CACHE_TTL_SECONDS", "60"))
+# Как часто запись кэша перепроверяется по надгробию общего кэша: столько
+# секунд удаленная в другом воркере ссылка может отдаваться при общем кэше.
+# Должно быть меньше SHARED_CACHE_TOMBSTONE_TTL_SECONDS.
+REDIRECT_CACHE_REVALIDATE_SECONDS = float(
+    os.getenv("REDIRECT_CACHE_REVALIDATE_SECONDS", "1")
+)
+
+# HOT LINKS BLOCK
+# Сколько алиасов отслеживает Space-Saving скетч популярных ссылок.
+HOT_LINKS_TRACKER_CAPACITY = int(os.getenv("HOT_LINKS_TRACKER_CAPACITY", "1000"))
+# Сколько самых популярных ссылок закрепляется в кэше редиректов.
+HOT_LINKS_TOP_K = int(os.getenv("HOT_LINKS_TOP_K", "100"))
+# Как часто перезагружать закрепленные ссылки (0 - только при старте).
+HOT_LINKS_WARMUP_INTERVAL_SECONDS = float(os.getenv(
+    "HOT_LINKS_WARMUP_INTERVAL_SECONDS", "30"
+))
+
+# SIDE EFFECTS JOURNAL BLOCK
+# Каталог локального журнала кликов (пусто - клик коммитится в базу на редиректе,
+# а редиректы из снимка не увеличивают clicks: edge-воркерам нужен журнал).
+SIDE_EFFECTS_JOURNAL_DIR = os.getenv("SIDE_EFFECTS_JOURNAL_DIR", "")
+# Как часто сбрасывать журнал на диск (fsync одним вызовом на пачку кликов).
+SIDE_EFFECTS_JOURNAL_FSYNC_INTERVAL_SECONDS = float(os.getenv(
+    "SIDE_EFFECTS_JOURNAL_FSYNC_INTERVAL_SECONDS", "0.05"
+))
+# Как часто применять накопленные клики к базе.
+SIDE_EFFECTS_JOURNAL_APPLY_INTERVAL_SECONDS = float(os.getenv(
+    "SIDE_EFFECTS_JOURNAL_APPLY_INTERVAL_SECONDS", "1"
+))
+
+# SERVER TIMING BLOCK
+# Добавлять ли в ответы заголовок Server-Timing и логировать ли запросы.
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "true").lower() == "true"
+# Запросы дольше порога логируются с уровнем WARNING.
+SLOW_REQUEST_THRESHOLD_MS = float(os.getenv("SLOW_REQUEST_THRESHOLD_MS", "500"))
+
+# METRICS BLOCK
+# Каталог, через который воркеры одного хоста обмениваются метриками
+# (пусто - /internal/metrics отдает метрики только ответившего воркера).
+METRICS_DIR = os.getenv("METRICS_DIR", "")
+METRICS_DUMP_INTERVAL_SECONDS = float(os.getenv("METRICS_DUMP_INTERVAL_SECONDS", "5"))
+
+# INTERNAL API BLOCK
+# Токен всех служебных методов /internal (профилирование, метрики, популярные
+# ссылки): Authorization: Bearer <token>. Пусто - методы выключены.
+INTERNAL_API_TOKEN = os.getenv("INTERNAL_API_TOKEN", "")
+
+# PROFILER BLOCK
+PROFILER_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILER_SAMPLE_INTERVAL_MS", "5"))
+PROFILER_MAX_SECONDS = float(os.getenv("PROFILER_MAX_SECONDS", "60"))
+# Профилировать каждый N-й GET /{alias} и POST /api/shorten (0 - не профилировать).
+PROFILE_EVERY_NTH_REQUEST = int(os.getenv("PROFILE_EVERY_NTH_REQUEST", "0"))
+
+# HTTP CACHE BLOCK
+# Cache-Control ответов (пусто - заголовок не отправляется).
+# Для деталей и списка no-cache: клиент кэширует, но переспрашивает с ETag.
+REDIRECT_CACHE_CONTROL = os.getenv("REDIRECT_CACHE_CONTROL", "")
+LINK_DETAIL_CACHE_CONTROL = os.getenv("LINK_DETAIL_CACHE_CONTROL", "no-cache")
+LINKS_LIST_CACHE_CONTROL = os.getenv("LINKS_LIST_CACHE_CONTROL", "no-cache")
+
+# EDGE CACHE BLOCK
+# На сколько секунд прокси (nginx) кэширует редирект через X-Accel-Expires
+# (0 - не кэширует). Переходы, отданные из кэша прокси, не доходят до
+# приложения и не считаются в clicks и аналитике.
+EDGE_CACHE_REDIRECT_SECONDS = int(os.getenv("EDGE_CACHE_REDIRECT_SECONDS", "0"))
+# На сколько секунд прокси кэширует 404 редиректа: так очистка кэша прокси
+# запросом в обход кэша заменяет закэшированный редирект.
+EDGE_CACHE_NOT_FOUND_SECONDS = int(os.getenv("EDGE_CACHE_NOT_FOUND_SECONDS", "1"))
+# Адреса прокси через запятую, в которых очищается кэш удаленных ссылок.
+EDGE_CACHE_PURGE_URLS = [
+    url for url in os.getenv("EDGE_CACHE_PURGE_URLS", "").split(",") if url
+]
+EDGE_CACHE_PURGE_TIMEOUT_SECONDS = float(os.getenv(
+    "EDGE_CACHE_PURGE_TIMEOUT_SECONDS", "1"
+))
+# Общий с прокси секрет: значение заголовка X-Edge-Purge запроса очистки
+# (пусто - очистка выключена, заголовок игнорируется).
+EDGE_CACHE_PURGE_TOKEN = os.getenv("EDGE_CACHE_PURGE_TOKEN", "")
+
+# SHARED CACHE BLOCK
+# Общий для всех воркеров и контейнеров кэш редиректов (второй уровень после
+# кэша воркера) на Redis совместимом сервере: redis://[:password@]host:port/db
+# (пусто - не используется).
+SHARED_CACHE_URL = os.getenv("SHARED_CACHE_URL", "")
+# Таймаут одной операции: при превышении редирект берется из базы.
+SHARED_CACHE_TIMEOUT_SECONDS = float(os.getenv("SHARED_CACHE_TIMEOUT_SECONDS", "0.05"))
+# Сколько секунд удаленная ссылка может отдаваться из общего кэша,
+# если ее удаление из кэша не удалось.
+SHARED_CACHE_TTL_SECONDS = int(os.getenv("SHARED_CACHE_TTL_SECONDS", "300"))
+SHARED_CACHE_MAX_CONNECTIONS = int(os.getenv("SHARED_CACHE_MAX_CONNECTIONS", "10"))
+# Сколько секунд после ошибки общий кэш не опрашивается (редиректы идут в базу).
+SHARED_CACHE_RETRY_SECONDS = float(os.getenv("SHARED_CACHE_RETRY_SECONDS", "5"))
+SHARED_CACHE_KEY_PREFIX = os.getenv("SHARED_CACHE_KEY_PREFIX", "redirect:")
+# Сколько секунд хранится надгробие удаленной ссылки: в течение этого времени
+# редирект, прочитанный из базы до удаления, не попадет в общий кэш.
+# Должно быть больше времени чтения редиректа из базы.
+SHARED_CACHE_TOMBSTONE_TTL_SECONDS = int(
+    os.getenv("SHARED_CACHE_TOMBSTONE_TTL_SECONDS", "60")
+)
+
+# ADMISSION CONTROL BLOCK
+# Общий лимит одновременно обрабатываемых запросов воркера (0 - без контроля).
+# Лимиты и очереди считаются в каждом воркере отдельно.
+ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "32"))
+# Лимит, размер очереди и бюджет ожидания в ней для каждого класса маршрутов:
+# редиректы (GET /{alias}), POST /api/shorten и остальные методы /api.
+# Лимит редиректов должен быть меньше ADMISSION_MAX_CONCURRENCY: остаток
+# зарезервирован за остальными классами.
+ADMISSION_REDIRECT_LIMIT = int(os.getenv("ADMISSION_REDIRECT_LIMIT", "24"))
+ADMISSION_REDIRECT_QUEUE_SIZE = int(os.getenv("ADMISSION_REDIRECT_QUEUE_SIZE", "256"))
+ADMISSION_REDIRECT_QUEUE_TIMEOUT_SECONDS = float(os.getenv(
+    "ADMISSION_REDIRECT_QUEUE_TIMEOUT_SECONDS", "1"
+))
+ADMISSION_SHORTEN_LIMIT = int(os.getenv("ADMISSION_SHORTEN_LIMIT", "4"))
+ADMISSION_SHORTEN_QUEUE_SIZE = int(os.getenv("ADMISSION_SHORTEN_QUEUE_SIZE", "16"))
+ADMISSION_SHORTEN_QUEUE_TIMEOUT_SECONDS = float(os.getenv(
+    "ADMISSION_SHORTEN_QUEUE_TIMEOUT_SECONDS", "0.5"
+))
+ADMISSION_API_LIMIT = int(os.getenv("ADMISSION_API_LIMIT", "8"))
+ADMISSION_API_QUEUE_SIZE = int(os.getenv("ADMISSION_API_QUEUE_SIZE", "32"))
+ADMISSION_API_QUEUE_TIMEOUT_SECONDS = float(os.getenv(
+    "ADMISSION_API_QUEUE_TIMEOUT_SECONDS", "0.5"
+))
+# Значение Retry-After в ответах 503.
+ADMISSION_RETRY_AFTER_SECONDS = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "1"))
+
+# WARMUP BLOCK
+# Сколько соединений пула открыть при старте воркера (0 - не открывать,
+# больше размера пула не открывается).
+WARMUP_POOL_CONNECTIONS = int(os.getenv("WARMUP_POOL_CONNECTIONS", "5"))
+# Выполнить горячие запросы на каждом открытом соединении:
+# asyncpg подготавливает statement'ы при первом выполнении на соединении.
+WARMUP_PREPARE_STATEMENTS = os.getenv(
+    "WARMUP_PREPARE_STATEMENTS", "true"
+).lower() == "true"
+# Не считать воркер готовым, если ревизия базы не совпадает с head миграций.
+WARMUP_CHECK_ALEMBIC_HEAD = os.getenv(
+    "WARMUP_CHECK_ALEMBIC_HEAD", "true"
+).lower() == "true"
+# Загрузить популярные ссылки в кэш редиректов до готовности воркера.
+WARMUP_PRELOAD_HOT_LINKS = os.getenv(
+    "WARMUP_PRELOAD_HOT_LINKS", "true"
+).lower() == "true"
+
+# SCHEDULER BLOCK
+# Случайный разброс интервалов фоновых задач (0.1 - плюс-минус 10%).
+SCHEDULER_JITTER_RATIO = float(os.getenv("SCHEDULER_JITTER_RATIO", "0.1"))
+# Таймаут одного запуска фоновой задачи.
+SCHEDULER_JOB_TIMEOUT_SECONDS = float(os.getenv("SCHEDULER_JOB_TIMEOUT_SECONDS", "300"))
+# Как часто воркеры пытаются стать лидером (выполняющим задачи в одном
+# экземпляре), а лидер проверяет свое соединение.
+SCHEDULER_LEADER_CHECK_INTERVAL_SECONDS = float(os.getenv(
+    "SCHEDULER_LEADER_CHECK_INTERVAL_SECONDS", "5"
+))
+# Ключ advisory блокировки лидера (разный у приложений на одной базе).
+SCHEDULER_LEADER_LOCK_KEY = int(os.getenv("SCHEDULER_LEADER_LOCK_KEY", "1"))
+
+# SEARCH BLOCK
+# Максимум ссылок в одной странице поиска по original_url.
+SEARCH_MAX_RESULTS = int(os.getenv("SEARCH_MAX_RESULTS", "50"))
+# Минимальная длина подстроки поиска: триграммному индексу нужно 3 символа.
+SEARCH_MIN_QUERY_LENGTH = int(os.getenv("SEARCH_MIN_QUERY_LENGTH", "3"))
+# Таймаут запроса поиска: слишком широкий запрос не занимает соединение.
+SEARCH_STATEMENT_TIMEOUT_MS = int(os.getenv("SEARCH_STATEMENT_TIMEOUT_MS", "2000"))
+
+# BULK DELETE BLOCK
+# Максимум алиасов в одном запросе пакетного удаления.
+BULK_DELETE_MAX_ALIASES = int(os.getenv("BULK_DELETE_MAX_ALIASES", "1000"))
+# Алиасов в одной транзакции пакетного удаления. Транзакция держит две advisory
+# блокировки на алиас, а общая таблица блокировок Postgres ограничена
+# (max_locks_per_transaction * max_connections, по умолчанию 64 на соединение).
+BULK_DELETE_BATCH_SIZE = int(os.getenv("BULK_DELETE_BATCH_SIZE", "25"))
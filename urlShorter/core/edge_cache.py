@@ -0,0 +1,163 @@
+"""Модуль кэша редиректов на прокси (nginx microcaching).
+
+Приложение управляет кэшем прокси заголовком X-Accel-Expires: редирект
+кэшируется на EDGE_CACHE_REDIRECT_SECONDS (но не дольше срока жизни
+ссылки), 404 - на EDGE_CACHE_NOT_FOUND_SECONDS.
+
+Open source nginx не умеет удалять запись кэша по запросу, поэтому
+очистка - это GET /{alias} с заголовком X-Edge-Purge: <EDGE_CACHE_PURGE_TOKEN>,
+который прокси пропускает в обход кэша (proxy_cache_bypass) только из
+внутренней сети, а у остальных клиентов заменяет пустым. Приложение
+дополнительно сверяет токен: запрос в обход прокси без токена - обычный
+переход. Ответ приложения (404 удаленной ссылки) заменяет закэшированный
+редирект.
+"""
+import asyncio
+import hmac
+import logging
+from collections.abc import Iterable
+from datetime import UTC, datetime
+from functools import lru_cache
+
+from httpx import AsyncBaseTransport, AsyncClient, HTTPError
+from starlette.requests import Request
+
+from core.config import (
+    EDGE_CACHE_NOT_FOUND_SECONDS,
+    EDGE_CACHE_PURGE_TIMEOUT_SECONDS,
+    EDGE_CACHE_PURGE_TOKEN,
+    EDGE_CACHE_PURGE_URLS,
+    EDGE_CACHE_REDIRECT_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+EDGE_CACHE_PURGE_HEADER = "X-Edge-Purge"
+
+
+def get_redirect_edge_cache_headers(expires_at: datetime | None) -> dict[str, str]:
+    """Заголовки кэширования редиректа на прокси.
+
+    Args:
+        expires_at (datetime | None): Время истечения ссылки.
+
+    Returns:
+        dict[str, str]: X-Accel-Expires или пустой словарь, если кэш выключен.
+
+    """
+    if EDGE_CACHE_REDIRECT_SECONDS <= 0:
+        return {}
+
+    seconds = EDGE_CACHE_REDIRECT_SECONDS
+    if expires_at is not None:
+        seconds = min(seconds, int((expires_at - datetime.now(UTC)).total_seconds()))
+
+    # 0 явно запрещает кэширование, даже если Cache-Control его разрешает.
+    return {"X-Accel-Expires": str(max(0, seconds))}
+
+
+def is_edge_cache_purge_request(request: Request) -> bool:
+    """Проверка того, что запрос - очистка кэша прокси с верным токеном.
+
+    Args:
+        request (Request): Запрос.
+
+    Returns:
+        bool: True, если X-Edge-Purge совпадает с EDGE_CACHE_PURGE_TOKEN
+        (без токена очистка выключена).
+
+    """
+    purge_token = request.headers.get(EDGE_CACHE_PURGE_HEADER)
+    return bool(EDGE_CACHE_PURGE_TOKEN) and purge_token is not None \
+        and hmac.compare_digest(purge_token.encode(), EDGE_CACHE_PURGE_TOKEN.encode())
+
+
+def get_not_found_edge_cache_headers() -> dict[str, str] | None:
+    """Заголовки кэширования 404 редиректа на прокси.
+
+    Returns:
+        dict[str, str] | None: X-Accel-Expires или None, если кэш выключен.
+
+    """
+    if EDGE_CACHE_REDIRECT_SECONDS <= 0:
+        return None
+
+    return {"X-Accel-Expires": str(EDGE_CACHE_NOT_FOUND_SECONDS)}
+
+
+class EdgeCachePurger:
+    """Базовый класс очистки кэша прокси (ничего не делает)."""
+
+    async def purge(self, aliases: Iterable[str]) -> None:
+        """Очистка закэшированных редиректов.
+
+        Args:
+            aliases (Iterable[str]): Алиасы удаленных ссылок.
+
+        """
+
+
+class NginxEdgeCachePurger(EdgeCachePurger):
+    """Очистка кэша nginx запросами в обход кэша."""
+
+    def __init__(
+        self,
+        urls: list[str],
+        token: str,
+        timeout: float,
+        transport: AsyncBaseTransport | None = None
+    ) -> None:
+        """Инициализация очистки кэша.
+
+        Args:
+            urls (list[str]): Адреса прокси (например, http://nginx).
+            token (str): Токен очистки (значение X-Edge-Purge).
+            timeout (float): Таймаут одного запроса в секундах.
+            transport (AsyncBaseTransport | None, optional): Транспорт httpx
+                (для тестов). Defaults to None.
+
+        """
+        self.urls = [url.rstrip("/") for url in urls]
+        self.token = token
+        self.timeout = timeout
+        self.transport = transport
+
+    async def _purge_alias(self, client: AsyncClient, url: str, alias: str) -> None:
+        """Очистка одного алиаса на одном прокси (ошибки только логируются)."""
+        try:
+            await client.get(f"{url}/{alias}",
+                             headers={EDGE_CACHE_PURGE_HEADER: self.token})
+        except HTTPError:
+            logger.warning("Edge cache purge of %s on %s failed", alias, url)
+
+    async def purge(self, aliases: Iterable[str]) -> None:
+        """Очистка закэшированных редиректов на всех прокси.
+
+        Args:
+            aliases (Iterable[str]): Алиасы удаленных ссылок.
+
+        """
+        aliases = list(aliases)
+        if not aliases:
+            return
+
+        async with AsyncClient(timeout=self.timeout, transport=self.transport,
+                               follow_redirects=False) as client:
+            await asyncio.gather(*(self._purge_alias(client, url, alias)
+                                   for url in self.urls for alias in aliases))
+
+
+@lru_cache
+def get_edge_cache_purger() -> EdgeCachePurger:
+    """Получение очистки кэша прокси.
+
+    Returns:
+        EdgeCachePurger: NginxEdgeCachePurger, если заданы EDGE_CACHE_PURGE_URLS
+        и EDGE_CACHE_PURGE_TOKEN, иначе ничего не делающий EdgeCachePurger.
+
+    """
+    if not EDGE_CACHE_PURGE_URLS or not EDGE_CACHE_PURGE_TOKEN:
+        return EdgeCachePurger()
+
+    return NginxEdgeCachePurger(EDGE_CACHE_PURGE_URLS, EDGE_CACHE_PURGE_TOKEN,
+                                EDGE_CACHE_PURGE_TIMEOUT_SECONDS)
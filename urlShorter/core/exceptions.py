@@ -5,10 +5,11 @@ from fastapi import HTTPException
 class AliasNotFoundException(HTTPException):
     """Alias not found exception."""
 
-    def __init__(self) -> None:
+    def __init__(self, headers: dict[str, str] | None = None) -> None:
         """Функция __init__ для кастомной ошибки."""
         self.status_code=404
         self.detail="Alias not found"
+        self.headers=headers
 
 class ShortUrlCreatingException(HTTPException):
     """Short Url creating exception."""
@@ -41,3 +42,35 @@ class UserCreateUrlLimitExceedException(HTTPException):
         """Функция __init__ для кастомной ошибки."""
         self.status_code = 429
         self.detail="Too many requests."
+
+class InternalApiForbiddenException(HTTPException):
+    """Invalid or missing internal API token exception."""
+
+    def __init__(self) -> None:
+        """Функция __init__ для кастомной ошибки."""
+        self.status_code = 403
+        self.detail="Forbidden"
+
+class ProfilerBusyException(HTTPException):
+    """Profiler is already running exception."""
+
+    def __init__(self) -> None:
+        """Функция __init__ для кастомной ошибки."""
+        self.status_code = 409
+        self.detail="Profiler is already running"
+
+class SearchQueryException(HTTPException):
+    """Invalid links search query exception."""
+
+    def __init__(self, detail: str) -> None:
+        """Функция __init__ для кастомной ошибки."""
+        self.status_code = 400
+        self.detail = detail
+
+class LinksListQueryException(HTTPException):
+    """Invalid links list filters exception."""
+
+    def __init__(self, detail: str) -> None:
+        """Функция __init__ для кастомной ошибки."""
+        self.status_code = 400
+        self.detail = detail
@@ -0,0 +1,192 @@
+"""Модуль отслеживания самых популярных ссылок.
+
+Space-Saving скетч в памяти воркера хранит не больше capacity алиасов и
+обновляется за O(1) на каждый редирект. Его top-K вместе с top-K из почасовых
+агрегатов кликов используется для закрепления ссылок в кэше редиректов.
+"""
+from datetime import UTC, datetime, timedelta
+from functools import lru_cache
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.cache import CachedRedirect
+from core.config import HOT_LINKS_TRACKER_CAPACITY
+from core.services import is_expired
+from database.models import ShortedUrl, click_rollups_hourly_table
+
+
+class SpaceSavingTopK:
+    """Space-Saving скетч популярных алиасов (Stream-Summary с корзинами).
+
+    Счетчик каждого отслеживаемого алиаса завышен не больше, чем на его error.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        """Инициализация скетча.
+
+        Args:
+            capacity (int): Максимальное количество отслеживаемых алиасов.
+
+        """
+        self.capacity = capacity
+        self.counts: dict[str, int] = {}
+        self.errors: dict[str, int] = {}
+        # Алиасы по значениям счетчиков (dict как упорядоченное множество).
+        self.buckets: dict[int, dict[str, None]] = {}
+        self.min_count = 0
+
+    def _move_to_bucket(self, alias: str, count: int) -> None:
+        """Перенос алиаса в корзину с новым значением счетчика."""
+        old_count = self.counts.get(alias)
+        if old_count is not None:
+            old_bucket = self.buckets[old_count]
+            del old_bucket[alias]
+            if not old_bucket:
+                del self.buckets[old_count]
+                if old_count == self.min_count:
+                    self.min_count = count
+
+        self.counts[alias] = count
+        self.buckets.setdefault(count, {})[alias] = None
+
+    def add(self, alias: str) -> None:
+        """Учет перехода по алиасу.
+
+        Args:
+            alias (str): alias ссылки.
+
+        """
+        count = self.counts.get(alias)
+        if count is not None:
+            self._move_to_bucket(alias, count + 1)
+            return
+
+        if len(self.counts) < self.capacity:
+            self.errors[alias] = 0
+            self._move_to_bucket(alias, 1)
+            self.min_count = 1
+            return
+
+        # Новый алиас вытесняет один из алиасов с минимальным счетчиком
+        # и наследует его счетчик как погрешность.
+        min_bucket = self.buckets[self.min_count]
+        evicted_alias = next(iter(min_bucket))
+        evicted_count = self.counts.pop(evicted_alias)
+        del self.errors[evicted_alias]
+        del min_bucket[evicted_alias]
+        if not min_bucket:
+            del self.buckets[evicted_count]
+            self.min_count = evicted_count + 1
+
+        self.errors[alias] = evicted_count
+        self._move_to_bucket(alias, evicted_count + 1)
+
+    def top(self, k: int) -> list[tuple[str, int, int]]:
+        """Получение самых популярных алиасов.
+
+        Args:
+            k (int): Количество алиасов.
+
+        Returns:
+            list[tuple[str, int, int]]: Тройки (alias, счетчик, погрешность)
+                по убыванию счетчика.
+
+        """
+        top_aliases = sorted(self.counts, key=self.counts.__getitem__, reverse=True)
+
+        return [(alias, self.counts[alias], self.errors[alias])
+                for alias in top_aliases[:k]]
+
+    def decay(self) -> None:
+        """Уменьшение всех счетчиков вдвое, чтобы top-K отражал текущую нагрузку."""
+        counts, errors = self.counts, self.errors
+        self.counts, self.errors, self.buckets, self.min_count = {}, {}, {}, 0
+
+        for alias, count in counts.items():
+            if count // 2 > 0:
+                self.errors[alias] = errors[alias] // 2
+                self._move_to_bucket(alias, count // 2)
+
+        if self.buckets:
+            self.min_count = min(self.buckets)
+
+
+class HotLinksService:
+    """Сервис для загрузки популярных ссылок из базы."""
+
+    def __init__(self, db: AsyncSession) -> None:
+        """Инициализация сервиса популярных ссылок.
+
+        Args:
+            db (AsyncSession): Сессия базы данных.
+
+        """
+        self.db: AsyncSession = db
+
+    async def get_hot_redirects(
+        self,
+        local_aliases: list[str],
+        limit: int
+    ) -> dict[str, CachedRedirect]:
+        """Получение редиректов популярных ссылок.
+
+        Популярные ссылки - это алиасы из скетча воркера и top-K ссылок
+        по почасовым агрегатам кликов за последний час (общим для всех воркеров).
+
+        Args:
+            local_aliases (list[str]): Популярные алиасы этого воркера.
+            limit (int): Сколько ссылок брать из агрегатов.
+
+        Returns:
+            dict[str, CachedRedirect]: Редиректы по alias'ам.
+
+        """
+        hourly_table = click_rollups_hourly_table
+        last_hour = datetime.now(UTC).replace(minute=0, second=0, microsecond=0) \
+            - timedelta(hours=1)
+        select_top_ids_stmt = select(hourly_table.c.shorted_url_id) \
+            .where(hourly_table.c.bucket >= last_hour) \
+            .group_by(hourly_table.c.shorted_url_id) \
+            .order_by(func.sum(hourly_table.c.clicks).desc()) \
+            .limit(limit)
+
+        select_redirects_stmt = select(
+            ShortedUrl.alias, ShortedUrl.id,
+            ShortedUrl.original_url, ShortedUrl.expires_at,
+        ).where(
+            ShortedUrl.alias.in_(local_aliases)
+            | ShortedUrl.id.in_(select_top_ids_stmt),
+            ~ShortedUrl.archived,
+        )
+
+        return {
+            alias: CachedRedirect(shorted_url_id, original_url, expires_at)
+            for alias, shorted_url_id, original_url, expires_at
+            in await self.db.execute(select_redirects_stmt)
+            if not is_expired(expires_at)
+        }
+
+
+@lru_cache
+def get_hot_links_tracker() -> SpaceSavingTopK:
+    """Получение скетча популярных ссылок текущего воркера.
+
+    Returns:
+        SpaceSavingTopK: Скетч популярных ссылок.
+
+    """
+    return SpaceSavingTopK(HOT_LINKS_TRACKER_CAPACITY)
+
+
+def get_hot_links_service(db: AsyncSession) -> HotLinksService:
+    """Получение сервиса для работы с популярными ссылками.
+
+    Args:
+        db (AsyncSession): Сессия базы данных.
+
+    Returns:
+        HotLinksService: Сервис для работы с популярными ссылками.
+
+    """
+    return HotLinksService(db)
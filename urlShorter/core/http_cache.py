@@ -0,0 +1,78 @@
+"""Модуль условного HTTP кэширования (ETag, If-None-Match, Cache-Control).
+
+ETag'и слабые: они считаются от версии данных (id, clicks, created_at),
+а не от байтов тела, поэтому совпадение проверяется до сериализации
+и без запросов, нужных только для тела ответа.
+"""
+import hashlib
+
+from fastapi.responses import Response
+
+
+def make_weak_etag(*parts: object) -> str:
+    """Слабый ETag от версии данных.
+
+    Args:
+        *parts (object): Значения, от которых зависит тело ответа.
+
+    Returns:
+        str: ETag вида W/"<hex>".
+
+    """
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def is_not_modified(if_none_match: str | None, etag: str) -> bool:
+    """Проверка заголовка If-None-Match слабым сравнением (RFC 9110).
+
+    Args:
+        if_none_match (str | None): Значение заголовка If-None-Match.
+        etag (str): Текущий ETag ресурса.
+
+    Returns:
+        bool: True, если клиент уже имеет текущую версию.
+
+    """
+    if if_none_match is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+
+    opaque_tag = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque_tag
+               for candidate in if_none_match.split(","))
+
+
+def get_cache_headers(etag: str | None, cache_control: str) -> dict[str, str]:
+    """Заголовки кэширования ответа.
+
+    Args:
+        etag (str | None): ETag ресурса.
+        cache_control (str): Значение Cache-Control ("" - не отправлять).
+
+    Returns:
+        dict[str, str]: Заголовки ETag и Cache-Control.
+
+    """
+    headers = {}
+    if etag is not None:
+        headers["ETag"] = etag
+    if cache_control:
+        headers["Cache-Control"] = cache_control
+
+    return headers
+
+
+def get_not_modified_response(etag: str, cache_control: str) -> Response:
+    """Ответ 304 Not Modified без тела.
+
+    Args:
+        etag (str): ETag ресурса.
+        cache_control (str): Значение Cache-Control ("" - не отправлять).
+
+    Returns:
+        Response: Ответ 304.
+
+    """
+    return Response(status_code=304, headers=get_cache_headers(etag, cache_control))
@@ -0,0 +1,320 @@
+"""Модуль локального журнала побочных эффектов редиректа.
+
+Редирект дописывает клик в файл журнала текущего воркера и сразу отвечает.
+Фоновая задача раз в SIDE_EFFECTS_JOURNAL_FSYNC_INTERVAL_SECONDS сбрасывает
+журнал на диск одним fsync, а другая - закрывает текущий сегмент и применяет
+закрытые сегменты к базе одной транзакцией на сегмент. Сегменты упавших
+воркеров подхватываются при старте и при каждом применении.
+"""
+import fcntl
+import os
+import struct
+import threading
+import time
+import zlib
+from collections.abc import Iterator
+from datetime import UTC, datetime, timedelta
+from functools import lru_cache
+from pathlib import Path
+
+from sqlalchemy import bindparam, delete, func, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import SIDE_EFFECTS_JOURNAL_DIR
+from database.models import ShortedUrl, side_effects_journal_checkpoints_table
+
+# Запись клика: id ссылки, unix-время, crc32 первых двух полей.
+CLICK_RECORD = struct.Struct("<idI")
+CLICK_PAYLOAD = struct.Struct("<id")
+SEGMENT_SUFFIX = ".journal"
+# Суффикс сегмента до его блокировки (не попадает в glob закрытых сегментов).
+TEMPORARY_SEGMENT_SUFFIX = ".tmp"
+# Сколько хранить отметки о примененных сегментах.
+CHECKPOINTS_RETENTION = timedelta(days=1)
+
+
+def pack_click_record(shorted_url_id: int, clicked_at: float) -> bytes:
+    """Упаковка записи клика.
+
+    Args:
+        shorted_url_id (int): id ссылки.
+        clicked_at (float): unix-время клика.
+
+    Returns:
+        bytes: Запись фиксированного размера.
+
+    """
+    payload = CLICK_PAYLOAD.pack(shorted_url_id, clicked_at)
+    return CLICK_RECORD.pack(shorted_url_id, clicked_at, zlib.crc32(payload))
+
+
+def iter_click_records(data: bytes) -> Iterator[tuple[int, float]]:
+    """Чтение записей кликов из сегмента.
+
+    Чтение останавливается на первой неполной или поврежденной записи
+    (ее мог оставить воркер, упавший посреди записи).
+
+    Args:
+        data (bytes): Содержимое сегмента.
+
+    Yields:
+        Iterator[tuple[int, float]]: Пары (id ссылки, unix-время клика).
+
+    """
+    for offset in range(0, len(data) - CLICK_RECORD.size + 1, CLICK_RECORD.size):
+        shorted_url_id, clicked_at, crc = CLICK_RECORD.unpack_from(data, offset)
+        if zlib.crc32(CLICK_PAYLOAD.pack(shorted_url_id, clicked_at)) != crc:
+            return
+        yield shorted_url_id, clicked_at
+
+
+class SideEffectsJournal:
+    """Журнал кликов воркера из сегментов, заблокированных flock'ом."""
+
+    def __init__(self, directory: str) -> None:
+        """Открытие нового сегмента журнала.
+
+        Args:
+            directory (str): Каталог журнала (общий для воркеров одного хоста).
+
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Запись идет в потоке event loop'а и держит lock только на os.write.
+        # fsync выполняется в отдельном потоке вне lock'а, а sync_lock
+        # не дает rotate закрыть fd, пока sync сбрасывает его на диск.
+        self.lock = threading.Lock()
+        self.sync_lock = threading.Lock()
+        self.dirty = False
+        self._remove_stale_temporary_segments()
+        self.segment_path, self.fd = self._create_segment()
+
+    def _remove_stale_temporary_segments(self) -> None:
+        """Удаление временных сегментов воркеров, упавших до их переименования."""
+        for temporary_path in self.directory.glob(f"*{TEMPORARY_SEGMENT_SUFFIX}"):
+            try:
+                fd = os.open(temporary_path, os.O_RDONLY)
+            except FileNotFoundError:
+                continue
+            try:
+                # Заблокированный сегмент еще создается другим воркером.
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                temporary_path.unlink(missing_ok=True)
+            except BlockingIOError:
+                pass
+            finally:
+                os.close(fd)
+
+    def _create_segment(self) -> tuple[Path, int]:
+        """Создание нового сегмента с эксклюзивной блокировкой.
+
+        Сегмент создается под временным именем, блокируется и только затем
+        переименовывается: другие воркеры не видят его незаблокированным
+        и не могут применить и удалить пустой сегмент, в который идет запись.
+
+        Returns:
+            tuple[Path, int]: Путь и fd сегмента.
+
+        """
+        name = f"{os.getpid()}-{time.time_ns()}{SEGMENT_SUFFIX}"
+        temporary_path = self.directory / (name + TEMPORARY_SEGMENT_SUFFIX)
+        fd = os.open(temporary_path,
+                     os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_APPEND, 0o644)
+        # Пока сегмент заблокирован, другие воркеры его не применяют.
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        segment_path = self.directory / name
+        temporary_path.rename(segment_path)
+
+        return segment_path, fd
+
+    def append_click(self, shorted_url_id: int) -> None:
+        """Дозапись клика (без fsync и обращений к базе).
+
+        После возврата клик переживет падение процесса,
+        а после ближайшего fsync - и падение хоста.
+
+        Args:
+            shorted_url_id (int): id ссылки.
+
+        """
+        record = pack_click_record(shorted_url_id, time.time())
+        with self.lock:
+            os.write(self.fd, record)
+            self.dirty = True
+
+    def sync(self) -> None:
+        """Сброс дописанных кликов на диск."""
+        with self.sync_lock:
+            with self.lock:
+                fd, dirty = self.fd, self.dirty
+                self.dirty = False
+            if not dirty:
+                return
+            try:
+                os.fsync(fd)
+            except OSError:
+                with self.lock:
+                    self.dirty = True
+                raise
+
+    def rotate(self) -> None:
+        """Закрытие текущего сегмента и открытие нового."""
+        with self.sync_lock:
+            segment_path, fd = self._create_segment()
+            with self.lock:
+                previous_fd = self.fd
+                self.segment_path, self.fd = segment_path, fd
+                self.dirty = False
+            os.fsync(previous_fd)
+            # Закрытие снимает flock: сегмент можно применять.
+            os.close(previous_fd)
+
+    def get_sealed_segments(self) -> list[Path]:
+        """Получение закрытых сегментов (своих и упавших воркеров).
+
+        Returns:
+            list[Path]: Пути сегментов.
+
+        """
+        return sorted(
+            segment_path
+            for segment_path in self.directory.glob(f"*{SEGMENT_SUFFIX}")
+            if segment_path != self.segment_path
+        )
+
+
+class SideEffectsJournalService:
+    """Сервис для применения журнала кликов к базе."""
+
+    def __init__(self, db: AsyncSession) -> None:
+        """Инициализация сервиса журнала кликов.
+
+        Args:
+            db (AsyncSession): Сессия базы данных.
+
+        """
+        self.db: AsyncSession = db
+
+    async def apply_clicks(
+        self,
+        segment: str,
+        clicks: dict[int, tuple[int, float]]
+    ) -> bool:
+        """Применение кликов сегмента вместе с отметкой о его применении.
+
+        Args:
+            segment (str): Имя сегмента.
+            clicks (dict[int, tuple[int, float]]): Количество кликов
+                и время последнего клика по id ссылок.
+
+        Returns:
+            bool: False, если сегмент уже был применен ранее.
+
+        """
+        checkpoints_table = side_effects_journal_checkpoints_table
+        now = datetime.now(UTC)
+
+        inserted_segment = await self.db.scalar(
+            insert(checkpoints_table)
+            .values(segment=segment, applied_at=now)
+            .on_conflict_do_nothing()
+            .returning(checkpoints_table.c.segment)
+        )
+        if inserted_segment is None:
+            await self.db.rollback()
+            return False
+
+        if clicks:
+            shorted_urls_table = ShortedUrl.__table__
+            # Сортировка id исключает deadlock'и с другими воркерами.
+            await self.db.execute(
+                update(shorted_urls_table)
+                .where(shorted_urls_table.c.id == bindparam("shorted_url_id"))
+                .values(
+                    clicks=shorted_urls_table.c.clicks + bindparam("clicks_count"),
+                    last_clicked_at=func.greatest(
+                        shorted_urls_table.c.last_clicked_at, bindparam("clicked_at")
+                    ),
+                ),
+                [
+                    {"shorted_url_id": shorted_url_id,
+                     "clicks_count": clicks_count,
+                     "clicked_at": datetime.fromtimestamp(clicked_at, UTC)}
+                    for shorted_url_id, (clicks_count, clicked_at)
+                    in sorted(clicks.items())
+                ],
+            )
+
+        await self.db.execute(delete(checkpoints_table).where(
+            checkpoints_table.c.applied_at < now - CHECKPOINTS_RETENTION
+        ))
+        await self.db.commit()
+
+        return True
+
+    async def apply_segment(self, segment_path: Path) -> None:
+        """Применение закрытого сегмента и его удаление.
+
+        Сегмент, заблокированный другим воркером (пишущим или применяющим),
+        пропускается.
+
+        Args:
+            segment_path (Path): Путь сегмента.
+
+        """
+        try:
+            fd = os.open(segment_path, os.O_RDONLY)
+        except FileNotFoundError:
+            return
+
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return
+
+            # Пока ждали открытия, сегмент мог быть применен и удален другим воркером.
+            if os.fstat(fd).st_nlink == 0:
+                return
+
+            clicks: dict[int, tuple[int, float]] = {}
+            for shorted_url_id, clicked_at in iter_click_records(
+                segment_path.read_bytes()
+            ):
+                clicks_count, last_clicked_at = clicks.get(shorted_url_id, (0, 0.0))
+                clicks[shorted_url_id] = (
+                    clicks_count + 1, max(last_clicked_at, clicked_at)
+                )
+
+            await self.apply_clicks(segment_path.name, clicks)
+            segment_path.unlink()
+        finally:
+            os.close(fd)
+
+
+@lru_cache
+def get_side_effects_journal() -> SideEffectsJournal | None:
+    """Получение журнала кликов текущего воркера.
+
+    Returns:
+        SideEffectsJournal | None: Журнал или None, если он выключен.
+
+    """
+    if not SIDE_EFFECTS_JOURNAL_DIR:
+        return None
+
+    return SideEffectsJournal(SIDE_EFFECTS_JOURNAL_DIR)
+
+
+def get_side_effects_journal_service(db: AsyncSession) -> SideEffectsJournalService:
+    """Получение сервиса для применения журнала кликов.
+
+    Args:
+        db (AsyncSession): Сессия базы данных.
+
+    Returns:
+        SideEffectsJournalService: Сервис для применения журнала кликов.
+
+    """
+    return SideEffectsJournalService(db)
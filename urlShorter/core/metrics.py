@@ -0,0 +1,484 @@
+"""Модуль метрик приложения в формате Prometheus.
+
+Метрики - обычные словари в памяти воркера: их обновляет только поток
+event loop'а, поэтому блокировки не нужны. Для агрегации между воркерами
+каждый воркер периодически сохраняет свои метрики в METRICS_DIR,
+а /internal/metrics суммирует файлы всех воркеров.
+
+Файлы завершившихся воркеров (при остановке, при старте следующего воркера
+и при сборе метрик) сливаются в dead.json, как в multiprocess режиме
+prometheus_client: счетчики и гистограммы продолжают расти монотонно,
+а gauge метрики мертвых воркеров отбрасываются.
+"""
+import fcntl
+import functools
+import inspect
+import json
+import os
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Any, TypeVar
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from core.cache import get_redirect_cache
+from core.clicks import get_click_events_buffer
+from core.config import METRICS_DIR
+from core.shared_cache import RespSharedRedirectCache, get_shared_redirect_cache
+from database import database
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Сумма счетчиков и гистограмм завершившихся воркеров.
+DEAD_METRICS_FILE = "dead.json"
+# Блокировка слияния в dead.json (слияние - чтение и замена файла).
+DEAD_METRICS_LOCK_FILE = "dead.lock"
+
+T = TypeVar("T")
+LabelValues = tuple[str, ...]
+MetricsDump = dict[str, list[list[Any]]]
+
+
+class Metric:
+    """Базовая метрика с набором значений по меткам."""
+
+    metric_type = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = ()
+    ) -> None:
+        """Инициализация метрики.
+
+        Args:
+            name (str): Имя метрики.
+            documentation (str): Описание для # HELP.
+            labelnames (tuple[str, ...], optional): Имена меток. Defaults to ().
+
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.values: dict[LabelValues, Any] = {}
+        METRICS.append(self)
+
+
+class Counter(Metric):
+    """Монотонно растущий счетчик."""
+
+    metric_type = "counter"
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        """Увеличение счетчика.
+
+        Args:
+            *labelvalues (str): Значения меток.
+            amount (float, optional): Величина увеличения. Defaults to 1.0.
+
+        """
+        self.values[labelvalues] = self.values.get(labelvalues, 0.0) + amount
+
+
+class Gauge(Metric):
+    """Текущее значение (заполняется при сборе метрик)."""
+
+    metric_type = "gauge"
+
+    def set(self, value: float, *labelvalues: str) -> None:
+        """Установка значения.
+
+        Args:
+            value (float): Значение.
+            *labelvalues (str): Значения меток.
+
+        """
+        self.values[labelvalues] = value
+
+
+class Histogram(Metric):
+    """Гистограмма с фиксированными границами корзин."""
+
+    metric_type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> None:
+        """Инициализация гистограммы.
+
+        Args:
+            name (str): Имя метрики.
+            documentation (str): Описание для # HELP.
+            labelnames (tuple[str, ...], optional): Имена меток. Defaults to ().
+            buckets (tuple[float, ...], optional): Верхние границы корзин.
+                Defaults to DEFAULT_BUCKETS.
+
+        """
+        super().__init__(name, documentation, labelnames)
+        self.buckets = buckets
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        """Учет наблюдения.
+
+        Args:
+            value (float): Наблюдаемое значение.
+            *labelvalues (str): Значения меток.
+
+        """
+        # Счетчики корзин (последняя - +Inf), затем сумма наблюдений.
+        counts = self.values.get(labelvalues)
+        if counts is None:
+            counts = self.values[labelvalues] = [0.0] * (len(self.buckets) + 2)
+
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+
+METRICS: list[Metric] = []
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency.", ("method", "route")
+)
+SERVICE_METHOD_DURATION = Histogram(
+    "urls_service_method_duration_seconds", "UrlsService method latency.",
+    ("method",),
+)
+ALLOCATOR_PROBES = Counter(
+    "alias_allocator_probes_total", "Alias allocator probes.", ("strategy",)
+)
+ADVISORY_LOCK_WAIT = Histogram(
+    "advisory_lock_wait_seconds", "Time to acquire alias_numeric advisory locks."
+)
+REDIRECT_CACHE_REQUESTS = Counter(
+    "redirect_cache_requests_total", "Redirect cache lookups.", ("result",)
+)
+SHARED_CACHE_REQUESTS = Counter(
+    "shared_cache_requests_total", "Shared redirect cache lookups.", ("result",)
+)
+ADMISSION_REQUESTS = Counter(
+    "admission_requests_total", "Admission control decisions.", ("class", "result")
+)
+ADMISSION_QUEUE_WAIT = Histogram(
+    "admission_queue_wait_seconds", "Time spent waiting for admission.", ("class",)
+)
+SCHEDULER_JOB_RUNS = Counter(
+    "scheduler_job_runs_total", "Background job runs.", ("job", "result")
+)
+SCHEDULER_JOB_DURATION = Histogram(
+    "scheduler_job_duration_seconds", "Background job run latency.", ("job",)
+)
+SCHEDULER_LEADER = Gauge(
+    "scheduler_leader", "1 if the worker runs singleton background jobs.", ("pid",)
+)
+CLICK_EVENTS_DROPPED = Counter(
+    "click_events_dropped_total", "Click events evicted from the worker buffer."
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections", "SQLAlchemy pool connections.", ("pid", "state")
+)
+
+
+def timed_async_methods(histogram: Histogram) -> Callable[[type[T]], type[T]]:
+    """Декоратор класса, измеряющий длительность его публичных async методов.
+
+    Args:
+        histogram (Histogram): Гистограмма с меткой method.
+
+    Returns:
+        Callable[[type[T]], type[T]]: Декоратор класса.
+
+    """
+    def decorate_method(
+        name: str,
+        method: Callable[..., Awaitable[Any]]
+    ) -> Callable[..., Awaitable[Any]]:
+        @functools.wraps(method)
+        async def timed_method(*args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+            started_at = time.perf_counter()
+            try:
+                return await method(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started_at, name)
+
+        return timed_method
+
+    def decorate_class(cls: type[T]) -> type[T]:
+        for name, method in list(vars(cls).items()):
+            if not name.startswith("_") and inspect.iscoroutinefunction(method):
+                setattr(cls, name, decorate_method(name, method))
+
+        return cls
+
+    return decorate_class
+
+
+def collect_metrics() -> None:
+    """Заполнение метрик, значения которых хранятся в других объектах."""
+    redirect_cache = get_redirect_cache()
+    REDIRECT_CACHE_REQUESTS.values[("hit",)] = float(redirect_cache.hits)
+    REDIRECT_CACHE_REQUESTS.values[("miss",)] = float(redirect_cache.misses)
+
+    CLICK_EVENTS_DROPPED.values[()] = float(get_click_events_buffer().dropped_count)
+
+    shared_redirect_cache = get_shared_redirect_cache()
+    if isinstance(shared_redirect_cache, RespSharedRedirectCache):
+        SHARED_CACHE_REQUESTS.values[("hit",)] = float(shared_redirect_cache.hits)
+        SHARED_CACHE_REQUESTS.values[("miss",)] = float(shared_redirect_cache.misses)
+        SHARED_CACHE_REQUESTS.values[("error",)] = float(shared_redirect_cache.errors)
+
+    if database.async_engine is not None:
+        pool: Any = database.async_engine.pool
+        pid = str(os.getpid())
+        DB_POOL_CONNECTIONS.set(pool.checkedout(), pid, "checked_out")
+        DB_POOL_CONNECTIONS.set(pool.checkedin(), pid, "checked_in")
+        DB_POOL_CONNECTIONS.set(max(0, pool.overflow()), pid, "overflow")
+
+
+def dump_metrics() -> MetricsDump:
+    """Получение метрик воркера в сериализуемом виде.
+
+    Returns:
+        MetricsDump: Пары [значения меток, значение] по именам метрик.
+
+    """
+    collect_metrics()
+
+    return {metric.name: [[list(labelvalues), value]
+                          for labelvalues, value in metric.values.items()]
+            for metric in METRICS}
+
+
+def _write_metrics_file(metrics_path: Path, dump: MetricsDump) -> None:
+    """Запись метрик атомарной заменой файла."""
+    tmp_metrics_path = metrics_path.with_suffix(".tmp")
+    tmp_metrics_path.write_text(json.dumps(dump))
+    tmp_metrics_path.replace(metrics_path)
+
+
+def _read_metrics_file(metrics_path: Path) -> MetricsDump | None:
+    """Чтение метрик из файла (None, если файла нет или он поврежден)."""
+    try:
+        return json.loads(metrics_path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def save_metrics() -> None:
+    """Сохранение метрик воркера в METRICS_DIR (атомарной заменой файла)."""
+    if not METRICS_DIR:
+        return
+
+    metrics_dir = Path(METRICS_DIR)
+    metrics_dir.mkdir(parents=True, exist_ok=True)
+    _write_metrics_file(metrics_dir / f"{os.getpid()}.json", dump_metrics())
+
+
+def _is_process_alive(pid: int) -> bool:
+    """Проверка существования процесса (сигнал 0 ничего не отправляет)."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Процесс есть, но принадлежит другому пользователю.
+        return True
+
+    return True
+
+
+def _merge_into_dead_metrics(metrics_dir: Path, pids: list[int]) -> None:
+    """Слияние метрик воркеров в dead.json и удаление их файлов.
+
+    Выполняется под блокировкой файла: иначе два воркера, одновременно
+    сливающие одни и те же файлы, посчитали бы их дважды.
+
+    Args:
+        metrics_dir (Path): Каталог метрик.
+        pids (list[int]): Воркеры, файлы которых сливаются (если еще есть).
+
+    """
+    counter_names = {metric.name for metric in METRICS
+                     if metric.metric_type != "gauge"}
+    with (metrics_dir / DEAD_METRICS_LOCK_FILE).open("a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+        metrics_paths = [metrics_dir / f"{pid}.json" for pid in pids]
+        dumps = [dump for metrics_path in metrics_paths
+                 if (dump := _read_metrics_file(metrics_path)) is not None]
+        if dumps:
+            dead_dump = _read_metrics_file(metrics_dir / DEAD_METRICS_FILE) or {}
+            aggregated = _aggregate_dumps([dead_dump, *dumps])
+            _write_metrics_file(metrics_dir / DEAD_METRICS_FILE, {
+                name: [[list(labelvalues), value]
+                       for labelvalues, value in samples.items()]
+                for name, samples in aggregated.items() if name in counter_names
+            })
+
+        # Файлы удаляются только после записи dead.json.
+        for metrics_path in metrics_paths:
+            metrics_path.unlink(missing_ok=True)
+            metrics_path.with_suffix(".tmp").unlink(missing_ok=True)
+
+
+def merge_dead_worker_metrics() -> None:
+    """Слияние файлов метрик завершившихся (в том числе упавших) воркеров."""
+    if not METRICS_DIR:
+        return
+
+    metrics_dir = Path(METRICS_DIR)
+    if not metrics_dir.is_dir():
+        return
+
+    dead_pids = [
+        int(metrics_path.stem)
+        for metrics_path in [*metrics_dir.glob("*.json"), *metrics_dir.glob("*.tmp")]
+        if metrics_path.stem.isdigit() and not _is_process_alive(int(metrics_path.stem))
+    ]
+    if dead_pids:
+        _merge_into_dead_metrics(metrics_dir, sorted(set(dead_pids)))
+
+
+def mark_worker_metrics_dead() -> None:
+    """Слияние метрик останавливающегося воркера в dead.json."""
+    if not METRICS_DIR:
+        return
+
+    save_metrics()
+    _merge_into_dead_metrics(Path(METRICS_DIR), [os.getpid()])
+
+
+def _merge_value(current_value: Any, value: Any) -> Any:  # noqa: ANN401
+    """Сложение значений счетчика или счетчиков корзин гистограммы."""
+    if current_value is None:
+        return value
+    if isinstance(value, list):
+        return [a + b for a, b in zip(current_value, value, strict=True)]
+
+    return current_value + value
+
+
+def _aggregate_dumps(dumps: list[MetricsDump]) -> dict[str, dict[LabelValues, Any]]:
+    """Сумма метрик по именам и меткам."""
+    aggregated: dict[str, dict[LabelValues, Any]] = defaultdict(dict)
+    for dump in dumps:
+        for name, samples in dump.items():
+            for labelvalues, value in samples:
+                labels = tuple(labelvalues)
+                aggregated[name][labels] = _merge_value(
+                    aggregated[name].get(labels), value
+                )
+
+    return aggregated
+
+
+def get_aggregated_metrics() -> dict[str, dict[LabelValues, Any]]:
+    """Сумма метрик текущего воркера, остальных и завершившихся воркеров.
+
+    Returns:
+        dict[str, dict[LabelValues, Any]]: Значения по меткам по именам метрик.
+
+    """
+    dumps = [dump_metrics()]
+    if METRICS_DIR:
+        merge_dead_worker_metrics()
+        own_metrics_file = f"{os.getpid()}.json"
+        for metrics_path in Path(METRICS_DIR).glob("*.json"):
+            if metrics_path.name == own_metrics_file:
+                continue
+            dump = _read_metrics_file(metrics_path)
+            if dump is not None:
+                dumps.append(dump)
+
+    return _aggregate_dumps(dumps)
+
+
+def _format_labels(labelnames: tuple[str, ...], labelvalues: LabelValues) -> str:
+    """Форматирование меток в {name="value",...}."""
+    if not labelnames:
+        return ""
+
+    escaped_values = (
+        value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        for value in labelvalues
+    )
+    return "{" + ",".join(
+        f'{name}="{value}"' for name, value in zip(labelnames, escaped_values,
+                                                    strict=True)
+    ) + "}"
+
+
+def render_metrics() -> str:
+    """Метрики всех воркеров в текстовом формате Prometheus.
+
+    Returns:
+        str: Тело ответа /internal/metrics.
+
+    """
+    aggregated = get_aggregated_metrics()
+    lines: list[str] = []
+
+    for metric in METRICS:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.metric_type}")
+
+        for labelvalues, value in sorted(aggregated.get(metric.name, {}).items()):
+            if not isinstance(metric, Histogram):
+                labels = _format_labels(metric.labelnames, labelvalues)
+                lines.append(f"{metric.name}{labels} {value}")
+                continue
+
+            cumulative_count = 0.0
+            bounds = [*map(str, metric.buckets), "+Inf"]
+            for bound, count in zip(bounds, value[:-1], strict=True):
+                cumulative_count += count
+                labels = _format_labels(
+                    (*metric.labelnames, "le"), (*labelvalues, bound)
+                )
+                lines.append(f"{metric.name}_bucket{labels} {cumulative_count}")
+
+            labels = _format_labels(metric.labelnames, labelvalues)
+            lines.append(f"{metric.name}_sum{labels} {value[-1]}")
+            lines.append(f"{metric.name}_count{labels} {cumulative_count}")
+
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """ASGI middleware, измеряющий длительность запросов по шаблонам маршрутов."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        """Инициализация middleware.
+
+        Args:
+            app (ASGIApp): Оборачиваемое приложение.
+
+        """
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Обработка запроса с учетом его длительности."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            # Шаблон маршрута, а не путь: /{alias}, а не каждый alias отдельно.
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - started_at,
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+            )
@@ -0,0 +1,216 @@
+"""Модуль семплирующего профилировщика живого процесса.
+
+Отдельный поток раз в PROFILER_SAMPLE_INTERVAL_MS снимает стек потока
+event loop'а через sys._current_frames, поэтому профилируемый код
+не замедляется трассировкой каждого вызова. Стеки агрегируются
+в collapsed-формат (flamegraph.pl) или в формат speedscope.
+"""
+import asyncio
+import itertools
+import sys
+import threading
+from collections import Counter
+from collections.abc import AsyncGenerator
+from functools import lru_cache
+from types import FrameType
+from typing import Any
+
+from core.config import PROFILE_EVERY_NTH_REQUEST, PROFILER_SAMPLE_INTERVAL_MS
+from core.exceptions import ProfilerBusyException
+
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+Stack = tuple[str, ...]
+
+
+def get_frame_name(frame: FrameType) -> str:
+    """Имя кадра стека: модуль и квалифицированное имя функции.
+
+    Args:
+        frame (FrameType): Кадр стека.
+
+    Returns:
+        str: Например, sqlalchemy.orm.session:Session.execute.
+
+    """
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{frame.f_code.co_qualname}"
+
+
+def get_stack(frame: FrameType | None) -> Stack:
+    """Стек от корня до текущего кадра.
+
+    Args:
+        frame (FrameType | None): Текущий кадр потока.
+
+    Returns:
+        Stack: Имена кадров от корня к вершине.
+
+    """
+    stack: list[str] = []
+    while frame is not None:
+        stack.append(get_frame_name(frame))
+        frame = frame.f_back
+
+    return tuple(reversed(stack))
+
+
+class StackSampler:
+    """Поток, периодически снимающий стек другого потока."""
+
+    def __init__(self, thread_id: int, interval_seconds: float) -> None:
+        """Инициализация семплера.
+
+        Args:
+            thread_id (int): Идентификатор профилируемого потока.
+            interval_seconds (float): Интервал между снимками стека.
+
+        """
+        self.thread_id = thread_id
+        self.interval_seconds = interval_seconds
+        self.stacks: Counter[Stack] = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="stack-sampler", daemon=True
+        )
+
+    def _run(self) -> None:
+        """Снятие стеков до остановки."""
+        while not self._stopped.wait(self.interval_seconds):
+            frame = sys._current_frames().get(self.thread_id)  # noqa: SLF001
+            if frame is not None:
+                self.stacks[get_stack(frame)] += 1
+
+    def start(self) -> None:
+        """Запуск семплирования."""
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Остановка семплирования (ждет не дольше одного снимка стека)."""
+        self._stopped.set()
+        self._thread.join()
+
+
+def render_collapsed(stacks: Counter[Stack]) -> str:
+    """Стеки в collapsed-формате: "frame;frame;frame count" на строку.
+
+    Args:
+        stacks (Counter[Stack]): Количество снимков по стекам.
+
+    Returns:
+        str: Профиль в collapsed-формате.
+
+    """
+    return "".join(f"{';'.join(stack)} {count}\n"
+                   for stack, count in stacks.most_common())
+
+
+def render_speedscope(stacks: Counter[Stack], name: str) -> dict[str, Any]:
+    """Стеки в формате speedscope (sampled профиль).
+
+    Args:
+        stacks (Counter[Stack]): Количество снимков по стекам.
+        name (str): Имя профиля.
+
+    Returns:
+        dict[str, Any]: Профиль в формате speedscope.
+
+    """
+    frame_indexes: dict[str, int] = {}
+    samples = [[frame_indexes.setdefault(frame_name, len(frame_indexes))
+                for frame_name in stack]
+               for stack in stacks]
+    weights = [count * PROFILER_SAMPLE_INTERVAL_MS for count in stacks.values()]
+
+    return {
+        "$schema": SPEEDSCOPE_SCHEMA,
+        "shared": {"frames": [{"name": frame_name} for frame_name in frame_indexes]},
+        "profiles": [{
+            "type": "sampled",
+            "name": name,
+            "unit": "milliseconds",
+            "startValue": 0,
+            "endValue": sum(weights),
+            "samples": samples,
+            "weights": weights,
+        }],
+    }
+
+
+@lru_cache
+def get_profiler_lock() -> asyncio.Lock:
+    """Получение блокировки, разрешающей один профиль процесса за раз.
+
+    Returns:
+        asyncio.Lock: Блокировка профилировщика.
+
+    """
+    return asyncio.Lock()
+
+
+async def profile_event_loop(seconds: float) -> Counter[Stack]:
+    """Профилирование потока event loop'а в течение seconds секунд.
+
+    Args:
+        seconds (float): Длительность профилирования.
+
+    Raises:
+        ProfilerBusyException: Если профилирование уже идет (409).
+
+    Returns:
+        Counter[Stack]: Количество снимков по стекам.
+
+    """
+    profiler_lock = get_profiler_lock()
+    if profiler_lock.locked():
+        raise ProfilerBusyException
+
+    async with profiler_lock:
+        sampler = StackSampler(
+            threading.get_ident(), PROFILER_SAMPLE_INTERVAL_MS / 1000
+        )
+        sampler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            sampler.stop()
+
+    return sampler.stacks
+
+
+@lru_cache
+def get_request_profiles() -> Counter[Stack]:
+    """Получение накопленных стеков профилированных запросов.
+
+    Returns:
+        Counter[Stack]: Количество снимков по стекам.
+
+    """
+    return Counter()
+
+
+_profiled_requests_counter = itertools.count(1)
+
+
+async def profile_every_nth_request() -> AsyncGenerator[None]:
+    """Зависимость, профилирующая каждый PROFILE_EVERY_NTH_REQUEST-й запрос.
+
+    Стеки копятся в get_request_profiles(). В снимки попадают и корутины
+    других запросов, выполнявшиеся в том же event loop'е.
+
+    Yields:
+        Iterator[AsyncGenerator[None]]: Обработка запроса.
+
+    """
+    if PROFILE_EVERY_NTH_REQUEST <= 0 \
+            or next(_profiled_requests_counter) % PROFILE_EVERY_NTH_REQUEST:
+        yield
+        return
+
+    sampler = StackSampler(threading.get_ident(), PROFILER_SAMPLE_INTERVAL_MS / 1000)
+    sampler.start()
+    try:
+        yield
+    finally:
+        sampler.stop()
+        get_request_profiles().update(sampler.stacks)
@@ -0,0 +1,248 @@
+"""Модуль планировщика периодических фоновых задач воркера.
+
+Каждая задача запускается в своем цикле с интервалом, случайным разбросом
+(чтобы воркеры не ходили в базу одновременно) и таймаутом; длительность
+и результат каждого запуска попадают в метрики.
+
+Задачи в режиме singleton выполняются только на одном воркере - лидере.
+Лидер держит сессионный pg_try_advisory_lock на отдельном соединении
+(вне пула приложения). Postgres снимает такую блокировку, когда соединение
+закрывается, в том числе при падении воркера, и ее забирает другой воркер
+при следующей проверке. Во время передачи лидерства запуск singleton задачи
+может пересечься с запуском на прошлом лидере, поэтому такие задачи должны
+быть безопасны при параллельном запуске (как задачи с lock'ами alias_numeric).
+"""
+import asyncio
+import logging
+import os
+import random
+import time
+from collections.abc import Awaitable, Callable
+from functools import lru_cache
+from typing import NamedTuple
+
+from sqlalchemy import NullPool, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, create_async_engine
+
+from core.config import (
+    SCHEDULER_JITTER_RATIO,
+    SCHEDULER_JOB_TIMEOUT_SECONDS,
+    SCHEDULER_LEADER_CHECK_INTERVAL_SECONDS,
+    SCHEDULER_LEADER_LOCK_KEY,
+)
+from core.metrics import SCHEDULER_JOB_DURATION, SCHEDULER_JOB_RUNS, SCHEDULER_LEADER
+from database import database
+
+logger = logging.getLogger(__name__)
+
+# Первый ключ двухключевой advisory блокировки. Пространство ключей
+# (int4, int4) не пересекается с bigint ключами lock'ов alias_numeric.
+LEADER_LOCK_CLASS_ID = 0x55524C53
+# Keepalive соединения лидера: при обрыве сети Postgres снимает блокировку
+# примерно через idle + interval * count секунд, а не через часы.
+LEADER_CONNECTION_SERVER_SETTINGS = {
+    "tcp_keepalives_idle": "10",
+    "tcp_keepalives_interval": "5",
+    "tcp_keepalives_count": "3",
+}
+
+
+class ScheduledJob(NamedTuple):
+    """Периодическая задача планировщика."""
+
+    name: str
+    job: Callable[[], Awaitable[None]]
+    interval_seconds: float
+    timeout_seconds: float
+    singleton: bool
+
+
+class Scheduler:
+    """Планировщик периодических задач с выбором лидера для singleton задач."""
+
+    def __init__(
+        self,
+        jitter_ratio: float,
+        leader_check_interval_seconds: float,
+        leader_lock_key: int
+    ) -> None:
+        """Инициализация планировщика.
+
+        Args:
+            jitter_ratio (float): Разброс интервала (0.1 - плюс-минус 10%).
+            leader_check_interval_seconds (float): Как часто лидер проверяет
+                соединение, а остальные воркеры пытаются взять блокировку.
+            leader_lock_key (int): Второй ключ блокировки лидера.
+
+        """
+        self.jitter_ratio = jitter_ratio
+        self.leader_check_interval_seconds = leader_check_interval_seconds
+        self.leader_lock_key = leader_lock_key
+        self.jobs: list[ScheduledJob] = []
+        self.tasks: list[asyncio.Task[None]] = []
+        self.is_leader = False
+        self.leader_engine: AsyncEngine | None = None
+        self.leader_connection: AsyncConnection | None = None
+
+    def register(
+        self,
+        name: str,
+        job: Callable[[], Awaitable[None]],
+        interval_seconds: float,
+        *,
+        timeout_seconds: float = SCHEDULER_JOB_TIMEOUT_SECONDS,
+        singleton: bool = False
+    ) -> None:
+        """Регистрация периодической задачи.
+
+        Args:
+            name (str): Имя задачи (метка в метриках).
+            job (Callable[[], Awaitable[None]]): Задача.
+            interval_seconds (float): Интервал между запусками (0 - не запускать).
+            timeout_seconds (float, optional): Таймаут одного запуска.
+                Defaults to SCHEDULER_JOB_TIMEOUT_SECONDS.
+            singleton (bool, optional): Выполнять только на лидере.
+                Defaults to False.
+
+        """
+        if interval_seconds > 0:
+            self.jobs.append(ScheduledJob(
+                name, job, interval_seconds, timeout_seconds, singleton
+            ))
+
+    def start(self) -> None:
+        """Запуск циклов задач и выбора лидера (если есть singleton задачи)."""
+        self.tasks = [asyncio.create_task(self._run_periodically(scheduled_job))
+                      for scheduled_job in self.jobs]
+        if any(scheduled_job.singleton for scheduled_job in self.jobs):
+            self.tasks.append(asyncio.create_task(self._elect_leader_periodically()))
+
+    async def stop(self) -> None:
+        """Остановка задач и освобождение лидерства для других воркеров."""
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        await self._release_leadership()
+        self.jobs = []
+
+    def _get_delay(self, interval_seconds: float) -> float:
+        """Интервал до следующего запуска со случайным разбросом."""
+        return interval_seconds * random.uniform(
+            1 - self.jitter_ratio, 1 + self.jitter_ratio
+        )
+
+    async def _run_periodically(self, scheduled_job: ScheduledJob) -> None:
+        """Бесконечный запуск задачи (ошибка не останавливает следующие запуски)."""
+        while True:
+            await asyncio.sleep(self._get_delay(scheduled_job.interval_seconds))
+            await self.run_job(scheduled_job)
+
+    async def run_job(self, scheduled_job: ScheduledJob) -> None:
+        """Один запуск задачи с таймаутом и метриками.
+
+        Args:
+            scheduled_job (ScheduledJob): Задача.
+
+        """
+        if scheduled_job.singleton and not self.is_leader:
+            SCHEDULER_JOB_RUNS.inc(scheduled_job.name, "skipped")
+            return
+
+        started_at = time.perf_counter()
+        try:
+            async with asyncio.timeout(scheduled_job.timeout_seconds):
+                await scheduled_job.job()
+        except TimeoutError:
+            result = "timeout"
+            logger.exception("Background job %s timed out", scheduled_job.name)
+        except Exception:
+            result = "failed"
+            logger.exception("Background job %s failed", scheduled_job.name)
+        else:
+            result = "ok"
+
+        SCHEDULER_JOB_RUNS.inc(scheduled_job.name, result)
+        SCHEDULER_JOB_DURATION.observe(
+            time.perf_counter() - started_at, scheduled_job.name
+        )
+
+    async def _elect_leader_periodically(self) -> None:
+        """Бесконечная проверка лидерства."""
+        while True:
+            try:
+                await self.elect_leader()
+            except Exception:
+                logger.exception("Scheduler leader election failed")
+                await self._release_leadership()
+            await asyncio.sleep(self.leader_check_interval_seconds)
+
+    async def elect_leader(self) -> bool:
+        """Проверка соединения лидера или попытка стать лидером.
+
+        Returns:
+            bool: True, если воркер - лидер.
+
+        """
+        if database.async_engine is None:
+            return False
+
+        if self.leader_connection is None:
+            if self.leader_engine is None:
+                # Отдельное соединение вне пула: оно занято все время лидерства.
+                self.leader_engine = create_async_engine(
+                    database.async_engine.url, poolclass=NullPool,
+                    connect_args={"server_settings": LEADER_CONNECTION_SERVER_SETTINGS},
+                )
+            self.leader_connection = await self.leader_engine.connect()
+
+        if self.is_leader:
+            # Блокировка живет, пока живо соединение.
+            await self.leader_connection.execute(text("SELECT 1"))
+        else:
+            self.is_leader = bool(await self.leader_connection.scalar(
+                text("SELECT pg_try_advisory_lock(:class_id, :object_id)"),
+                {"class_id": LEADER_LOCK_CLASS_ID, "object_id": self.leader_lock_key},
+            ))
+            if self.is_leader:
+                logger.info("Worker %s became scheduler leader", os.getpid())
+        # Сессионная блокировка переживает коммит, а соединение не висит
+        # idle in transaction.
+        await self.leader_connection.commit()
+
+        SCHEDULER_LEADER.set(float(self.is_leader), str(os.getpid()))
+        return self.is_leader
+
+    async def _release_leadership(self) -> None:
+        """Закрытие соединения лидера (Postgres снимает блокировку)."""
+        was_leader = self.is_leader
+        self.is_leader = False
+        SCHEDULER_LEADER.set(0.0, str(os.getpid()))
+
+        if self.leader_connection is not None:
+            try:
+                await self.leader_connection.close()
+            except Exception:
+                logger.exception("Scheduler leader connection close failed")
+            self.leader_connection = None
+        if self.leader_engine is not None:
+            await self.leader_engine.dispose()
+            self.leader_engine = None
+
+        if was_leader:
+            logger.info("Worker %s released scheduler leadership", os.getpid())
+
+
+@lru_cache
+def get_scheduler() -> Scheduler:
+    """Получение планировщика текущего воркера.
+
+    Returns:
+        Scheduler: Планировщик.
+
+    """
+    return Scheduler(
+        SCHEDULER_JITTER_RATIO,
+        SCHEDULER_LEADER_CHECK_INTERVAL_SECONDS,
+        SCHEDULER_LEADER_LOCK_KEY,
+    )
@@ -1,9 +1,10 @@
 """Модуль кастомных шаблонов pydantic."""
 from datetime import datetime
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, field_validator
 
-from core.config import BASE_URL
+from core.config import BASE_URL, BULK_DELETE_MAX_ALIASES
+from core.validators import validate_alias, validate_original_url
 
 SHORT_URL_SCHEMA = BASE_URL + "{}"
 
@@ -19,6 +20,11 @@ class ShortUrlRequestSchema(BaseSchema):
 
     url: str
     custom_alias: str | None = None
+    expires_at: datetime | None = None
+
+    # Некорректные url и алиас отклоняются до открытия сессии базы данных.
+    _validate_url = field_validator("url")(validate_original_url)
+    _validate_custom_alias = field_validator("custom_alias")(validate_alias)
 
 
 class CreatedShortedUrlResponseSchema(BaseSchema):
@@ -36,6 +42,9 @@ class ShortedUrlDetailResponseSchema(BaseSchema):
     original_url: str
     created_at: datetime
     clicks: int
+    expires_at: datetime | None = None
+    # Приблизительное количество уникальных посетителей (HyperLogLog).
+    unique_visitors: int = 0
 
 
 class ShortedUrlResponseSchema(BaseSchema):
@@ -45,3 +54,63 @@ class ShortedUrlResponseSchema(BaseSchema):
     alias: str
     clicks: int
     created_at: datetime
+
+
+# Сериализатор страницы ссылок сразу в JSON байты (без повторной валидации).
+SHORTED_URLS_RESPONSE_ADAPTER = TypeAdapter(list[ShortedUrlResponseSchema])
+
+
+class BulkDeleteRequestSchema(BaseSchema):
+    """Схема получения списка алиасов для пакетного удаления от клиента."""
+
+    aliases: list[str] = Field(min_length=1, max_length=BULK_DELETE_MAX_ALIASES)
+
+
+class BulkDeleteResponseSchema(BaseSchema):
+    """Схема отправки результата пакетного удаления клиенту."""
+
+    deleted: list[str]
+    # Алиасы, ссылок с которыми не было.
+    missing: list[str]
+    # Алиасы пачек, которые удалить не удалось (можно повторить запрос).
+    failed: list[str] = []
+
+
+class ClicksBucketSchema(BaseSchema):
+    """Схема количества переходов за час или день."""
+
+    bucket: datetime
+    clicks: int
+
+
+class ShortedUrlStatsResponseSchema(BaseSchema):
+    """Схема отправки статистики переходов по ссылке клиенту."""
+
+    alias: str
+    hourly: list[ClicksBucketSchema]
+    daily: list[ClicksBucketSchema]
+
+
+class HotLinkResponseSchema(BaseSchema):
+    """Схема отправки информации о популярной ссылке воркера."""
+
+    alias: str
+    clicks: int
+    # Насколько clicks может быть завышен (погрешность Space-Saving).
+    error: int
+
+
+class WarmupStageSchema(BaseSchema):
+    """Схема отправки результата этапа прогрева воркера."""
+
+    name: str
+    status: str
+    seconds: float
+    error: str | None = None
+
+
+class HealthResponseSchema(BaseSchema):
+    """Схема отправки состояния воркера (liveness и readiness)."""
+
+    status: str
+    stages: list[WarmupStageSchema]
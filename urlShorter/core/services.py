@@ -1,17 +1,69 @@
 """Модуль сервиса для работы с ссылками."""
-import re
+import base64
+import hashlib
+import logging
+import time
 from collections import defaultdict
-from datetime import datetime
+from collections.abc import Awaitable, Callable, Iterable, Sequence
+from datetime import UTC, datetime
 from functools import lru_cache
 from random import choice, randint
-
-from sqlalchemy import and_, delete, func, select, text, update
+from typing import Any
+from urllib.parse import urlsplit
+
+from sqlalchemy import (
+    Row,
+    Select,
+    String,
+    and_,
+    any_,
+    bindparam,
+    delete,
+    func,
+    select,
+    text,
+    true,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.exc import DBAPIError, IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-
-from core.config import MAX_GET_RANDOM_ALIAS_ATTEMPT_COUNT, MAX_PER_PAGE_URLS_COUNT
+from sqlalchemy.orm import InstrumentedAttribute
+
+from core.config import (
+    BULK_DELETE_BATCH_SIZE,
+    MAX_GET_RANDOM_ALIAS_ATTEMPT_COUNT,
+    MAX_PER_PAGE_URLS_COUNT,
+    SEARCH_MAX_RESULTS,
+    SEARCH_MIN_QUERY_LENGTH,
+    SEARCH_STATEMENT_TIMEOUT_MS,
+    URL_DEDUPLICATION_ENABLED,
+)
 from core.exceptions import UnexpectedException
+from core.metrics import (
+    ADVISORY_LOCK_WAIT,
+    ALLOCATOR_PROBES,
+    SERVICE_METHOD_DURATION,
+    timed_async_methods,
+)
+from core.validators import (
+    ALIAS_ERROR_MESSAGE,
+    ORIGINAL_URL_ERROR_MESSAGE,
+    is_valid_alias,
+    is_valid_original_url,
+)
 from database.models import ShortedUrl
 
+logger = logging.getLogger(__name__)
+
+# SQLSTATE отмены запроса по statement_timeout.
+QUERY_CANCELED_SQLSTATE = "57014"
+# SQLSTATE транзакции, прерванной для разрешения взаимной блокировки.
+DEADLOCK_DETECTED_SQLSTATE = "40P01"
+# Сколько раз пачка пакетного удаления повторяется после взаимной блокировки.
+MAX_DEADLOCK_RETRY_COUNT = 3
+
 
 class AliasNumericService:
     """Сервис для кастомной системы счислений alias'ов."""
@@ -83,6 +135,7 @@ class AliasNumericService:
         return alias_numeric
 
 
+@timed_async_methods(SERVICE_METHOD_DURATION)
 class UrlsService:
     """Сервис для CRUD ссылок."""
 
@@ -97,10 +150,9 @@ class UrlsService:
         # Модуль для блокирования процессов выше или ниже алиаса
         # с данным номером взятым по модулю.
         self.alias_numeric_lock_modulo = 2 ** 63
-        # Паттерн, которому должен соответствовать алиас.
-        self.alias_pattern = "^[-_0-9a-zA-Z]{4,20}$"
-        # Паттерн, которому должен соответствовать оригинальный url.
-        self.original_url_pattern = "^(http://.{1,2041})|(https://.{1,2040})$"
+        # Алиасы, совпадающие с путями служебных методов
+        # (/healthz, /readyz, /api/links/search).
+        self.reserved_aliases = frozenset(("healthz", "readyz", "search"))
 
     async def get_shorted_url_by_alias(self, alias: str) -> ShortedUrl | None:
         """Получение ShortedUrl по его алиасу.
@@ -116,24 +168,426 @@ class UrlsService:
 
         return await self.db.scalar(select_shorted_url)
 
-    async def get_shorted_urls(self, page: int, per_page: int) -> list[ShortedUrl]:
-        """Получение списка ShortedUrl с пагинацией.
+    async def get_hot_shorted_url_by_alias(self, alias: str) -> ShortedUrl | None:
+        """Получение ShortedUrl по его алиасу только из горячей партиции.
+
+        Args:
+            alias (str): Алиас.
+
+        Returns:
+            ShortedUrl | None: Возвращает ShortedUrl если алиас есть в горячей
+            партиции, иначе None.
+
+        """
+        select_shorted_url = select(ShortedUrl).where(
+            ShortedUrl.alias==alias, ~ShortedUrl.archived
+        )
+
+        return await self.db.scalar(select_shorted_url)
+
+    async def get_redirect_shorted_url_by_alias(self, alias: str) -> ShortedUrl | None:
+        """Получение ShortedUrl для перехода по короткой ссылке.
+
+        Сначала ищется в горячей партиции, затем во всех. Найденная в холодной
+        партиции ссылка переносится обратно в горячую.
+
+        Args:
+            alias (str): Алиас.
+
+        Returns:
+            ShortedUrl | None: Возвращает ShortedUrl если алиас есть в базе, иначе None.
+
+        """
+        shorted_url: ShortedUrl | None = await self.get_hot_shorted_url_by_alias(alias)
+        if shorted_url is not None:
+            return shorted_url
+
+        # Один запрос по обеим партициям видит ссылку даже во время ее переноса.
+        shorted_url = await self.get_shorted_url_by_alias(alias)
+        if shorted_url is not None and shorted_url.archived:
+            return await self.promote_archived_shorted_url(shorted_url)
+
+        return shorted_url
+
+    async def promote_archived_shorted_url(
+        self,
+        shorted_url: ShortedUrl
+    ) -> ShortedUrl | None:
+        """Перенос ссылки из холодной партиции в горячую.
+
+        Args:
+            shorted_url (ShortedUrl): Ссылка из холодной партиции.
+
+        Returns:
+            ShortedUrl | None: Ссылка из горячей партиции или None, если ее
+            успели удалить.
+
+        """
+        alias = shorted_url.alias
+        alias_numeric = get_alias_numeric_service().get_alias_numeric_from_alias(alias)
+
+        # archived входит в первичный ключ, поэтому старый объект больше не нужен.
+        self.db.expunge(shorted_url)
+
+        # lock alias_numeric текущего (как при переносе в холодную партицию)
+        await self._lock_by_alias_numeric(alias_numeric)
+
+        promote_shorted_url_stmt = update(ShortedUrl).where(
+            ShortedUrl.alias==alias, ShortedUrl.archived
+        ).values(archived=False).execution_options(synchronize_session=False)
+
+        await self.db.execute(promote_shorted_url_stmt)
+        await self.db.commit()
+
+        return await self.get_hot_shorted_url_by_alias(alias)
+
+    async def archive_cold_urls_with_lock(
+        self,
+        clicked_before: datetime,
+        batch_size: int
+    ) -> int:
+        """Перенос пачки давно не кликаемых ссылок в холодную партицию.
+
+        Кандидаты ищутся последовательным чтением горячей партиции: она
+        небольшая, а лишний индекс увеличил бы именно ее.
 
         Args:
+            clicked_before (datetime): Ссылки, последний клик (или создание)
+                которых был раньше, переносятся.
+            batch_size (int): Максимальное количество переносимых ссылок.
+
+        Returns:
+            int: Количество перенесенных ссылок.
+
+        """
+        last_activity_at = func.coalesce(
+            ShortedUrl.last_clicked_at, ShortedUrl.created_at
+        )
+
+        select_cold_aliases_stmt = select(ShortedUrl.alias).where(
+            ~ShortedUrl.archived, last_activity_at < clicked_before
+        ).limit(batch_size)
+
+        cold_aliases = list(await self.db.scalars(select_cold_aliases_stmt))
+
+        if not cold_aliases:
+            await self.db.rollback()
+            return 0
+
+        alias_numeric_service = get_alias_numeric_service()
+        # lock alias_numeric переносимых, чтобы аллокатор не видел их пропавшими
+        await self._lock_by_alias_numerics(
+            alias_numeric_service.get_alias_numeric_from_alias(alias)
+            for alias in cold_aliases
+        )
+
+        # Условие повторяется: ссылку могли кликнуть до взятия блокировок.
+        archive_cold_urls_stmt = update(ShortedUrl).where(
+            ShortedUrl.alias.in_(cold_aliases),
+            ~ShortedUrl.archived,
+            last_activity_at < clicked_before,
+        ).values(archived=True).execution_options(synchronize_session=False)
+
+        result = await self.db.execute(archive_cold_urls_stmt)
+        await self.db.commit()
+
+        return result.rowcount  # type: ignore
+
+    async def get_shorted_url_by_original_url(
+        self,
+        original_url: str
+    ) -> ShortedUrl | None:
+        """Получение ShortedUrl, созданного в режиме дедупликации, по его url.
+
+        Args:
+            original_url (str): Оригинальный url.
+
+        Returns:
+            ShortedUrl | None: Возвращает ShortedUrl если url уже сокращался,
+            иначе None.
+
+        """
+        select_shorted_url = select(ShortedUrl).where(
+            ShortedUrl.original_url_hash==get_original_url_hash(original_url)
+        )
+        shorted_url: ShortedUrl | None = await self.db.scalar(select_shorted_url)
+
+        # Защита от коллизии хеша.
+        if shorted_url is not None and shorted_url.original_url != original_url:
+            return None
+
+        return shorted_url
+
+    def _select_shorted_urls_page(
+        self,
+        *columns: InstrumentedAttribute[Any],
+        page: int,
+        per_page: int
+    ) -> Select[Any]:
+        """Запрос колонок страницы ссылок в порядке списка ссылок.
+
+        Args:
+            *columns (InstrumentedAttribute[Any]): Выбираемые колонки.
             page (int): Номер страницы.
-            per_page (int): Количество ShortedUrl на странице.
+            per_page (int): Количество ссылок на странице.
 
         Returns:
-            list[ShortedUrl]: Список ShortedUrl
+            Select[Any]: Запрос страницы.
 
         """
         page = max(1, page) - 1
         per_page = min(MAX_PER_PAGE_URLS_COUNT, per_page)
 
-        select_shorted_urls_stmt = select(ShortedUrl).order_by(
+        return select(*columns).order_by(
             ShortedUrl.alias_len, ShortedUrl.alias
         ).offset(page * per_page).limit(per_page)
-        return list(await self.db.scalars(select_shorted_urls_stmt))
+
+    async def get_shorted_url_rows(
+        self,
+        page: int,
+        per_page: int
+    ) -> Sequence[Row[tuple[int, str, str, int, datetime]]]:
+        """Получение страницы ссылок только нужными для списка колонками.
+
+        Не создает ORM объекты: строки сразу сериализуются в ответ.
+
+        Args:
+            page (int): Номер страницы.
+            per_page (int): Количество ссылок на странице.
+
+        Returns:
+            Sequence[Row[tuple[int, str, str, int, datetime]]]: Строки
+            (id, original_url, alias, clicks, created_at).
+
+        """
+        select_shorted_url_rows_stmt = self._select_shorted_urls_page(
+            ShortedUrl.id,
+            ShortedUrl.original_url,
+            ShortedUrl.alias,
+            ShortedUrl.clicks,
+            ShortedUrl.created_at,
+            page=page,
+            per_page=per_page,
+        )
+
+        return (await self.db.execute(select_shorted_url_rows_stmt)).all()
+
+    async def get_filtered_shorted_url_rows(  # noqa: PLR0913
+        self,
+        *,
+        created_by_ip: str | None,
+        created_from: datetime | None,
+        created_to: datetime | None,
+        descending: bool,
+        cursor: tuple[datetime, int] | None,
+        per_page: int
+    ) -> Sequence[Row[tuple[int, str, str, int, datetime]]]:
+        """Получение страницы ссылок по ip и времени создания в порядке created_at.
+
+        Страница выбирается keyset'ом по (created_at, id): id страницы читаются
+        index only сканом idx_created_by_ip_created_at_and_id или
+        idx_created_at_and_id, и только строки страницы читаются по id.
+
+        Args:
+            created_by_ip (str | None): IP, с которого созданы ссылки.
+            created_from (datetime | None): Созданы не раньше (включительно).
+            created_to (datetime | None): Созданы раньше (не включительно).
+            descending (bool): Новые ссылки первыми.
+            cursor (tuple[datetime, int] | None): (created_at, id) последней
+                ссылки предыдущей страницы.
+            per_page (int): Количество ссылок на странице.
+
+        Returns:
+            Sequence[Row[tuple[int, str, str, int, datetime]]]: Строки
+            (id, original_url, alias, clicks, created_at).
+
+        """
+        per_page = max(1, min(MAX_PER_PAGE_URLS_COUNT, per_page))
+
+        select_page_ids_stmt = select(ShortedUrl.id, ShortedUrl.created_at)
+        if created_by_ip is not None:
+            select_page_ids_stmt = select_page_ids_stmt.where(
+                ShortedUrl.created_by_ip == created_by_ip
+            )
+        if created_from is not None:
+            select_page_ids_stmt = select_page_ids_stmt.where(
+                ShortedUrl.created_at >= created_from
+            )
+        if created_to is not None:
+            select_page_ids_stmt = select_page_ids_stmt.where(
+                ShortedUrl.created_at < created_to
+            )
+        if cursor is not None:
+            page_key = tuple_(ShortedUrl.created_at, ShortedUrl.id)
+            select_page_ids_stmt = select_page_ids_stmt.where(
+                page_key < tuple_(*cursor) if descending else page_key > tuple_(*cursor)
+            )
+
+        if descending:
+            select_page_ids_stmt = select_page_ids_stmt.order_by(
+                ShortedUrl.created_at.desc(), ShortedUrl.id.desc()
+            )
+        else:
+            select_page_ids_stmt = select_page_ids_stmt.order_by(
+                ShortedUrl.created_at, ShortedUrl.id
+            )
+        page_ids = select_page_ids_stmt.limit(per_page).subquery()
+
+        select_shorted_url_rows_stmt = select(
+            ShortedUrl.id,
+            ShortedUrl.original_url,
+            ShortedUrl.alias,
+            ShortedUrl.clicks,
+            ShortedUrl.created_at,
+        ).join(page_ids, ShortedUrl.id == page_ids.c.id).order_by(
+            *((page_ids.c.created_at.desc(), page_ids.c.id.desc()) if descending
+              else (page_ids.c.created_at, page_ids.c.id))
+        )
+
+        return (await self.db.execute(select_shorted_url_rows_stmt)).all()
+
+    async def search_shorted_url_rows(
+        self,
+        query: str | None,
+        host: str | None,
+        before_id: int | None,
+        limit: int
+    ) -> Sequence[Row[tuple[int, str, str, int, datetime]]]:
+        """Поиск ссылок по подстроке original_url и/или хосту (новые первыми).
+
+        Подстрока ищется через ILIKE (триграммный индекс idx_original_url_trgm),
+        хост - равенством по idx_original_host_and_id. Страницы keyset'ом:
+        следующая страница начинается с id меньше последнего id предыдущей.
+
+        Args:
+            query (str | None): Подстрока original_url (без учета регистра).
+            host (str | None): Хост original_url (нормализуется как при создании).
+            before_id (int | None): Искать ссылки с id меньше этого (курсор).
+            limit (int): Количество ссылок (не больше SEARCH_MAX_RESULTS).
+
+        Raises:
+            ValueError: Если не задан ни query, ни host.
+            ValueError: Если query короче SEARCH_MIN_QUERY_LENGTH.
+            ValueError: Если запрос не уложился в SEARCH_STATEMENT_TIMEOUT_MS.
+
+        Returns:
+            Sequence[Row[tuple[int, str, str, int, datetime]]]: Строки
+            (id, original_url, alias, clicks, created_at).
+
+        """
+        if not query and not host:
+            msg = "q or host must be set"
+            raise ValueError(msg)
+
+        if query and len(query) < SEARCH_MIN_QUERY_LENGTH:
+            msg = f"q must be at least {SEARCH_MIN_QUERY_LENGTH} characters long"
+            raise ValueError(msg)
+
+        select_shorted_url_rows_stmt = select(
+            ShortedUrl.id,
+            ShortedUrl.original_url,
+            ShortedUrl.alias,
+            ShortedUrl.clicks,
+            ShortedUrl.created_at,
+        )
+
+        if query:
+            select_shorted_url_rows_stmt = select_shorted_url_rows_stmt.where(
+                ShortedUrl.original_url.ilike(f"%{escape_like(query)}%", escape="\\")
+            )
+        if host:
+            select_shorted_url_rows_stmt = select_shorted_url_rows_stmt.where(
+                ShortedUrl.original_host == normalize_host(host)
+            )
+        if before_id is not None:
+            select_shorted_url_rows_stmt = select_shorted_url_rows_stmt.where(
+                ShortedUrl.id < before_id
+            )
+
+        if query:
+            # С ORDER BY id DESC LIMIT планировщик может выбрать обратный скан
+            # первичного ключа с фильтром ILIKE, который на редкой подстроке
+            # читает всю таблицу. Материализованный CTE сначала собирает
+            # совпадения по триграммному индексу, затем они сортируются.
+            matches = select_shorted_url_rows_stmt.cte(
+                "search_matches"
+            ).prefix_with("MATERIALIZED")
+            select_shorted_url_rows_stmt = select(matches)
+            order_by_column = matches.c.id
+        else:
+            order_by_column = ShortedUrl.id
+
+        select_shorted_url_rows_stmt = select_shorted_url_rows_stmt.order_by(
+            order_by_column.desc()
+        ).limit(max(1, min(SEARCH_MAX_RESULTS, limit)))
+
+        try:
+            # Таймаут только на транзакцию поиска.
+            await self.db.execute(select(func.set_config(
+                "statement_timeout", str(SEARCH_STATEMENT_TIMEOUT_MS), true()
+            )))
+            shorted_url_rows = (
+                await self.db.execute(select_shorted_url_rows_stmt)
+            ).all()
+        except DBAPIError as e:
+            if getattr(e.orig, "sqlstate", None) != QUERY_CANCELED_SQLSTATE:
+                raise
+            await self.db.rollback()
+            msg = "search query is too broad, narrow it"
+            raise ValueError(msg) from e
+
+        await self.db.commit()
+        return shorted_url_rows
+
+    async def get_shorted_urls_page_version_rows(
+        self,
+        page: int,
+        per_page: int
+    ) -> Sequence[Row[tuple[int, int, datetime]]]:
+        """Получение версии страницы ссылок: только колонок для ETag.
+
+        Args:
+            page (int): Номер страницы.
+            per_page (int): Количество ссылок на странице.
+
+        Returns:
+            Sequence[Row[tuple[int, int, datetime]]]: Строки
+            (id, clicks, created_at).
+
+        """
+        select_page_version_rows_stmt = self._select_shorted_urls_page(
+            ShortedUrl.id,
+            ShortedUrl.clicks,
+            ShortedUrl.created_at,
+            page=page,
+            per_page=per_page,
+        )
+
+        return (await self.db.execute(select_page_version_rows_stmt)).all()
+
+    async def get_shorted_url_detail_row_by_alias(
+        self,
+        alias: str
+    ) -> Row[tuple[int, str, datetime, int, datetime | None]] | None:
+        """Получение колонок ссылки для детальной информации по алиасу.
+
+        Args:
+            alias (str): Алиас.
+
+        Returns:
+            Row[tuple[int, str, datetime, int, datetime | None]] | None: Строка
+            (id, original_url, created_at, clicks, expires_at) или None.
+
+        """
+        select_shorted_url_detail_row_stmt = select(
+            ShortedUrl.id,
+            ShortedUrl.original_url,
+            ShortedUrl.created_at,
+            ShortedUrl.clicks,
+            ShortedUrl.expires_at,
+        ).where(ShortedUrl.alias==alias)
+
+        return (await self.db.execute(select_shorted_url_detail_row_stmt)).first()
 
     async def get_ip_shorted_urls_created_count(
         self,
@@ -185,8 +639,113 @@ class UrlsService:
         """
         # Берем по модулю (меньше 2^64) так как, BIGINT не поддерживает больше 2^64.
         remainder_of_division = alias_numeric % self.alias_numeric_lock_modulo
+        started_at = time.perf_counter()
         await self.db.execute(text(
             f"SELECT pg_advisory_xact_lock({remainder_of_division});"))
+        ADVISORY_LOCK_WAIT.observe(time.perf_counter() - started_at)
+
+    async def _lock_by_alias_numerics(self, alias_numerics: Iterable[int]) -> None:
+        """Блокировка сразу нескольких alias_numeric одним запросом.
+
+        Ключи блокируются в порядке возрастания, поэтому несколько пакетных
+        блокировок не могут взаимно заблокировать друг друга.
+
+        Args:
+            alias_numerics (Iterable[int]): Цифровые значения алиасов.
+
+        """
+        lock_keys = sorted({
+            alias_numeric % self.alias_numeric_lock_modulo
+            for alias_numeric in alias_numerics
+        })
+
+        if not lock_keys:
+            return
+
+        # unnest отдает элементы в порядке массива.
+        started_at = time.perf_counter()
+        await self.db.execute(text(
+            "SELECT pg_advisory_xact_lock(lock_key) "
+            "FROM unnest(CAST(:lock_keys AS BIGINT[])) AS lock_key;"
+        ).bindparams(lock_keys=lock_keys))
+        ADVISORY_LOCK_WAIT.observe(time.perf_counter() - started_at)
+
+    async def _try_lock_aliases_with_previous(self, aliases: list[str]) -> list[str]:
+        """Попытка без ожидания заблокировать alias_numeric алиасов и предыдущих.
+
+        pg_try_advisory_xact_lock не ждет: алиас, который сейчас блокирует
+        другая транзакция (создание соседа или удаление), пропускается.
+        Блокировки, уже взятые этой транзакцией, берутся повторно, поэтому
+        соседние алиасы одной пачки не мешают друг другу.
+
+        Args:
+            aliases (list[str]): Алиасы.
+
+        Returns:
+            list[str]: Алиасы, для которых взяты обе блокировки.
+
+        """
+        if not aliases:
+            return []
+
+        alias_numeric_service = get_alias_numeric_service()
+        alias_numerics = [
+            alias_numeric_service.get_alias_numeric_from_alias(alias)
+            for alias in aliases
+        ]
+
+        # Предыдущий ключ блокируется первым, как и в остальных методах.
+        started_at = time.perf_counter()
+        locked_aliases = list(await self.db.scalars(text(
+            "SELECT alias FROM unnest("
+            "CAST(:aliases AS VARCHAR[]), "
+            "CAST(:previous_lock_keys AS BIGINT[]), "
+            "CAST(:lock_keys AS BIGINT[])"
+            ") WITH ORDINALITY AS t(alias, previous_lock_key, lock_key, position) "
+            "WHERE pg_try_advisory_xact_lock(previous_lock_key) "
+            "AND pg_try_advisory_xact_lock(lock_key) "
+            "ORDER BY position;"
+        ).bindparams(
+            aliases=aliases,
+            previous_lock_keys=[(alias_numeric - 1) % self.alias_numeric_lock_modulo
+                                for alias_numeric in alias_numerics],
+            lock_keys=[alias_numeric % self.alias_numeric_lock_modulo
+                       for alias_numeric in alias_numerics],
+        )))
+        ADVISORY_LOCK_WAIT.observe(time.perf_counter() - started_at)
+
+        return locked_aliases
+
+    async def _mark_previous_urls_available(self, deleted_aliases: list[str]) -> None:
+        """Пометка предыдущих ссылок удаленных алиасов как available_after=True.
+
+        Так освобожденные алиасы одним запросом возвращаются аллокатору.
+        Блокировки alias_numeric должны быть уже взяты.
+
+        Args:
+            deleted_aliases (list[str]): Удаленные алиасы.
+
+        """
+        if not deleted_aliases:
+            return
+
+        alias_numeric_service = get_alias_numeric_service()
+        previous_aliases = [
+            alias_numeric_service.get_alias_from_alias_numeric(
+                alias_numeric_service.get_alias_numeric_from_alias(alias) - 1
+            )
+            for alias in deleted_aliases
+        ]
+
+        # Массив одним параметром: IN с тысячами параметров упирается
+        # в лимит параметров запроса.
+        update_previous_urls_stmt = update(ShortedUrl).where(
+            ShortedUrl.alias == any_(
+                bindparam("previous_aliases", previous_aliases, type_=ARRAY(String))
+            )
+        ).values(available_after=True)
+
+        await self.db.execute(update_previous_urls_stmt)
 
     async def _get_next_alias_numeric_with_lock(self) -> int:
         """Нахождение первого свободного alias_numeric и блокирование с соседями в базе.
@@ -199,6 +758,7 @@ class UrlsService:
 
         # Дефолтное значение.
         alias_numeric = 1
+        ALLOCATOR_PROBES.inc("sequential")
 
         # lock alias_numeric предыдущего
         await self._lock_by_alias_numeric(alias_numeric - 1)
@@ -222,6 +782,7 @@ class UrlsService:
 
         # Проверка на несменяемость до и после lock'a.
         while previous_shorted_url is not None:
+            ALLOCATOR_PROBES.inc("sequential")
             # lock alias_numeric ссылки с доступностью создания послее нее ссылки
             alias_numeric = alias_numeric_service.get_alias_numeric_from_alias(
                 previous_shorted_url.alias
@@ -261,10 +822,8 @@ class UrlsService:
             int: alias_numeric
 
         """
-        if not re.match(self.alias_pattern, custom_alias):
-            msg = ("custom_alias must match pattern. Len should be from 4 to 20."
-                    "Available symbols are: English symbols, digits and '-', '_' .")
-            raise ValueError(msg)
+        if not is_valid_alias(custom_alias):
+            raise ValueError(ALIAS_ERROR_MESSAGE)
 
         alias_numeric_service = get_alias_numeric_service()
         alias_numeric = alias_numeric_service.get_alias_numeric_from_alias(custom_alias)
@@ -278,21 +837,132 @@ class UrlsService:
 
         return alias_numeric
 
+    async def _get_random_alias_numeric_with_lock(self) -> int | None:
+        """Попытка взять незанятый алиас рандомно и заблокировать его с соседями.
+
+        Returns:
+            int | None: alias_numeric свободного алиаса или None, если за
+            MAX_GET_RANDOM_ALIAS_ATTEMPT_COUNT попыток свободный не нашелся.
+
+        """
+        alias_numeric_service = get_alias_numeric_service()
+
+        for attempt in range(MAX_GET_RANDOM_ALIAS_ATTEMPT_COUNT):
+            ALLOCATOR_PROBES.inc("random")
+            start_alias: str = "".join(
+                alias_numeric_service.alias_symbols[0] for _ in range(4)
+            ) # Минимум 4 символа
+
+            min_alias_numeric: int = (
+                alias_numeric_service.get_alias_numeric_from_alias(start_alias)
+            )
+
+            # Такая формула для max_alias_numeric
+            # сделает большинство первых ссылок более короткими
+            end_alias: str = "".join(
+                choice(alias_numeric_service.alias_symbols) for _ in range(
+                    len(start_alias),
+                    (
+                        len(start_alias) + 20 //
+                        (MAX_GET_RANDOM_ALIAS_ATTEMPT_COUNT - attempt)
+                    )
+                )
+            )
+            max_alias_numeric: int = (
+                alias_numeric_service.get_alias_numeric_from_alias(end_alias)
+            )
+
+            random_alias_numeric = randint(min_alias_numeric, max_alias_numeric)
+            random_alias = (
+                alias_numeric_service.get_alias_from_alias_numeric(random_alias_numeric)
+            )
+            # Служебный алиас считается занятым, блокировки не нужны.
+            if random_alias in self.reserved_aliases:
+                continue
+
+            # Блокировки попытки берутся в точке сохранения: откат к ней снимает
+            # блокировки занятого алиаса. Иначе они копились бы в случайном
+            # порядке и могли бы взаимно заблокироваться с пакетным удалением.
+            probe = await self.db.begin_nested()
+            await self._get_url_alias_numeric_with_custom_alias_with_lock(
+                random_alias
+            )
+
+            if (await self.get_shorted_url_by_alias(random_alias)) is None:
+                # Блокировки переходят в основную транзакцию.
+                await probe.commit()
+                return random_alias_numeric
+
+            await probe.rollback()
+
+        return None
+
+    async def _get_free_alias_numeric_with_lock(self) -> int:
+        """Нахождение свободного alias_numeric для ссылки без custom_alias.
+
+        Returns:
+            int: alias_numeric свободного алиаса, заблокированного с соседями.
+
+        """
+        # Если не указан custom_alias пытаемся взять незанятый алиас рандомно.
+        # Данный метод эффективен на этапе, когда очень много незанятых алиасов.
+        # И вместо того, чтобы брать по очереди 1 за другим, он берет рандомно.
+        alias_numeric = await self._get_random_alias_numeric_with_lock()
+
+        # Если все-таки рандом не удался и в базе очень много занятых алиасов =>
+        # тогда берем один за другим.
+        # Стоит не брать один за другим при малом количестве занятых, так как
+        # они выполняются с блокировкой и очередь останавливается
+        if alias_numeric is None:
+            alias_numeric = await self._get_next_alias_numeric_with_lock()
+
+        return alias_numeric
+
+    async def _get_custom_alias_numeric_with_lock(self, custom_alias: str) -> int:
+        """Блокирование custom_alias с соседями для ссылки с custom_alias.
+
+        Args:
+            custom_alias (str): Кастомный алиас.
+
+        Raises:
+            ValueError: Если custom_alias не соответствует pattern'у.
+            ValueError: Если custom_alias совпадает с путем служебного метода.
+
+        Returns:
+            int: alias_numeric кастомного алиаса, заблокированного с соседями.
+
+        """
+        # Служебный алиас занят всегда. Рандомный аллокатор проверяет его сам.
+        if custom_alias in self.reserved_aliases:
+            msg = "alias already taken"
+            raise ValueError(msg)
+
+        return await self._get_url_alias_numeric_with_custom_alias_with_lock(
+            custom_alias
+        )
+
     async def create_new_url_with_lock(
         self,
         original_url: str,
         custom_alias: str | None = None,
-        created_by_ip: str | None = None
+        created_by_ip: str | None = None,
+        expires_at: datetime | None = None,
     ) -> ShortedUrl:
         """Создание ссылки в базе с блокирование его и его соседей до коммита.
 
+        В режиме дедупликации (URL_DEDUPLICATION_ENABLED) для url без custom_alias
+        возвращается уже существующая ссылка, если этот url уже сокращался.
+
         Args:
             original_url (str): Оригинальный url.
             custom_alias (str | None, optional): Кастомный алиас. Defaults to None.
             created_by_ip (str | None, optional): IP пользователя. Defaults to None.
+            expires_at (datetime | None, optional): Время истечения ссылки.
+                Defaults to None.
 
         Raises:
             ValueError: Если оригинальный url не соотвествует своему паттерну.
+            ValueError: Если время истечения ссылки уже прошло.
             ValueError: Если алиас уже занят.
             UnexpectedException: При ошибке непредусмотренной сервером.
 
@@ -300,65 +970,32 @@ class UrlsService:
             ShortedUrl: Обьект ShortedUrl.
 
         """
-        if not re.match(self.original_url_pattern, original_url):
-            msg = ("url must match pattern. Len should be ≤ 2048"
-                    "and starts with http:// or https://")
+        if not is_valid_original_url(original_url):
+            raise ValueError(ORIGINAL_URL_ERROR_MESSAGE)
+
+        if is_expired(expires_at):
+            msg = "expires_at must be in the future"
             raise ValueError(msg)
 
+        # В режиме дедупликации ссылка без custom_alias на уже сокращенный url
+        # возвращается одним индексным запросом без выделения алиаса.
+        # Ссылки со сроком жизни не дедуплицируются: у них свой срок.
+        deduplicate = URL_DEDUPLICATION_ENABLED and custom_alias is None \
+            and expires_at is None
+        if deduplicate and (
+            existing_url := await self.get_shorted_url_by_original_url(original_url)
+        ) is not None:
+            return existing_url
+
         alias_numeric: int | None = None
 
         alias_numeric_service = get_alias_numeric_service()
 
         if custom_alias is None:
-            # Если не указан custom_alias пытаемся взять незанятый алиас рандомно.
-            # Данный метод эффективен на этапе, когда очень много незанятых алиасов.
-            # И вместо того, чтобы брать по очереди 1 за другим, он берет рандомно.
-            for attempt in range(MAX_GET_RANDOM_ALIAS_ATTEMPT_COUNT):
-                start_alias: str = "".join(
-                    alias_numeric_service.alias_symbols[0] for _ in range(4)
-                ) # Минимум 4 символа
-
-                min_alias_numeric: int = (
-                    alias_numeric_service.get_alias_numeric_from_alias(start_alias)
-                )
-
-                # Такая формула для max_alias_numeric
-                # сделает большинство первых ссылок более короткими
-                end_alias: str = "".join(
-                    choice(alias_numeric_service.alias_symbols) for _ in range(
-                        len(start_alias),
-                        (
-                            len(start_alias) + 20 //
-                            (MAX_GET_RANDOM_ALIAS_ATTEMPT_COUNT - attempt)
-                        )
-                    )
-                )
-                max_alias_numeric: int = (
-                    alias_numeric_service.get_alias_numeric_from_alias(end_alias)
-                )
-
-                random_alias_numeric = randint(min_alias_numeric, max_alias_numeric)
-                random_alias = (
-                    alias_numeric_service.get_alias_from_alias_numeric(random_alias_numeric)
-                )
-
-                await self._get_url_alias_numeric_with_custom_alias_with_lock(
-                    random_alias
-                )
-
-                if (await self.get_shorted_url_by_alias(random_alias)) is None:
-                    alias_numeric = random_alias_numeric
-                    break
-
-            # Если все-таки рандом не удался и в базе очень много занятых алиасов =>
-            # тогда берем один за другим.
-            # Стоит не брать один за другим при малом количестве занятых, так как
-            # они выполняются с блокировкой и очередь останавливается
-            if alias_numeric is None:
-                alias_numeric = await self._get_next_alias_numeric_with_lock()
+            alias_numeric = await self._get_free_alias_numeric_with_lock()
         else:
-            alias_numeric = await (
-                self._get_url_alias_numeric_with_custom_alias_with_lock(custom_alias)
+            alias_numeric = await self._get_custom_alias_numeric_with_lock(
+                custom_alias
             )
 
         alias = alias_numeric_service.get_alias_from_alias_numeric(alias_numeric)
@@ -389,15 +1026,53 @@ class UrlsService:
             original_url=original_url,
             alias=alias,
             alias_len=len(alias),
-            available_after=available_after
+            available_after=available_after,
+            expires_at=expires_at,
+            original_host=get_original_host(original_url),
         )
         self.db.add(shorted_url)
 
+        if deduplicate:
+            return await self._commit_deduplicated_url(shorted_url)
+
         await self.db.commit()
         await self.db.refresh(shorted_url)
 
         return shorted_url
 
+    async def _commit_deduplicated_url(self, shorted_url: ShortedUrl) -> ShortedUrl:
+        """Коммит ссылки, созданной в режиме дедупликации.
+
+        Args:
+            shorted_url (ShortedUrl): Добавленная в сессию ссылка.
+
+        Raises:
+            IntegrityError: Если коммит упал не из-за уже сокращенного url.
+
+        Returns:
+            ShortedUrl: Созданная ссылка или ссылка, которую на этот же url
+            параллельно создал другой запрос.
+
+        """
+        original_url = shorted_url.original_url
+        shorted_url.original_url_hash = get_original_url_hash(original_url)
+
+        try:
+            await self.db.commit()
+        except IntegrityError:
+            # Тот же url параллельно сократил другой запрос.
+            await self.db.rollback()
+            existing_url: ShortedUrl | None = (
+                await self.get_shorted_url_by_original_url(original_url)
+            )
+            if existing_url is None:
+                raise
+            return existing_url
+
+        await self.db.refresh(shorted_url)
+
+        return shorted_url
+
     async def delete_url_by_alias_numeric_with_lock(self, alias_numeric: int) -> None:
         """Безопасное удаление ссылки с lock'ом по alias_numeric.
 
@@ -430,6 +1105,162 @@ class UrlsService:
         await self.db.execute(update_url_by_alias_numeric_stmt)
         await self.db.commit()
 
+    async def delete_expired_urls_with_lock(self, batch_size: int) -> list[str]:
+        """Удаление пачки истекших ссылок.
+
+        Блокировки alias_numeric (как и при удалении одной ссылки) берутся
+        без ожидания: истекшая ссылка, соседей которой сейчас блокирует
+        другая транзакция, пропускается и будет удалена в следующий раз.
+        Поэтому фоновая задача не ждет пользовательских запросов и не может
+        взаимно заблокироваться с ними.
+
+        Args:
+            batch_size (int): Максимальное количество удаляемых ссылок.
+
+        Returns:
+            list[str]: Удаленные алиасы.
+
+        """
+        select_expired_aliases_stmt = select(ShortedUrl.alias).where(
+            ShortedUrl.expires_at <= func.now()
+        ).order_by(ShortedUrl.expires_at).limit(batch_size)
+
+        expired_aliases = list(await self.db.scalars(select_expired_aliases_stmt))
+
+        # lock alias_numeric предыдущих и текущих
+        locked_aliases = await self._try_lock_aliases_with_previous(expired_aliases)
+
+        if not locked_aliases:
+            await self.db.rollback()
+            return []
+
+        # Условие повторяется: срок ссылки могли продлить до взятия блокировок.
+        delete_expired_urls_stmt = delete(ShortedUrl).where(
+            ShortedUrl.alias == any_(
+                bindparam("aliases", locked_aliases, type_=ARRAY(String))
+            ),
+            ShortedUrl.expires_at <= func.now(),
+        ).returning(ShortedUrl.alias)
+
+        deleted_aliases = list(await self.db.scalars(delete_expired_urls_stmt))
+        await self._mark_previous_urls_available(deleted_aliases)
+        await self.db.commit()
+
+        return deleted_aliases
+
+    async def delete_urls_by_aliases_with_lock(
+        self,
+        aliases: Iterable[str],
+        on_batch_deleted: Callable[[list[str]], Awaitable[None]] | None = None,
+    ) -> tuple[list[str], list[str]]:
+        """Удаление ссылок по списку алиасов пачками по BULK_DELETE_BATCH_SIZE.
+
+        Каждая пачка удаляется в своей транзакции, поэтому одна транзакция
+        держит не больше 2 * BULK_DELETE_BATCH_SIZE блокировок alias_numeric.
+        Пачка, прерванная Postgres из-за взаимной блокировки (например,
+        с последовательным аллокатором, блокирующим не по возрастанию),
+        повторяется до MAX_DEADLOCK_RETRY_COUNT раз. Пачка, которую удалить
+        не удалось, не прерывает удаление остальных: ее алиасы возвращаются
+        как неудаленные, а уже закоммиченные пачки остаются удаленными.
+
+        Args:
+            aliases (Iterable[str]): Алиасы ссылок.
+            on_batch_deleted (Callable | None, optional): Вызывается с алиасами
+                каждой пачки сразу после ее коммита (например, для очистки
+                кэшей). Defaults to None.
+
+        Returns:
+            tuple[list[str], list[str]]: Удаленные алиасы и алиасы пачек,
+            которые удалить не удалось.
+
+        """
+        # Некорректные алиасы не могут существовать.
+        valid_aliases = sorted({alias for alias in aliases if is_valid_alias(alias)})
+
+        deleted_aliases: list[str] = []
+        failed_aliases: list[str] = []
+        for batch_start in range(0, len(valid_aliases), BULK_DELETE_BATCH_SIZE):
+            batch_aliases = valid_aliases[
+                batch_start:batch_start + BULK_DELETE_BATCH_SIZE
+            ]
+            batch_deleted_aliases = await self._delete_urls_batch_with_retry(
+                batch_aliases
+            )
+            if batch_deleted_aliases is None:
+                failed_aliases += batch_aliases
+                continue
+
+            deleted_aliases += batch_deleted_aliases
+            if on_batch_deleted is not None:
+                await on_batch_deleted(batch_deleted_aliases)
+
+        return deleted_aliases, failed_aliases
+
+    async def _delete_urls_batch_with_retry(
+        self,
+        aliases: list[str]
+    ) -> list[str] | None:
+        """Удаление пачки ссылок с повтором при взаимной блокировке.
+
+        Args:
+            aliases (list[str]): Корректные алиасы ссылок.
+
+        Returns:
+            list[str] | None: Удаленные алиасы или None, если пачку удалить
+            не удалось.
+
+        """
+        for attempt in range(MAX_DEADLOCK_RETRY_COUNT + 1):
+            try:
+                return await self._delete_urls_batch_with_lock(aliases)
+            except DBAPIError as e:
+                await self.db.rollback()
+                if getattr(e.orig, "sqlstate", None) == DEADLOCK_DETECTED_SQLSTATE \
+                        and attempt < MAX_DEADLOCK_RETRY_COUNT:
+                    continue
+                logger.exception("Failed to delete batch of %d urls", len(aliases))
+                return None
+
+        return None
+
+    async def _delete_urls_batch_with_lock(self, aliases: list[str]) -> list[str]:
+        """Удаление пачки ссылок в одной транзакции.
+
+        Блокировки alias_numeric удаляемых и предыдущих алиасов берутся одним
+        запросом в порядке возрастания, затем ссылки удаляются одним DELETE,
+        а предыдущие ссылки помечаются available_after одним UPDATE.
+
+        Args:
+            aliases (list[str]): Корректные алиасы ссылок.
+
+        Returns:
+            list[str]: Удаленные алиасы.
+
+        """
+        alias_numeric_service = get_alias_numeric_service()
+        alias_numerics = [
+            alias_numeric_service.get_alias_numeric_from_alias(alias)
+            for alias in aliases
+        ]
+        # lock alias_numeric предыдущих и текущих
+        await self._lock_by_alias_numerics(
+            lock_alias_numeric
+            for alias_numeric in alias_numerics
+            for lock_alias_numeric in (alias_numeric - 1, alias_numeric)
+        )
+
+        delete_urls_stmt = delete(ShortedUrl).where(
+            ShortedUrl.alias == any_(
+                bindparam("aliases", aliases, type_=ARRAY(String))
+            )
+        ).returning(ShortedUrl.alias)
+
+        deleted_aliases = list(await self.db.scalars(delete_urls_stmt))
+        await self._mark_previous_urls_available(deleted_aliases)
+        await self.db.commit()
+
+        return deleted_aliases
+
     async def delete_url_by_alias_with_lock(self, alias: str) -> None:
         """Безопасное удаление ссылки с lock'ом по alias.
 
@@ -443,19 +1274,140 @@ class UrlsService:
 
         await self.delete_url_by_alias_numeric_with_lock(alias_numeric)
 
-    async def add_click_to_shorted_url(self, shorted_url: ShortedUrl) -> None:
+    async def add_click_to_shorted_url(self, shorted_url_id: int) -> None:
         """Добавление клика к общему количеству кликов ShortedUrl.
 
+        Выполняется одним UPDATE по id, без загрузки ORM объекта,
+        поэтому работает и для редиректов из кэша.
+
         Args:
-            shorted_url (ShortedUrl): Сокращенная ссылка.
+            shorted_url_id (int): id сокращенной ссылки.
 
         """
-        # В случае использования Postgresql атомарность запросов не нужна,
-        # так как он сам будет блокировать.
-        shorted_url.clicks += 1
+        # Атомарный инкремент на стороне Postgresql.
+        # По last_clicked_at ссылки переносятся в холодную партицию.
+        await self.db.execute(
+            update(ShortedUrl)
+            .where(ShortedUrl.id == shorted_url_id)
+            .values(clicks=ShortedUrl.clicks + 1, last_clicked_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
 
         await self.db.commit()
-        await self.db.refresh(shorted_url)
+
+
+def is_expired(expires_at: datetime | None) -> bool:
+    """Проверка истечения срока жизни ссылки.
+
+    Args:
+        expires_at (datetime | None): Время истечения ссылки
+            (None - ссылка бессрочная).
+
+    Returns:
+        bool: True, если время истечения уже прошло.
+
+    """
+    if expires_at is None:
+        return False
+
+    if expires_at.tzinfo is None:
+        return expires_at <= datetime.now()
+
+    return expires_at <= datetime.now(UTC)
+
+def get_original_url_hash(original_url: str) -> bytes:
+    """Получение хеша фиксированного размера от оригинального url.
+
+    Args:
+        original_url (str): Оригинальный url.
+
+    Returns:
+        bytes: sha256 от original_url (32 байта).
+
+    """
+    return hashlib.sha256(original_url.encode()).digest()
+
+def normalize_host(host: str) -> str:
+    """Нормализация хоста: нижний регистр, без конечной точки и www.
+
+    Args:
+        host (str): Хост.
+
+    Returns:
+        str: Нормализованный хост.
+
+    """
+    host = host.lower().rstrip(".")
+    return host.removeprefix("www.")
+
+def get_original_host(original_url: str) -> str | None:
+    """Получение нормализованного хоста оригинального url.
+
+    Args:
+        original_url (str): Оригинальный url.
+
+    Returns:
+        str | None: Хост или None, если его нет в url.
+
+    """
+    try:
+        host = urlsplit(original_url).hostname
+    except ValueError:
+        return None
+
+    if not host:
+        return None
+
+    return normalize_host(host) or None
+
+def encode_created_at_cursor(created_at: datetime, shorted_url_id: int) -> str:
+    """Кодирование курсора keyset пагинации по (created_at, id).
+
+    Args:
+        created_at (datetime): Время создания последней ссылки страницы.
+        shorted_url_id (int): id последней ссылки страницы.
+
+    Returns:
+        str: Курсор, безопасный для query параметра.
+
+    """
+    return base64.urlsafe_b64encode(
+        f"{created_at.isoformat()}|{shorted_url_id}".encode()
+    ).decode()
+
+def decode_created_at_cursor(cursor: str) -> tuple[datetime, int]:
+    """Декодирование курсора keyset пагинации по (created_at, id).
+
+    Args:
+        cursor (str): Курсор из encode_created_at_cursor.
+
+    Raises:
+        ValueError: Если курсор некорректен.
+
+    Returns:
+        tuple[datetime, int]: (created_at, id) последней ссылки страницы.
+
+    """
+    try:
+        created_at, shorted_url_id = base64.urlsafe_b64decode(
+            cursor.encode()
+        ).decode().split("|")
+        return datetime.fromisoformat(created_at), int(shorted_url_id)
+    except ValueError as e:
+        msg = "invalid cursor"
+        raise ValueError(msg) from e
+
+def escape_like(value: str) -> str:
+    """Экранирование спецсимволов LIKE (escape символ - обратный слэш).
+
+    Args:
+        value (str): Подстрока поиска.
+
+    Returns:
+        str: Подстрока, в которой % и _ ищутся как есть.
+
+    """
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
 
 @lru_cache
 def get_alias_numeric_service() -> AliasNumericService:
@@ -0,0 +1,543 @@
+"""Модуль общего кэша редиректов (второй уровень после кэша воркера).
+
+Кэш хранится на Redis совместимом сервере и общий для всех воркеров
+и контейнеров: ссылку, уже прочитанную одним воркером, остальные берут
+из него, а не из базы. Клиент говорит на RESP (протокол Redis) сам,
+без отдельной зависимости: нужны только GET и SET.
+
+Удаленная ссылка не удаляется из кэша, а заменяется надгробием на
+SHARED_CACHE_TOMBSTONE_TTL_SECONDS. Запись, прочитанная из базы до удаления,
+пишется в кэш только через SET NX и не может перезаписать надгробие,
+поэтому удаленная ссылка не вернется в кэш после параллельного удаления.
+
+Общий кэш не обязателен для редиректа: любая ошибка или таймаут
+означают промах, и редирект берется из базы.
+"""
+import asyncio
+import json
+import logging
+import time
+from collections.abc import Iterable
+from datetime import UTC, datetime
+from functools import lru_cache
+from urllib.parse import unquote, urlsplit
+
+from core.cache import CachedRedirect
+from core.config import (
+    SHARED_CACHE_KEY_PREFIX,
+    SHARED_CACHE_MAX_CONNECTIONS,
+    SHARED_CACHE_RETRY_SECONDS,
+    SHARED_CACHE_TIMEOUT_SECONDS,
+    SHARED_CACHE_TOMBSTONE_TTL_SECONDS,
+    SHARED_CACHE_TTL_SECONDS,
+    SHARED_CACHE_URL,
+)
+
+logger = logging.getLogger(__name__)
+
+RespValue = bytes | int | list["RespValue"] | None
+RespCommand = tuple[str | bytes | int, ...]
+
+# Значение удаленной ссылки в общем кэше (не JSON, поэтому не редирект).
+TOMBSTONE = b"-"
+
+
+class RespError(Exception):
+    """Ответ сервера с ошибкой (-ERR ...)."""
+
+
+class RespConnection:
+    """Одно подключение к серверу по протоколу RESP."""
+
+    def __init__(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter
+    ) -> None:
+        """Инициализация подключения.
+
+        Args:
+            reader (asyncio.StreamReader): Поток чтения.
+            writer (asyncio.StreamWriter): Поток записи.
+
+        """
+        self.reader = reader
+        self.writer = writer
+
+    async def execute(self, *args: str | bytes | int) -> RespValue:
+        """Выполнение команды.
+
+        Args:
+            *args (str | bytes | int): Команда и ее аргументы.
+
+        Raises:
+            RespError: Если сервер ответил ошибкой.
+
+        Returns:
+            RespValue: Ответ сервера.
+
+        """
+        return (await self.execute_pipeline([args]))[0]
+
+    async def execute_pipeline(self, commands: list[RespCommand]) -> list[RespValue]:
+        """Выполнение нескольких команд за один обмен с сервером.
+
+        Ответы читаются все, даже после ответа с ошибкой, чтобы в подключении
+        не остался непрочитанный ответ.
+
+        Args:
+            commands (list[RespCommand]): Команды с аргументами.
+
+        Raises:
+            RespError: Если сервер ответил ошибкой хотя бы на одну команду.
+
+        Returns:
+            list[RespValue]: Ответы сервера в порядке команд.
+
+        """
+        self.writer.write(b"".join(encode_command(*args) for args in commands))
+        await self.writer.drain()
+
+        replies: list[RespValue] = []
+        error: RespError | None = None
+        for _ in commands:
+            try:
+                replies.append(await self._read_reply())
+            except RespError as exc:
+                error = error or exc
+                replies.append(None)
+        if error is not None:
+            raise error
+
+        return replies
+
+    async def _read_reply(self) -> RespValue:
+        """Чтение одного ответа сервера."""
+        line = await self.reader.readuntil(b"\r\n")
+        prefix, payload = line[:1], line[1:-2]
+
+        if prefix == b"+":
+            return payload
+        if prefix == b"-":
+            raise RespError(payload.decode(errors="replace"))
+        if prefix == b":":
+            return int(payload)
+        if prefix == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            return (await self.reader.readexactly(length + 2))[:-2]
+        if prefix == b"*":
+            length = int(payload)
+            if length < 0:
+                return None
+            return [await self._read_reply() for _ in range(length)]
+
+        msg = f"Unexpected RESP reply: {line!r}"
+        raise ConnectionError(msg)
+
+    def close(self) -> None:
+        """Закрытие подключения."""
+        self.writer.close()
+
+
+def encode_command(*args: str | bytes | int) -> bytes:
+    """Кодирование команды массивом bulk строк RESP.
+
+    Args:
+        *args (str | bytes | int): Команда и ее аргументы.
+
+    Returns:
+        bytes: Команда в формате RESP.
+
+    """
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        data = arg if isinstance(arg, bytes) else str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+
+    return b"".join(parts)
+
+
+class RespClient:
+    """Клиент Redis совместимого сервера с пулом подключений."""
+
+    def __init__(self, url: str, max_connections: int) -> None:
+        """Инициализация клиента (подключения открываются при первой команде).
+
+        Args:
+            url (str): Адрес сервера: redis://[:password@]host:port/db.
+            max_connections (int): Максимум одновременных подключений.
+
+        """
+        parsed_url = urlsplit(url)
+        self.host = parsed_url.hostname or "127.0.0.1"
+        self.port = parsed_url.port or 6379
+        self.password = unquote(parsed_url.password) if parsed_url.password else None
+        self.db = int(parsed_url.path.lstrip("/") or 0)
+        self.semaphore = asyncio.Semaphore(max_connections)
+        self.idle_connections: list[RespConnection] = []
+
+    async def _connect(self) -> RespConnection:
+        """Открытие подключения с авторизацией и выбором базы."""
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        connection = RespConnection(reader, writer)
+        try:
+            if self.password is not None:
+                await connection.execute("AUTH", self.password)
+            if self.db:
+                await connection.execute("SELECT", self.db)
+        except BaseException:
+            connection.close()
+            raise
+
+        return connection
+
+    async def execute(self, *args: str | bytes | int) -> RespValue:
+        """Выполнение команды на свободном подключении из пула.
+
+        Args:
+            *args (str | bytes | int): Команда и ее аргументы.
+
+        Returns:
+            RespValue: Ответ сервера.
+
+        """
+        return (await self.execute_pipeline([args]))[0]
+
+    async def execute_pipeline(self, commands: list[RespCommand]) -> list[RespValue]:
+        """Выполнение нескольких команд на свободном подключении из пула.
+
+        Подключение, на котором команды оборвались (в том числе по таймауту),
+        закрывается: в нем может остаться непрочитанный ответ.
+
+        Args:
+            commands (list[RespCommand]): Команды с аргументами.
+
+        Returns:
+            list[RespValue]: Ответы сервера в порядке команд.
+
+        """
+        async with self.semaphore:
+            connection = (self.idle_connections.pop() if self.idle_connections
+                          else await self._connect())
+            try:
+                replies = await connection.execute_pipeline(commands)
+            except RespError:
+                self.idle_connections.append(connection)
+                raise
+            except BaseException:
+                connection.close()
+                raise
+
+            self.idle_connections.append(connection)
+            return replies
+
+    def close(self) -> None:
+        """Закрытие свободных подключений."""
+        while self.idle_connections:
+            self.idle_connections.pop().close()
+
+
+class SharedRedirectCache:
+    """Базовый класс общего кэша редиректов (всегда промах)."""
+
+    async def get(self, alias: str) -> CachedRedirect | None:  # noqa: ARG002
+        """Получение редиректа из общего кэша.
+
+        Args:
+            alias (str): alias ссылки.
+
+        Returns:
+            CachedRedirect | None: Редирект или None при промахе.
+
+        """
+        return None
+
+    async def is_deleted(self, alias: str) -> bool:  # noqa: ARG002
+        """Проверка надгробия удаленной ссылки в общем кэше.
+
+        Args:
+            alias (str): alias ссылки.
+
+        Returns:
+            bool: True, если ссылка недавно удалена.
+
+        """
+        return False
+
+    async def set(self, alias: str, cached_redirect: CachedRedirect) -> None:
+        """Запись редиректа в общий кэш.
+
+        Args:
+            alias (str): alias ссылки.
+            cached_redirect (CachedRedirect): Редирект.
+
+        """
+
+    async def set_if_absent(self, alias: str, cached_redirect: CachedRedirect) -> None:
+        """Запись прочитанного из базы редиректа, если ключа нет в общем кэше.
+
+        Args:
+            alias (str): alias ссылки.
+            cached_redirect (CachedRedirect): Редирект.
+
+        """
+
+    async def delete(self, aliases: Iterable[str]) -> None:
+        """Удаление редиректов из общего кэша.
+
+        Args:
+            aliases (Iterable[str]): Алиасы удаленных ссылок.
+
+        """
+
+    async def close(self) -> None:
+        """Закрытие подключений к общему кэшу."""
+
+
+class RespSharedRedirectCache(SharedRedirectCache):
+    """Общий кэш редиректов на Redis совместимом сервере.
+
+    После ошибки или таймаута кэш на SHARED_CACHE_RETRY_SECONDS перестает
+    опрашиваться при чтении и записи, чтобы недоступный сервер не добавлял
+    таймаут к каждому редиректу. Удаление пытается всегда: пропущенное
+    удаление оставило бы удаленную ссылку в кэше до истечения TTL.
+
+    Удаление пишет надгробие, а set_if_absent (заполнение из базы) не пишет
+    поверх существующего ключа: чтение из базы, начатое до удаления,
+    не вернет удаленную ссылку в кэш. set (создание ссылки) перезаписывает
+    надгробие, так как алиас снова занят.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        client: RespClient,
+        timeout: float,
+        ttl_seconds: int,
+        retry_seconds: float,
+        key_prefix: str = "redirect:",
+        tombstone_ttl_seconds: int = 60,
+    ) -> None:
+        """Инициализация общего кэша.
+
+        Args:
+            client (RespClient): Клиент сервера.
+            timeout (float): Таймаут одной операции в секундах.
+            ttl_seconds (int): Время жизни записи.
+            retry_seconds (float): Пауза после ошибки.
+            key_prefix (str, optional): Префикс ключей. Defaults to "redirect:".
+            tombstone_ttl_seconds (int, optional): Время жизни надгробия
+                удаленной ссылки. Defaults to 60.
+
+        """
+        self.client = client
+        self.timeout = timeout
+        self.ttl_seconds = ttl_seconds
+        self.retry_seconds = retry_seconds
+        self.key_prefix = key_prefix
+        self.tombstone_ttl_seconds = tombstone_ttl_seconds
+        self.unavailable_until = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _is_available(self) -> bool:
+        """Проверка того, что после последней ошибки прошла пауза."""
+        return time.monotonic() >= self.unavailable_until
+
+    async def _execute(self, *args: str | bytes | int) -> tuple[bool, RespValue]:
+        """Выполнение команды с таймаутом (ошибки только логируются).
+
+        Returns:
+            tuple[bool, RespValue]: Успех выполнения и ответ сервера.
+
+        """
+        is_executed, replies = await self._execute_pipeline([args])
+        return is_executed, replies[0] if is_executed else None
+
+    async def _execute_pipeline(
+        self,
+        commands: list[RespCommand]
+    ) -> tuple[bool, list[RespValue]]:
+        """Выполнение нескольких команд с таймаутом (ошибки только логируются).
+
+        Returns:
+            tuple[bool, list[RespValue]]: Успех выполнения и ответы сервера.
+
+        """
+        try:
+            async with asyncio.timeout(self.timeout):
+                return True, await self.client.execute_pipeline(commands)
+        except (TimeoutError, OSError, RespError, ValueError,
+                asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            self.errors += 1
+            self.unavailable_until = time.monotonic() + self.retry_seconds
+            logger.warning("Shared cache %s failed", commands[0][0], exc_info=True)
+            return False, []
+
+    async def get(self, alias: str) -> CachedRedirect | None:
+        """Получение редиректа из общего кэша.
+
+        Args:
+            alias (str): alias ссылки.
+
+        Returns:
+            CachedRedirect | None: Редирект или None при промахе или ошибке.
+
+        """
+        if not self._is_available():
+            return None
+
+        is_executed, reply = await self._execute("GET", self.key_prefix + alias)
+        if not is_executed:
+            return None
+
+        cached_redirect = (decode_cached_redirect(reply)
+                           if isinstance(reply, bytes) and reply != TOMBSTONE
+                           else None)
+        if cached_redirect is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return cached_redirect
+
+    async def is_deleted(self, alias: str) -> bool:
+        """Проверка надгробия удаленной ссылки в общем кэше.
+
+        Args:
+            alias (str): alias ссылки.
+
+        Returns:
+            bool: True, если ссылка недавно удалена. При ошибке - False:
+            запись кэша воркера остается до своего TTL.
+
+        """
+        if not self._is_available():
+            return False
+
+        is_executed, reply = await self._execute("GET", self.key_prefix + alias)
+        return is_executed and reply == TOMBSTONE
+
+    async def set(self, alias: str, cached_redirect: CachedRedirect) -> None:
+        """Запись редиректа в общий кэш (не дольше срока жизни ссылки).
+
+        Args:
+            alias (str): alias ссылки.
+            cached_redirect (CachedRedirect): Редирект.
+
+        """
+        await self._set(alias, cached_redirect)
+
+    async def set_if_absent(self, alias: str, cached_redirect: CachedRedirect) -> None:
+        """Запись прочитанного из базы редиректа, если ключа (и надгробия) нет.
+
+        Args:
+            alias (str): alias ссылки.
+            cached_redirect (CachedRedirect): Редирект.
+
+        """
+        await self._set(alias, cached_redirect, "NX")
+
+    async def _set(
+        self,
+        alias: str,
+        cached_redirect: CachedRedirect,
+        *options: str
+    ) -> None:
+        """Запись редиректа с TTL не дольше срока жизни ссылки."""
+        if not self._is_available():
+            return
+
+        ttl_seconds = self.ttl_seconds
+        if cached_redirect.expires_at is not None:
+            ttl_seconds = min(ttl_seconds, int(
+                (cached_redirect.expires_at - datetime.now(UTC)).total_seconds()
+            ))
+        if ttl_seconds <= 0:
+            return
+
+        await self._execute("SET", self.key_prefix + alias,
+                            encode_cached_redirect(cached_redirect), "EX", ttl_seconds,
+                            *options)
+
+    async def delete(self, aliases: Iterable[str]) -> None:
+        """Замена редиректов надгробиями в общем кэше.
+
+        Args:
+            aliases (Iterable[str]): Алиасы удаленных ссылок.
+
+        """
+        commands: list[RespCommand] = [
+            ("SET", self.key_prefix + alias, TOMBSTONE,
+             "EX", self.tombstone_ttl_seconds)
+            for alias in aliases
+        ]
+        if commands:
+            await self._execute_pipeline(commands)
+
+    async def close(self) -> None:
+        """Закрытие подключений к общему кэшу."""
+        self.client.close()
+
+
+def encode_cached_redirect(cached_redirect: CachedRedirect) -> bytes:
+    """Сериализация редиректа для общего кэша.
+
+    Args:
+        cached_redirect (CachedRedirect): Редирект.
+
+    Returns:
+        bytes: JSON массив [id, original_url, expires_at].
+
+    """
+    expires_at = cached_redirect.expires_at
+    return json.dumps([
+        cached_redirect.shorted_url_id,
+        cached_redirect.original_url,
+        expires_at.isoformat() if expires_at is not None else None,
+    ]).encode()
+
+
+def decode_cached_redirect(data: bytes) -> CachedRedirect | None:
+    """Десериализация редиректа из общего кэша.
+
+    Args:
+        data (bytes): JSON массив [id, original_url, expires_at].
+
+    Returns:
+        CachedRedirect | None: Редирект или None, если запись повреждена.
+
+    """
+    try:
+        shorted_url_id, original_url, expires_at = json.loads(data)
+        return CachedRedirect(
+            int(shorted_url_id),
+            str(original_url),
+            datetime.fromisoformat(expires_at) if expires_at is not None else None,
+        )
+    except (TypeError, ValueError):
+        return None
+
+
+@lru_cache
+def get_shared_redirect_cache() -> SharedRedirectCache:
+    """Получение общего кэша редиректов.
+
+    Returns:
+        SharedRedirectCache: RespSharedRedirectCache, если задан SHARED_CACHE_URL,
+        иначе всегда промахивающийся SharedRedirectCache.
+
+    """
+    if not SHARED_CACHE_URL:
+        return SharedRedirectCache()
+
+    return RespSharedRedirectCache(
+        RespClient(SHARED_CACHE_URL, SHARED_CACHE_MAX_CONNECTIONS),
+        SHARED_CACHE_TIMEOUT_SECONDS,
+        SHARED_CACHE_TTL_SECONDS,
+        SHARED_CACHE_RETRY_SECONDS,
+        SHARED_CACHE_KEY_PREFIX,
+        SHARED_CACHE_TOMBSTONE_TTL_SECONDS,
+    )
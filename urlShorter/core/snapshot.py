@@ -0,0 +1,578 @@
+"""Модуль read-only снимка редиректов для edge-воркеров.
+
+Снимок - это файл, который компилируется из таблицы shorted_urls и затем
+отображается в память (mmap) каждым воркером. Все воркеры делят одну копию
+страниц в page cache, а поиск по алиасу не создает python-объектов на каждую
+запись таблицы.
+
+Формат файла снимка:
+    header: magic (8 байт), count (u64), created_at (u64, unix-время).
+    keys: count * 16 байт - alias_numeric в big-endian (u128), по возрастанию.
+    offsets: (count + 1) * u64 - смещения url'ов в blob'е.
+    expires: count * u64 - время истечения ссылок (unix-время, 0 - бессрочная).
+    ids: count * u64 - id ссылок (для аналитики переходов).
+    blob: оригинальные url'ы в utf-8 подряд.
+
+Дельта-лог - небольшой JSON Lines файл вида ["alias", "url", expires_at, id]
+(ссылка создана или изменена, expires_at - unix-время или null) или
+["alias", null] (ссылка удалена), который накладывается поверх снимка.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import mmap
+import os
+import re
+import shutil
+import struct
+import tempfile
+import time
+from datetime import UTC, datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import BinaryIO, NamedTuple
+
+from sqlalchemy import Select, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import (
+    REDIRECT_SNAPSHOT_DELTA_PATH,
+    REDIRECT_SNAPSHOT_PATH,
+    REDIRECT_SNAPSHOT_REFRESH_SECONDS,
+)
+from core.services import get_alias_numeric_service
+from database import database
+from database.models import ShortedUrl
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b"URLSNAP3"
+# magic, count, created_at
+SNAPSHOT_HEADER = struct.Struct("<8sQQ")
+# Размер ключа: alias до 20 символов в 64-ричной системе помещается в u128.
+SNAPSHOT_KEY_SIZE = 16
+SNAPSHOT_OFFSET = struct.Struct("<Q")
+SNAPSHOT_OFFSETS_PAIR = struct.Struct("<QQ")
+SNAPSHOT_EXPIRES = struct.Struct("<Q")
+SNAPSHOT_ID = struct.Struct("<Q")
+# Количество строк, получаемых из базы за один раз при компиляции.
+SNAPSHOT_COMPILE_BATCH_SIZE = 10_000
+
+# Алиасы с другими символами не могут быть в снимке, а AliasNumericService
+# переведет их в неверный alias_numeric.
+SNAPSHOT_ALIAS_PATTERN = re.compile(r"[-_0-9a-zA-Z]{1,20}")
+
+
+class SnapshotRedirect(NamedTuple):
+    """Редирект из снимка или дельта-лога."""
+
+    original_url: str
+    expires_at: datetime | None
+    # None - запись дельта-лога старого формата без id.
+    shorted_url_id: int | None
+
+
+def _alias_to_key(alias: str) -> bytes:
+    """Перевод alias'а в ключ снимка.
+
+    Args:
+        alias (str): Алиас.
+
+    Returns:
+        bytes: alias_numeric в виде big-endian u128.
+
+    """
+    alias_numeric = get_alias_numeric_service().get_alias_numeric_from_alias(alias)
+    return alias_numeric.to_bytes(SNAPSHOT_KEY_SIZE, "big")
+
+
+def _key_to_alias(key: bytes) -> str:
+    """Перевод ключа снимка обратно в alias.
+
+    Args:
+        key (bytes): alias_numeric в виде big-endian u128.
+
+    Returns:
+        str: Алиас.
+
+    """
+    return get_alias_numeric_service().get_alias_from_alias_numeric(
+        int.from_bytes(key, "big")
+    )
+
+
+def _to_unix_time(expires_at: datetime | None) -> int | None:
+    """Перевод времени истечения ссылки в unix-время (с округлением вниз)."""
+    return int(expires_at.timestamp()) if expires_at is not None else None
+
+
+def _from_unix_time(expires_at: int | None) -> datetime | None:
+    """Перевод unix-времени истечения ссылки обратно в datetime."""
+    return datetime.fromtimestamp(expires_at, UTC) if expires_at else None
+
+
+def _replace_atomically(tmp_file: BinaryIO, path: Path) -> None:
+    """Сброс временного файла на диск и атомарная подмена им файла path.
+
+    Читатели, которые уже отобразили старый файл в память, продолжают
+    работать со старой копией до своего обновления.
+
+    Args:
+        tmp_file (BinaryIO): Открытый временный файл в той же директории.
+        path (Path): Итоговый путь.
+
+    """
+    tmp_file.flush()
+    # NamedTemporaryFile создается с правами 0600, а читают снимок все воркеры.
+    os.fchmod(tmp_file.fileno(), 0o644)
+    os.fsync(tmp_file.fileno())
+    tmp_file.close()
+    Path(tmp_file.name).replace(path)
+
+
+def _select_snapshot_urls_stmt() -> Select[tuple[str, str, datetime | None, int]]:
+    """Запрос неистекших ссылок в порядке alias_numeric.
+
+    Порядок alias_numeric совпадает с (alias_len, alias в C-collation).
+
+    Returns:
+        Select[tuple[str, str, datetime | None, int]]: Запрос
+        (alias, original_url, expires_at, id).
+
+    """
+    return select(ShortedUrl.alias, ShortedUrl.original_url, ShortedUrl.expires_at,
+                  ShortedUrl.id) \
+        .where(or_(ShortedUrl.expires_at.is_(None),
+                   ShortedUrl.expires_at > func.now())) \
+        .order_by(ShortedUrl.alias_len, ShortedUrl.alias.collate("C")) \
+        .execution_options(yield_per=SNAPSHOT_COMPILE_BATCH_SIZE)
+
+
+async def compile_redirect_snapshot(db: AsyncSession, path: str | Path) -> int:
+    """Компиляция снимка редиректов из таблицы shorted_urls.
+
+    Строки читаются потоком сразу в порядке alias_numeric, поэтому сортировка
+    в python не нужна. Истекшие ссылки в снимок не попадают.
+
+    Args:
+        db (AsyncSession): Сессия базы данных.
+        path (str | Path): Путь, по которому будет записан снимок.
+
+    Raises:
+        ValueError: Если база вернула алиасы не в порядке alias_numeric.
+
+    Returns:
+        int: Количество ссылок в снимке.
+
+    """
+    path = Path(path)
+    created_at = int(time.time())
+
+    select_aliases_stmt = _select_snapshot_urls_stmt()
+
+    count = 0
+    blob_len = 0
+    previous_key = b""
+
+    with tempfile.TemporaryFile() as keys_file, \
+            tempfile.TemporaryFile() as offsets_file, \
+            tempfile.TemporaryFile() as expires_file, \
+            tempfile.TemporaryFile() as ids_file, \
+            tempfile.TemporaryFile() as blob_file:
+        offsets_file.write(SNAPSHOT_OFFSET.pack(0))
+
+        async for alias, original_url, expires_at, shorted_url_id in await db.stream(
+            select_aliases_stmt
+        ):
+            key = _alias_to_key(alias)
+            if key <= previous_key:
+                msg = f"aliases are not sorted by alias_numeric near {alias!r}"
+                raise ValueError(msg)
+            previous_key = key
+
+            encoded_url = original_url.encode()
+            blob_len += len(encoded_url)
+
+            keys_file.write(key)
+            offsets_file.write(SNAPSHOT_OFFSET.pack(blob_len))
+            expires_file.write(SNAPSHOT_EXPIRES.pack(_to_unix_time(expires_at) or 0))
+            ids_file.write(SNAPSHOT_ID.pack(shorted_url_id))
+            blob_file.write(encoded_url)
+            count += 1
+
+        tmp_file = tempfile.NamedTemporaryFile(  # noqa: SIM115
+            dir=path.parent, prefix=f".{path.name}.", delete=False
+        )
+        try:
+            tmp_file.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, count, created_at))
+            for part_file in (keys_file, offsets_file, expires_file, ids_file,
+                              blob_file):
+                part_file.seek(0)
+                shutil.copyfileobj(part_file, tmp_file)
+            _replace_atomically(tmp_file, path)
+        except BaseException:
+            tmp_file.close()
+            Path(tmp_file.name).unlink(missing_ok=True)
+            raise
+
+    return count
+
+
+async def compile_redirect_snapshot_delta(
+    db: AsyncSession,
+    snapshot_path: str | Path,
+    delta_path: str | Path,
+) -> int:
+    """Компиляция дельта-лога между снимком и текущим состоянием базы.
+
+    Снимок и база проходятся одновременно слиянием двух отсортированных
+    потоков, поэтому дельта получается без загрузки таблицы в память.
+
+    Args:
+        db (AsyncSession): Сессия базы данных.
+        snapshot_path (str | Path): Путь до снимка, относительно которого
+            считается дельта.
+        delta_path (str | Path): Путь, по которому будет записан дельта-лог.
+
+    Returns:
+        int: Количество записей в дельта-логе.
+
+    """
+    delta_path = Path(delta_path)
+    snapshot = RedirectSnapshot(snapshot_path)
+
+    select_aliases_stmt = _select_snapshot_urls_stmt()
+
+    entries: list[tuple[str, str, int | None, int] | tuple[str, None]] = []
+    position = 0
+
+    async for alias, original_url, expires_at, shorted_url_id in await db.stream(
+        select_aliases_stmt
+    ):
+        key = _alias_to_key(alias)
+        unix_expires_at = _to_unix_time(expires_at)
+
+        # Все ссылки снимка меньше текущей - удалены из базы.
+        while position < snapshot.count and snapshot.key_at(position) < key:
+            entries.append((_key_to_alias(snapshot.key_at(position)), None))
+            position += 1
+
+        # Алиас, пересозданный после компиляции снимка, получает новый id.
+        if position < snapshot.count and snapshot.key_at(position) == key:
+            if snapshot.url_at(position) != original_url \
+                    or snapshot.expires_at(position) != unix_expires_at \
+                    or snapshot.id_at(position) != shorted_url_id:
+                entries.append((alias, original_url, unix_expires_at, shorted_url_id))
+            position += 1
+        else:
+            entries.append((alias, original_url, unix_expires_at, shorted_url_id))
+
+    while position < snapshot.count:
+        entries.append((_key_to_alias(snapshot.key_at(position)), None))
+        position += 1
+
+    snapshot.close()
+
+    tmp_file = tempfile.NamedTemporaryFile(  # noqa: SIM115
+        dir=delta_path.parent, prefix=f".{delta_path.name}.", delete=False
+    )
+    try:
+        for entry in entries:
+            tmp_file.write(json.dumps(entry).encode() + b"\n")
+        _replace_atomically(tmp_file, delta_path)
+    except BaseException:
+        tmp_file.close()
+        Path(tmp_file.name).unlink(missing_ok=True)
+        raise
+
+    return len(entries)
+
+
+class RedirectSnapshot:
+    """Read-only снимок редиректов, отображенный в память."""
+
+    def __init__(
+        self,
+        path: str | Path,
+        delta_path: str | Path | None = None,
+        refresh_seconds: float = 0,
+    ) -> None:
+        """Открытие снимка и дельта-лога.
+
+        Args:
+            path (str | Path): Путь до снимка.
+            delta_path (str | Path | None, optional): Путь до дельта-лога.
+                Defaults to None.
+            refresh_seconds (float, optional): Как часто проверять, что снимок
+                или дельта-лог были перекомпилированы. 0 - не проверять.
+                Defaults to 0.
+
+        """
+        self.path = Path(path)
+        self.delta_path = Path(delta_path) if delta_path else None
+        self.refresh_seconds = refresh_seconds
+
+        self.count = 0
+        self.created_at = 0
+        self._mm: mmap.mmap | None = None
+        self._snapshot_stat: tuple[int, int] | None = None
+        self._delta: dict[str, SnapshotRedirect | None] = {}
+        self._delta_stat: tuple[int, int] | None = None
+        self._next_refresh_at = 0.0
+
+        self.refresh(force=True)
+
+    def _open_snapshot(self) -> None:
+        """Отображение файла снимка в память."""
+        with self.path.open("rb") as snapshot_file:
+            stat = os.fstat(snapshot_file.fileno())
+            mm = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, count, created_at = SNAPSHOT_HEADER.unpack_from(mm, 0)
+        if magic != SNAPSHOT_MAGIC:
+            mm.close()
+            msg = f"{self.path} is not a redirect snapshot"
+            raise ValueError(msg)
+
+        if self._mm is not None:
+            self._mm.close()
+
+        self._mm = mm
+        self.count = count
+        self.created_at = created_at
+        self._keys_start = SNAPSHOT_HEADER.size
+        self._offsets_start = self._keys_start + count * SNAPSHOT_KEY_SIZE
+        self._expires_start = self._offsets_start + (count + 1) * SNAPSHOT_OFFSET.size
+        self._ids_start = self._expires_start + count * SNAPSHOT_EXPIRES.size
+        self._blob_start = self._ids_start + count * SNAPSHOT_ID.size
+        self._snapshot_stat = (stat.st_ino, stat.st_mtime_ns)
+
+    def _load_delta(self) -> None:
+        """Загрузка дельта-лога в память (он небольшой по определению)."""
+        if self.delta_path is None:
+            return
+
+        try:
+            stat = self.delta_path.stat()
+        except FileNotFoundError:
+            self._delta = {}
+            self._delta_stat = None
+            return
+
+        delta: dict[str, SnapshotRedirect | None] = {}
+        with self.delta_path.open("rb") as delta_file:
+            for line in delta_file:
+                # ["alias", "url"] и ["alias", "url", expires_at] - дельта-лог
+                # до появления expires_at и id.
+                alias, original_url, *rest = json.loads(line)
+                expires_at, shorted_url_id = (*rest, None, None)[:2]
+                delta[alias] = None if original_url is None else SnapshotRedirect(
+                    original_url, _from_unix_time(expires_at), shorted_url_id
+                )
+
+        self._delta = delta
+        self._delta_stat = (stat.st_ino, stat.st_mtime_ns)
+
+    def refresh(self, *, force: bool = False) -> None:
+        """Переоткрытие снимка и дельта-лога, если они были перекомпилированы.
+
+        Args:
+            force (bool, optional): Переоткрыть без проверки. Defaults to False.
+
+        """
+        try:
+            stat = self.path.stat()
+            if force or self._snapshot_stat != (stat.st_ino, stat.st_mtime_ns):
+                self._open_snapshot()
+        except (OSError, ValueError, struct.error):
+            # Снимка еще нет (первый деплой) или он поврежден: воркер работает
+            # с пустым снимком, а редиректы идут в базу.
+            if force or self.is_loaded:
+                logger.warning("Redirect snapshot %s is unavailable, "
+                               "falling back to database", self.path, exc_info=True)
+            self.close()
+            self.count = 0
+            self._snapshot_stat = None
+
+        if self.delta_path is not None:
+            try:
+                delta_stat = self.delta_path.stat()
+                delta_key: tuple[int, int] | None = (
+                    delta_stat.st_ino, delta_stat.st_mtime_ns
+                )
+            except FileNotFoundError:
+                delta_key = None
+            if force or self._delta_stat != delta_key:
+                self._load_delta()
+
+        self._next_refresh_at = time.monotonic() + self.refresh_seconds
+
+    @property
+    def is_loaded(self) -> bool:
+        """Отображен ли снимок (False - файла нет или он поврежден)."""
+        return self._mm is not None
+
+    def key_at(self, position: int) -> bytes:
+        """Ключ снимка по его позиции.
+
+        Args:
+            position (int): Позиция в отсортированном массиве ключей.
+
+        Returns:
+            bytes: alias_numeric в виде big-endian u128.
+
+        """
+        start = self._keys_start + position * SNAPSHOT_KEY_SIZE
+        return self._mm[start:start + SNAPSHOT_KEY_SIZE]  # type: ignore
+
+    def url_at(self, position: int) -> str:
+        """Оригинальный url по позиции ключа.
+
+        Args:
+            position (int): Позиция в отсортированном массиве ключей.
+
+        Returns:
+            str: Оригинальный url.
+
+        """
+        url_start, url_end = SNAPSHOT_OFFSETS_PAIR.unpack_from(
+            self._mm,  # type: ignore
+            self._offsets_start + position * SNAPSHOT_OFFSET.size,
+        )
+        return self._mm[  # type: ignore
+            self._blob_start + url_start:self._blob_start + url_end
+        ].decode()
+
+    def expires_at(self, position: int) -> int | None:
+        """Время истечения ссылки по позиции ключа.
+
+        Args:
+            position (int): Позиция в отсортированном массиве ключей.
+
+        Returns:
+            int | None: unix-время истечения или None, если ссылка бессрочная.
+
+        """
+        (expires_at,) = SNAPSHOT_EXPIRES.unpack_from(
+            self._mm,  # type: ignore
+            self._expires_start + position * SNAPSHOT_EXPIRES.size,
+        )
+        return expires_at or None
+
+    def id_at(self, position: int) -> int:
+        """Идентификатор (id) ссылки по позиции ключа.
+
+        Args:
+            position (int): Позиция в отсортированном массиве ключей.
+
+        Returns:
+            int: id ссылки.
+
+        """
+        (shorted_url_id,) = SNAPSHOT_ID.unpack_from(
+            self._mm,  # type: ignore
+            self._ids_start + position * SNAPSHOT_ID.size,
+        )
+        return shorted_url_id
+
+    def get_original_url(self, alias: str) -> str | None:
+        """Получение оригинального url по алиасу.
+
+        Args:
+            alias (str): Алиас.
+
+        Returns:
+            str | None: Оригинальный url, если алиас есть в снимке (с учетом
+            дельта-лога), иначе None.
+
+        """
+        redirect = self.get_redirect(alias)
+        return redirect.original_url if redirect is not None else None
+
+    def get_redirect(self, alias: str) -> SnapshotRedirect | None:
+        """Получение оригинального url, времени истечения и id ссылки по алиасу.
+
+        Args:
+            alias (str): Алиас.
+
+        Returns:
+            SnapshotRedirect | None: Редирект, если алиас есть в снимке
+            (с учетом дельта-лога), иначе None. Истекшие после компиляции
+            снимка ссылки тоже возвращаются: проверка срока - на вызывающем.
+
+        """
+        if self.refresh_seconds and time.monotonic() >= self._next_refresh_at:
+            self.refresh()
+
+        if alias in self._delta:
+            return self._delta[alias]
+
+        if SNAPSHOT_ALIAS_PATTERN.fullmatch(alias) is None:
+            return None
+
+        key = _alias_to_key(alias)
+
+        # Бинарный поиск прямо по отображенной памяти.
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.key_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        if low < self.count and self.key_at(low) == key:
+            return SnapshotRedirect(
+                self.url_at(low), _from_unix_time(self.expires_at(low)),
+                self.id_at(low),
+            )
+
+        return None
+
+    def close(self) -> None:
+        """Закрытие отображения снимка."""
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+
+@lru_cache
+def get_redirect_snapshot() -> RedirectSnapshot | None:
+    """Получение снимка редиректов текущего воркера.
+
+    Returns:
+        RedirectSnapshot | None: Снимок, если указан REDIRECT_SNAPSHOT_PATH,
+        иначе None.
+
+    """
+    if not REDIRECT_SNAPSHOT_PATH:
+        return None
+
+    return RedirectSnapshot(
+        REDIRECT_SNAPSHOT_PATH,
+        REDIRECT_SNAPSHOT_DELTA_PATH or None,
+        REDIRECT_SNAPSHOT_REFRESH_SECONDS,
+    )
+
+
+async def _main() -> None:
+    """Запуск компиляции снимка или дельта-лога из командной строки."""
+    parser = argparse.ArgumentParser(description="Redirect snapshot compiler.")
+    parser.add_argument("command", choices=("compile", "delta"))
+    parser.add_argument("--path", default=REDIRECT_SNAPSHOT_PATH)
+    parser.add_argument("--delta-path", default=REDIRECT_SNAPSHOT_DELTA_PATH)
+    args = parser.parse_args()
+
+    database.init_async_engine()
+    async with database.async_session_local() as db:  # type: ignore
+        if args.command == "compile":
+            await compile_redirect_snapshot(db, args.path)
+        else:
+            await compile_redirect_snapshot_delta(db, args.path, args.delta_path)
+
+    await database.async_engine.dispose()  # type: ignore
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,265 @@
+"""Модуль фоновых задач приложения."""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+from core.cache import get_redirect_cache
+from core.clicks import get_click_events_buffer, get_click_events_service
+from core.config import (
+    CLICK_EVENTS_FLUSH_INTERVAL_SECONDS,
+    EXPIRED_URLS_REAPER_BATCH_SIZE,
+    EXPIRED_URLS_REAPER_INTERVAL_SECONDS,
+    HOT_LINKS_TOP_K,
+    HOT_LINKS_WARMUP_INTERVAL_SECONDS,
+    METRICS_DIR,
+    METRICS_DUMP_INTERVAL_SECONDS,
+    SIDE_EFFECTS_JOURNAL_APPLY_INTERVAL_SECONDS,
+    SIDE_EFFECTS_JOURNAL_FSYNC_INTERVAL_SECONDS,
+    URLS_COLD_AFTER_DAYS,
+    URLS_TIERING_BATCH_SIZE,
+    URLS_TIERING_INTERVAL_SECONDS,
+    VISITOR_SKETCHES_FLUSH_INTERVAL_SECONDS,
+)
+from core.edge_cache import get_edge_cache_purger
+from core.hot_links import get_hot_links_service, get_hot_links_tracker
+from core.journal import get_side_effects_journal, get_side_effects_journal_service
+from core.metrics import mark_worker_metrics_dead, save_metrics
+from core.scheduler import Scheduler
+from core.services import get_urls_service
+from core.shared_cache import get_shared_redirect_cache
+from core.visitors import get_visitor_sketches, get_visitor_sketches_service
+from database import database
+
+logger = logging.getLogger(__name__)
+
+# Как часто удалять партиции click_events старше срока хранения.
+CLICK_EVENTS_PARTITIONS_CLEANUP_INTERVAL_SECONDS = 3600
+
+
+async def reap_expired_urls() -> None:
+    """Удаление истекших ссылок пачками, пока они не закончатся."""
+    if database.async_session_local is None:
+        return
+
+    redirect_cache = get_redirect_cache()
+
+    async with database.async_session_local() as db:
+        urls_service = get_urls_service(db)
+        while True:
+            deleted_aliases = await urls_service.delete_expired_urls_with_lock(
+                EXPIRED_URLS_REAPER_BATCH_SIZE
+            )
+            await get_shared_redirect_cache().delete(deleted_aliases)
+            for alias in deleted_aliases:
+                redirect_cache.invalidate(alias)
+            await get_edge_cache_purger().purge(deleted_aliases)
+
+            if len(deleted_aliases) < EXPIRED_URLS_REAPER_BATCH_SIZE:
+                break
+
+
+async def archive_cold_urls() -> None:
+    """Перенос давно не кликаемых ссылок в холодную партицию пачками."""
+    if database.async_session_local is None:
+        return
+
+    clicked_before = datetime.now() - timedelta(days=URLS_COLD_AFTER_DAYS)
+
+    async with database.async_session_local() as db:
+        urls_service = get_urls_service(db)
+        while await urls_service.archive_cold_urls_with_lock(
+            clicked_before, URLS_TIERING_BATCH_SIZE
+        ) == URLS_TIERING_BATCH_SIZE:
+            pass
+
+
+async def flush_click_events() -> None:
+    """Запись накопленных событий переходов в базу одной пачкой.
+
+    Если записать не удалось (в том числе по таймауту), события возвращаются
+    в буфер до следующего запуска.
+    """
+    if database.async_session_local is None:
+        return
+
+    click_events_buffer = get_click_events_buffer()
+    events = click_events_buffer.drain()
+    if not events:
+        return
+
+    try:
+        async with database.async_session_local() as db:
+            await get_click_events_service(db).write_click_events(events)
+    except BaseException:
+        click_events_buffer.restore(events)
+        raise
+
+
+async def drop_expired_click_events() -> None:
+    """Удаление партиций событий переходов старше срока хранения."""
+    if database.async_session_local is None:
+        return
+
+    async with database.async_session_local() as db:
+        await get_click_events_service(db).drop_expired_click_events_partitions()
+
+
+async def flush_visitor_sketches() -> None:
+    """Слияние накопленных скетчей посетителей со скетчами в базе.
+
+    Если слить не удалось (в том числе по таймауту), скетчи возвращаются
+    в память до следующего запуска.
+    """
+    if database.async_session_local is None:
+        return
+
+    visitor_sketches = get_visitor_sketches()
+    sketches = visitor_sketches.drain()
+    if not sketches:
+        return
+
+    try:
+        async with database.async_session_local() as db:
+            await get_visitor_sketches_service(db).merge_visitor_sketches(sketches)
+    except BaseException:
+        visitor_sketches.restore(sketches)
+        raise
+
+
+async def warm_up_redirect_cache() -> None:
+    """Закрепление популярных ссылок в кэше редиректов воркера.
+
+    Популярные ссылки берутся из скетча воркера и из почасовых агрегатов кликов,
+    поэтому только что запущенный воркер тоже получает прогретый кэш.
+    """
+    if database.async_session_local is None:
+        return
+
+    hot_links_tracker = get_hot_links_tracker()
+    local_aliases = [alias for alias, _, _ in hot_links_tracker.top(HOT_LINKS_TOP_K)]
+    # Старые переходы постепенно теряют вес в top-K.
+    hot_links_tracker.decay()
+
+    async with database.async_session_local() as db:
+        hot_redirects = await get_hot_links_service(db).get_hot_redirects(
+            local_aliases, HOT_LINKS_TOP_K
+        )
+
+    get_redirect_cache().pin(hot_redirects)
+
+
+async def sync_side_effects_journal() -> None:
+    """Сброс журнала кликов на диск (fsync в отдельном потоке)."""
+    side_effects_journal = get_side_effects_journal()
+    if side_effects_journal is not None:
+        await asyncio.to_thread(side_effects_journal.sync)
+
+
+async def apply_side_effects_journal() -> None:
+    """Применение журнала кликов к базе.
+
+    Текущий сегмент закрывается, после чего применяются все закрытые сегменты,
+    в том числе оставшиеся от упавших воркеров.
+    """
+    side_effects_journal = get_side_effects_journal()
+    if side_effects_journal is None or database.async_session_local is None:
+        return
+
+    await asyncio.to_thread(side_effects_journal.rotate)
+
+    async with database.async_session_local() as db:
+        side_effects_journal_service = get_side_effects_journal_service(db)
+        for segment_path in side_effects_journal.get_sealed_segments():
+            await side_effects_journal_service.apply_segment(segment_path)
+
+
+async def save_worker_metrics() -> None:
+    """Сохранение метрик воркера для агрегации в /internal/metrics."""
+    save_metrics()
+
+
+def register_background_jobs(scheduler: Scheduler) -> None:
+    """Регистрация всех включенных фоновых задач в планировщике.
+
+    Задачи над общими данными в базе выполняются только на лидере,
+    задачи над памятью и журналом воркера - на каждом воркере.
+
+    Args:
+        scheduler (Scheduler): Планировщик воркера.
+
+    """
+    scheduler.register(
+        "reap_expired_urls", reap_expired_urls,
+        EXPIRED_URLS_REAPER_INTERVAL_SECONDS, singleton=True,
+    )
+    scheduler.register(
+        "archive_cold_urls", archive_cold_urls,
+        URLS_TIERING_INTERVAL_SECONDS, singleton=True,
+    )
+
+    scheduler.register(
+        "flush_click_events", flush_click_events, CLICK_EVENTS_FLUSH_INTERVAL_SECONDS
+    )
+    if CLICK_EVENTS_FLUSH_INTERVAL_SECONDS > 0:
+        scheduler.register(
+            "drop_expired_click_events", drop_expired_click_events,
+            CLICK_EVENTS_PARTITIONS_CLEANUP_INTERVAL_SECONDS, singleton=True,
+        )
+
+    if get_side_effects_journal() is not None:
+        scheduler.register(
+            "sync_side_effects_journal", sync_side_effects_journal,
+            SIDE_EFFECTS_JOURNAL_FSYNC_INTERVAL_SECONDS,
+        )
+        scheduler.register(
+            "apply_side_effects_journal", apply_side_effects_journal,
+            SIDE_EFFECTS_JOURNAL_APPLY_INTERVAL_SECONDS,
+        )
+
+    if METRICS_DIR:
+        scheduler.register(
+            "save_worker_metrics", save_worker_metrics, METRICS_DUMP_INTERVAL_SECONDS
+        )
+
+    scheduler.register(
+        "warm_up_redirect_cache", warm_up_redirect_cache,
+        HOT_LINKS_WARMUP_INTERVAL_SECONDS,
+    )
+    scheduler.register(
+        "flush_visitor_sketches", flush_visitor_sketches,
+        VISITOR_SKETCHES_FLUSH_INTERVAL_SECONDS,
+    )
+
+
+async def stop_background_tasks(scheduler: Scheduler) -> None:
+    """Остановка фоновых задач и запись оставшихся кликов, событий и скетчей.
+
+    Args:
+        scheduler (Scheduler): Планировщик воркера.
+
+    """
+    await scheduler.stop()
+
+    if get_side_effects_journal() is not None:
+        try:
+            await apply_side_effects_journal()
+        except Exception:
+            logger.exception("Final side effects journal apply failed")
+
+    if CLICK_EVENTS_FLUSH_INTERVAL_SECONDS > 0:
+        try:
+            await flush_click_events()
+        except Exception:
+            logger.exception("Final click events flush failed")
+
+    if VISITOR_SKETCHES_FLUSH_INTERVAL_SECONDS > 0:
+        try:
+            await flush_visitor_sketches()
+        except Exception:
+            logger.exception("Final visitor sketches flush failed")
+
+    if METRICS_DIR:
+        try:
+            mark_worker_metrics_dead()
+        except Exception:
+            logger.exception("Final metrics save failed")
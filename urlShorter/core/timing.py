@@ -0,0 +1,156 @@
+"""Модуль измерения времени запросов к приложению и к базе данных.
+
+Хуки движка SQLAlchemy считают выполненные statement'ы, время в базе
+и время ожидания соединения из пула для текущего запроса (через contextvar).
+ASGI middleware отдает эти значения в заголовке Server-Timing и пишет
+по строке лога на запрос.
+"""
+import logging
+import time
+from contextvars import ContextVar
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, ExceptionContext
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.config import SLOW_REQUEST_THRESHOLD_MS
+
+logger = logging.getLogger(__name__)
+
+
+class RequestTimings:
+    """Счетчики обращений к базе данных за время одного запроса."""
+
+    __slots__ = ("db_seconds", "pool_wait_seconds", "statements_count")
+
+    def __init__(self) -> None:
+        """Инициализация нулевых счетчиков."""
+        self.statements_count = 0
+        self.db_seconds = 0.0
+        self.pool_wait_seconds = 0.0
+
+
+request_timings: ContextVar[RequestTimings | None] = ContextVar(
+    "request_timings", default=None
+)
+
+
+class TimedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """Пул соединений, засекающий ожидание свободного соединения."""
+
+    def _do_get(self) -> Any:  # noqa: ANN401
+        timings = request_timings.get()
+        if timings is None:
+            return super()._do_get()
+
+        started_at = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            timings.pool_wait_seconds += time.perf_counter() - started_at
+
+
+def _before_cursor_execute(conn: Any, cursor: Any, *_: Any) -> None:  # noqa: ANN401
+    """Запоминание времени начала statement'а по его курсору."""
+    if request_timings.get() is not None:
+        conn.info.setdefault("query_started_at", {})[cursor] = time.perf_counter()
+
+
+def _record_statement(conn: Any, cursor: Any) -> None:  # noqa: ANN401
+    """Учет завершенного (успешно или с ошибкой) statement'а в счетчиках запроса.
+
+    Время начала снимается всегда, даже вне запроса: иначе оно осталось бы
+    в conn.info соединения, вернувшегося в пул.
+    """
+    query_started_at = conn.info.get("query_started_at")
+    started_at = query_started_at.pop(cursor, None) if query_started_at else None
+    timings = request_timings.get()
+    if timings is None or started_at is None:
+        return
+
+    timings.statements_count += 1
+    timings.db_seconds += time.perf_counter() - started_at
+
+
+def _after_cursor_execute(conn: Any, cursor: Any, *_: Any) -> None:  # noqa: ANN401
+    """Учет выполненного statement'а в счетчиках запроса."""
+    _record_statement(conn, cursor)
+
+
+def _handle_error(exception_context: ExceptionContext) -> None:
+    """Учет statement'а, завершившегося ошибкой (after_cursor_execute не вызывается).
+
+    Время упавшего statement'а (например, отмененного по statement_timeout)
+    тоже проведено в базе.
+    """
+    execution_context = exception_context.execution_context
+    cursor = getattr(execution_context, "cursor", None)
+    if exception_context.connection is not None and cursor is not None:
+        _record_statement(exception_context.connection, cursor)
+
+
+def install_timing_events(engine: Engine) -> None:
+    """Подключение хуков подсчета statement'ов к движку.
+
+    Args:
+        engine (Engine): Синхронный движок (AsyncEngine.sync_engine).
+
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class ServerTimingMiddleware:
+    """ASGI middleware, добавляющий Server-Timing и лог каждого запроса."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        """Инициализация middleware.
+
+        Args:
+            app (ASGIApp): Оборачиваемое приложение.
+
+        """
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Обработка запроса с подсчетом времени."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = request_timings.set(timings)
+        started_at = time.perf_counter()
+        status_code = 500
+
+        async def send_with_server_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                duration_ms = (time.perf_counter() - started_at) * 1000
+                MutableHeaders(scope=message).append("Server-Timing", (
+                    f'db;dur={timings.db_seconds * 1000:.2f};'
+                    f'desc="{timings.statements_count} statements", '
+                    f"pool;dur={timings.pool_wait_seconds * 1000:.2f}, "
+                    f"app;dur={duration_ms:.2f}"
+                ))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_server_timing)
+        finally:
+            request_timings.reset(token)
+            duration_ms = (time.perf_counter() - started_at) * 1000
+            logger.log(
+                logging.WARNING if duration_ms >= SLOW_REQUEST_THRESHOLD_MS
+                else logging.INFO,
+                "request method=%s path=%s status=%d duration_ms=%.2f "
+                "db_statements=%d db_ms=%.2f pool_wait_ms=%.2f",
+                scope["method"], scope["path"], status_code, duration_ms,
+                timings.statements_count, timings.db_seconds * 1000,
+                timings.pool_wait_seconds * 1000,
+            )
@@ -0,0 +1,123 @@
+"""Модуль проверок полей создаваемой ссылки.
+
+Проверки выполняются при разборе тела запроса (ShortUrlRequestSchema), до
+сессии базы данных и подсчета лимита создания, и повторяются в UrlsService
+для вызовов не из API. Все проверки линейны по длине строки: префикс схемы,
+длина и один предкомпилированный паттерн без вложенных квантификаторов.
+"""
+import re
+
+from fastapi import Request
+from fastapi.exception_handlers import (
+    http_exception_handler,
+    request_validation_exception_handler,
+)
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import Response
+from pydantic_core import PydanticCustomError
+
+from core.exceptions import ShortUrlCreatingException
+
+ORIGINAL_URL_SCHEMES = ("http://", "https://")
+MAX_ORIGINAL_URL_LENGTH = 2048
+ALIAS_PATTERN = re.compile(r"[-_0-9a-zA-Z]{4,20}")
+
+ORIGINAL_URL_ERROR_MESSAGE = ("url must match pattern. Len should be ≤ 2048"
+                              "and starts with http:// or https://")
+ALIAS_ERROR_MESSAGE = ("custom_alias must match pattern. Len should be from 4 to 20."
+                       "Available symbols are: English symbols, digits and '-', '_' .")
+
+# Типы ошибок проверок, которые API отдает как 400, а не 422.
+INVALID_ORIGINAL_URL_ERROR_TYPE = "invalid_original_url"
+INVALID_ALIAS_ERROR_TYPE = "invalid_alias"
+SHORT_URL_ERROR_TYPES = frozenset((INVALID_ORIGINAL_URL_ERROR_TYPE,
+                                   INVALID_ALIAS_ERROR_TYPE))
+
+
+def is_valid_original_url(original_url: str) -> bool:
+    """Проверка оригинального url: схема, длина и отсутствие переноса строки.
+
+    Args:
+        original_url (str): Оригинальный url.
+
+    Returns:
+        bool: True, если url можно сократить.
+
+    """
+    return len(original_url) <= MAX_ORIGINAL_URL_LENGTH \
+        and original_url not in ORIGINAL_URL_SCHEMES \
+        and original_url.startswith(ORIGINAL_URL_SCHEMES) \
+        and "\n" not in original_url
+
+
+def is_valid_alias(alias: str) -> bool:
+    """Проверка алиаса: длина от 4 до 20 и символы [-_0-9a-zA-Z].
+
+    Args:
+        alias (str): Алиас.
+
+    Returns:
+        bool: True, если алиас корректен.
+
+    """
+    return ALIAS_PATTERN.fullmatch(alias) is not None
+
+
+def validate_original_url(original_url: str) -> str:
+    """Pydantic проверка оригинального url.
+
+    Args:
+        original_url (str): Оригинальный url.
+
+    Raises:
+        PydanticCustomError: Если url некорректен.
+
+    Returns:
+        str: Оригинальный url.
+
+    """
+    if not is_valid_original_url(original_url):
+        raise PydanticCustomError(INVALID_ORIGINAL_URL_ERROR_TYPE,
+                                  ORIGINAL_URL_ERROR_MESSAGE)
+    return original_url
+
+
+def validate_alias(alias: str | None) -> str | None:
+    """Pydantic проверка кастомного алиаса.
+
+    Args:
+        alias (str | None): Алиас.
+
+    Raises:
+        PydanticCustomError: Если алиас некорректен.
+
+    Returns:
+        str | None: Алиас.
+
+    """
+    if alias is not None and not is_valid_alias(alias):
+        raise PydanticCustomError(INVALID_ALIAS_ERROR_TYPE, ALIAS_ERROR_MESSAGE)
+    return alias
+
+
+async def short_url_validation_exception_handler(
+    request: Request,
+    exc: RequestValidationError
+) -> Response:
+    """Ответ 400 на некорректные url и алиас, 422 на остальные ошибки тела.
+
+    Args:
+        request (Request): Запрос.
+        exc (RequestValidationError): Ошибка разбора запроса.
+
+    Returns:
+        Response: Ответ как у ShortUrlCreatingException или стандартный 422.
+
+    """
+    errors = exc.errors()
+    if errors and all(error["type"] in SHORT_URL_ERROR_TYPES for error in errors):
+        return await http_exception_handler(
+            request, ShortUrlCreatingException(errors[0]["msg"])
+        )
+
+    return await request_validation_exception_handler(request, exc)
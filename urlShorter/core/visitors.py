@@ -0,0 +1,243 @@
+"""Модуль приблизительного подсчета уникальных посетителей ссылок.
+
+Для каждой ссылки хранится HyperLogLog скетч фиксированного размера.
+Редирект обновляет скетч в памяти воркера, а фоновая задача сливает
+накопленные скетчи с хранящимися в базе (поэлементный максимум регистров),
+поэтому скетчи разных воркеров корректно объединяются.
+"""
+import hashlib
+import math
+from functools import lru_cache
+
+from sqlalchemy import bindparam, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import VISITOR_SKETCHES_MAX_LINKS
+from database.models import shorted_url_visitor_sketches_table
+
+# 2 ** 12 регистров по байту: 4 КБ на ссылку, стандартная ошибка ~1.6%.
+HYPERLOGLOG_PRECISION = 12
+HYPERLOGLOG_REGISTERS_COUNT = 1 << HYPERLOGLOG_PRECISION
+HASH_BITS = 64
+RANK_BITS = HASH_BITS - HYPERLOGLOG_PRECISION
+
+
+class HyperLogLog:
+    """HyperLogLog скетч для оценки количества уникальных значений."""
+
+    def __init__(self, registers: bytes | None = None) -> None:
+        """Инициализация скетча.
+
+        Args:
+            registers (bytes | None, optional): Регистры сохраненного скетча.
+                Defaults to None (пустой скетч).
+
+        """
+        self.registers = bytearray(registers or HYPERLOGLOG_REGISTERS_COUNT)
+
+    def add(self, value: str) -> None:
+        """Добавление значения в скетч.
+
+        Args:
+            value (str): Значение (например, IP посетителя).
+
+        """
+        hashed = int.from_bytes(
+            hashlib.blake2b(value.encode(), digest_size=HASH_BITS // 8).digest()
+        )
+        index = hashed >> RANK_BITS
+        rank = RANK_BITS - (hashed & ((1 << RANK_BITS) - 1)).bit_length() + 1
+
+        self.registers[index] = max(self.registers[index], rank)
+
+    def merge(self, registers: bytes) -> None:
+        """Объединение с другим скетчем.
+
+        Args:
+            registers (bytes): Регистры другого скетча.
+
+        """
+        self.registers = bytearray(map(max, self.registers, registers))
+
+    def estimate(self) -> int:
+        """Оценка количества уникальных значений.
+
+        Returns:
+            int: Оценка количества уникальных значений.
+
+        """
+        registers_count = HYPERLOGLOG_REGISTERS_COUNT
+        alpha = 0.7213 / (1 + 1.079 / registers_count)
+        estimate = alpha * registers_count ** 2 / sum(
+            2.0 ** -register for register in self.registers
+        )
+
+        # Для малых значений точнее linear counting по пустым регистрам.
+        zero_registers_count = self.registers.count(0)
+        if estimate <= 2.5 * registers_count and zero_registers_count:
+            estimate = registers_count * math.log(
+                registers_count / zero_registers_count
+            )
+
+        return round(estimate)
+
+
+class VisitorSketches:
+    """Скетчи посетителей, накопленные воркером с последнего слива в базу."""
+
+    def __init__(self, max_links: int) -> None:
+        """Инициализация накопителя скетчей.
+
+        Args:
+            max_links (int): Максимальное количество ссылок со скетчами.
+                Посетители остальных ссылок не учитываются до слива.
+
+        """
+        self.max_links = max_links
+        self.sketches: dict[int, HyperLogLog] = {}
+        # Количество посетителей, пропущенных из-за переполнения.
+        self.dropped_count = 0
+
+    def add(self, shorted_url_id: int, visitor: str) -> None:
+        """Учет посетителя ссылки (без обращений к базе).
+
+        Args:
+            shorted_url_id (int): id ссылки.
+            visitor (str): Идентификатор посетителя (IP).
+
+        """
+        sketch = self.sketches.get(shorted_url_id)
+        if sketch is None:
+            if len(self.sketches) >= self.max_links:
+                self.dropped_count += 1
+                return
+            sketch = self.sketches[shorted_url_id] = HyperLogLog()
+
+        sketch.add(visitor)
+
+    def drain(self) -> dict[int, HyperLogLog]:
+        """Забрать все накопленные скетчи.
+
+        Returns:
+            dict[int, HyperLogLog]: Скетчи по id ссылок.
+
+        """
+        sketches = self.sketches
+        self.sketches = {}
+
+        return sketches
+
+    def restore(self, sketches: dict[int, HyperLogLog]) -> None:
+        """Вернуть скетчи, которые не удалось слить в базу.
+
+        Args:
+            sketches (dict[int, HyperLogLog]): Скетчи из drain().
+
+        """
+        for shorted_url_id, sketch in sketches.items():
+            current_sketch = self.sketches.get(shorted_url_id)
+            if current_sketch is None:
+                self.sketches[shorted_url_id] = sketch
+            else:
+                current_sketch.merge(sketch.registers)
+
+
+class VisitorSketchesService:
+    """Сервис для хранения скетчей уникальных посетителей в базе."""
+
+    def __init__(self, db: AsyncSession) -> None:
+        """Инициализация сервиса скетчей посетителей.
+
+        Args:
+            db (AsyncSession): Сессия базы данных.
+
+        """
+        self.db: AsyncSession = db
+
+    async def merge_visitor_sketches(self, sketches: dict[int, HyperLogLog]) -> None:
+        """Слияние скетчей воркера со скетчами в базе в одной транзакции.
+
+        Args:
+            sketches (dict[int, HyperLogLog]): Скетчи по id ссылок.
+
+        """
+        if not sketches:
+            return
+
+        table = shorted_url_visitor_sketches_table
+        # Сортировка id исключает deadlock'и между воркерами.
+        shorted_url_ids = sorted(sketches)
+
+        await self.db.execute(
+            insert(table).on_conflict_do_nothing(),
+            [{"shorted_url_id": shorted_url_id,
+              "registers": bytes(HYPERLOGLOG_REGISTERS_COUNT)}
+             for shorted_url_id in shorted_url_ids],
+        )
+
+        select_sketches_stmt = select(table.c.shorted_url_id, table.c.registers) \
+            .where(table.c.shorted_url_id.in_(shorted_url_ids)) \
+            .order_by(table.c.shorted_url_id) \
+            .with_for_update()
+
+        merged_sketches = []
+        for shorted_url_id, registers in await self.db.execute(select_sketches_stmt):
+            sketch = sketches[shorted_url_id]
+            sketch.merge(registers)
+            merged_sketches.append({"id": shorted_url_id,
+                                    "registers": bytes(sketch.registers)})
+
+        await self.db.execute(
+            table.update().where(table.c.shorted_url_id == bindparam("id")),
+            merged_sketches,
+        )
+        await self.db.commit()
+
+    async def get_unique_visitors(self, shorted_url_id: int) -> int:
+        """Оценка количества уникальных посетителей ссылки.
+
+        Учитываются и еще не слитые в базу посетители этого воркера.
+
+        Args:
+            shorted_url_id (int): id ссылки.
+
+        Returns:
+            int: Оценка количества уникальных посетителей.
+
+        """
+        table = shorted_url_visitor_sketches_table
+        registers: bytes | None = await self.db.scalar(
+            select(table.c.registers).where(table.c.shorted_url_id == shorted_url_id)
+        )
+
+        sketch = HyperLogLog(registers)
+        pending_sketch = get_visitor_sketches().sketches.get(shorted_url_id)
+        if pending_sketch is not None:
+            sketch.merge(pending_sketch.registers)
+
+        return sketch.estimate()
+
+
+@lru_cache
+def get_visitor_sketches() -> VisitorSketches:
+    """Получение скетчей посетителей текущего воркера.
+
+    Returns:
+        VisitorSketches: Скетчи посетителей.
+
+    """
+    return VisitorSketches(VISITOR_SKETCHES_MAX_LINKS)
+
+
+def get_visitor_sketches_service(db: AsyncSession) -> VisitorSketchesService:
+    """Получение сервиса для работы со скетчами посетителей.
+
+    Args:
+        db (AsyncSession): Сессия базы данных.
+
+    Returns:
+        VisitorSketchesService: Сервис для работы со скетчами посетителей.
+
+    """
+    return VisitorSketchesService(db)
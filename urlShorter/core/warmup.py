@@ -0,0 +1,205 @@
+"""Модуль прогрева воркера при старте и его готовности к трафику.
+
+Прогрев идет этапами: применение журнала кликов, открытие соединений пула,
+подготовка горячих statement'ов на каждом из них, проверка ревизии базы
+и загрузка популярных ссылок в кэш редиректов. Длительность и результат
+каждого этапа отдают /healthz и /readyz, а /readyz отвечает 200 только после
+прогрева (балансировщик не шлет трафик в холодный воркер).
+"""
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from contextlib import AsyncExitStack
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from core.config import (
+    WARMUP_CHECK_ALEMBIC_HEAD,
+    WARMUP_POOL_CONNECTIONS,
+    WARMUP_PRELOAD_HOT_LINKS,
+    WARMUP_PREPARE_STATEMENTS,
+)
+from core.services import get_urls_service
+from core.tasks import warm_up_redirect_cache
+from database import database
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_INI_PATH = Path(__file__).resolve().parent.parent / "alembic.ini"
+# Без этих этапов воркер не готов: база недоступна или схема не та.
+REQUIRED_WARMUP_STAGES = frozenset(("pool", "alembic"))
+
+
+class WarmupStage(NamedTuple):
+    """Результат этапа прогрева."""
+
+    name: str
+    # ok, failed или skipped.
+    status: str
+    seconds: float
+    error: str | None = None
+
+
+class WarmupState:
+    """Этапы прогрева воркера и его готовность."""
+
+    def __init__(self) -> None:
+        """Инициализация состояния до прогрева."""
+        self.stages: list[WarmupStage] = []
+        self.is_finished = False
+        self.is_stopping = False
+
+    @property
+    def is_ready(self) -> bool:
+        """Готовность: прогрев завершен, обязательные этапы прошли, нет остановки."""
+        return self.is_finished and not self.is_stopping and not any(
+            stage.status == "failed" for stage in self.stages
+            if stage.name in REQUIRED_WARMUP_STAGES
+        )
+
+    async def run_stage(
+        self,
+        name: str,
+        job: Callable[[], Awaitable[Any]],
+        *,
+        enabled: bool = True
+    ) -> None:
+        """Выполнение этапа с замером времени (ошибка только записывается).
+
+        Args:
+            name (str): Имя этапа.
+            job (Callable[[], Awaitable[Any]]): Этап.
+            enabled (bool, optional): Выполнять ли этап. Defaults to True.
+
+        """
+        if not enabled:
+            self.stages.append(WarmupStage(name, "skipped", 0.0))
+            return
+
+        started_at = time.perf_counter()
+        try:
+            await job()
+        except Exception as e:
+            logger.exception("Warmup stage %s failed", name)
+            self.stages.append(WarmupStage(
+                name, "failed", time.perf_counter() - started_at, str(e)
+            ))
+            return
+
+        self.stages.append(WarmupStage(name, "ok", time.perf_counter() - started_at))
+
+
+async def prepare_hot_statements(connection: AsyncConnection) -> None:
+    """Выполнение горячих запросов на соединении.
+
+    Значения не находят строк: важен только текст statement'ов,
+    которые asyncpg подготавливает и кэширует на соединении.
+
+    Args:
+        connection (AsyncConnection): Открытое соединение пула.
+
+    """
+    db = AsyncSession(bind=connection)
+    try:
+        urls_service = get_urls_service(db)
+        await urls_service.get_hot_shorted_url_by_alias("")
+        await urls_service.get_shorted_url_by_alias("")
+        await urls_service.get_ip_shorted_urls_created_count("", datetime.now())
+        await urls_service.get_shorted_url_detail_row_by_alias("")
+        # Пустой UPDATE по несуществующему id (с коммитом, как у перехода).
+        await urls_service.add_click_to_shorted_url(0)
+    finally:
+        await db.close()
+
+
+def get_alembic_head() -> str | None:
+    """Получение head ревизии миграций Alembic.
+
+    Returns:
+        str | None: Ревизия или None, если миграций нет.
+
+    """
+    return ScriptDirectory.from_config(Config(ALEMBIC_INI_PATH)).get_current_head()
+
+
+async def check_alembic_head() -> None:
+    """Проверка того, что база мигрирована до head ревизии.
+
+    Raises:
+        RuntimeError: Если ревизия базы не совпадает с head.
+
+    """
+    if database.async_engine is None:
+        return
+
+    alembic_head = await asyncio.to_thread(get_alembic_head)
+    async with database.async_engine.connect() as connection:
+        database_revision = await connection.scalar(
+            text("SELECT version_num FROM alembic_version")
+        )
+
+    if database_revision != alembic_head:
+        msg = (f"Database revision {database_revision} "
+               f"is not alembic head {alembic_head}")
+        raise RuntimeError(msg)
+
+
+async def run_warmup(warmup_state: WarmupState) -> None:
+    """Прогрев воркера по этапам.
+
+    Args:
+        warmup_state (WarmupState): Состояние, в которое пишутся этапы.
+
+    """
+    async with AsyncExitStack() as exit_stack:
+        connections: list[AsyncConnection] = []
+
+        async def open_pool_connections() -> None:
+            if database.async_engine is None:
+                return
+            pool: Any = database.async_engine.pool
+            # Соединения держатся одновременно, иначе пул вернет одно и то же.
+            for _ in range(min(WARMUP_POOL_CONNECTIONS, pool.size())):
+                connection = await exit_stack.enter_async_context(
+                    database.async_engine.connect()
+                )
+                connections.append(connection)
+
+        async def prepare_pool_statements() -> None:
+            for connection in connections:
+                await prepare_hot_statements(connection)
+
+        await warmup_state.run_stage(
+            "pool", open_pool_connections, enabled=WARMUP_POOL_CONNECTIONS > 0
+        )
+        await warmup_state.run_stage(
+            "statements", prepare_pool_statements,
+            enabled=WARMUP_PREPARE_STATEMENTS and bool(connections),
+        )
+
+    await warmup_state.run_stage(
+        "alembic", check_alembic_head, enabled=WARMUP_CHECK_ALEMBIC_HEAD
+    )
+    await warmup_state.run_stage(
+        "hot_links", warm_up_redirect_cache, enabled=WARMUP_PRELOAD_HOT_LINKS
+    )
+    warmup_state.is_finished = True
+
+
+@lru_cache
+def get_warmup_state() -> WarmupState:
+    """Получение состояния прогрева текущего воркера.
+
+    Returns:
+        WarmupState: Состояние прогрева.
+
+    """
+    return WarmupState()
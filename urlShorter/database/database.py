@@ -9,6 +9,7 @@ from sqlalchemy.ext.asyncio import (
 )
 
 from core.config import DATABASE_ASYNC_URL
+from core.timing import TimedAsyncAdaptedQueuePool, install_timing_events
 
 async_engine: AsyncEngine | None = None
 async_session_local: async_sessionmaker[AsyncSession] | None = None
@@ -16,7 +17,10 @@ async_session_local: async_sessionmaker[AsyncSession] | None = None
 def init_async_engine() -> None:
     """Функция инициализации базы данных."""
     global async_engine, async_session_local
-    async_engine = create_async_engine(DATABASE_ASYNC_URL)
+    async_engine = create_async_engine(
+        DATABASE_ASYNC_URL, poolclass=TimedAsyncAdaptedQueuePool
+    )
+    install_timing_events(async_engine.sync_engine)
     async_session_local = async_sessionmaker(async_engine)
 
 
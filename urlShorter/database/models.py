@@ -1,7 +1,20 @@
 """Модуль хранения таблиц в базе данных."""
 from datetime import datetime
 
-from sqlalchemy import DateTime, Index, desc
+from sqlalchemy import (
+    DDL,
+    Column,
+    DateTime,
+    Index,
+    Integer,
+    LargeBinary,
+    SmallInteger,
+    String,
+    Table,
+    UniqueConstraint,
+    desc,
+    event,
+)
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 
@@ -21,16 +34,102 @@ class ShortedUrl(Base):
     original_url должен соответствовать: (http://.{1,2041})|(https://.{1,2040})
 
     Используемые символы: '-', '_', '0-9', 'a-zA-Z' (длина от 4 до 20 включительно)
+
+    Таблица партиционирована по archived: shorted_urls_hot - часто кликаемые
+    ссылки, shorted_urls_cold - давно не кликаемые. У каждой партиции свои
+    индексы, поэтому индексы горячей партиции остаются небольшими.
+    Уникальный ключ партиционированной таблицы обязан включать archived,
+    поэтому уникальность alias между партициями обеспечивает таблица
+    shorted_url_aliases, которую триггер ведет в той же транзакции.
     """
 
     __tablename__ = "shorted_urls"
+    __table_args__ = (
+        UniqueConstraint("alias", "archived", name="shorted_urls_alias_key"),
+        {"postgresql_partition_by": "LIST (archived)"},
+    )
 
+    # Ключ партиционирования обязан входить в первичный ключ.
+    archived: Mapped[bool] = mapped_column(primary_key=True, default=False)
     original_url: Mapped[str] = mapped_column(nullable=False)
+    # Нормализованный хост original_url (см. get_original_host) для поиска
+    # ссылок по хосту.
+    original_host: Mapped[str | None] = mapped_column(nullable=True)
     created_by_ip: Mapped[str] = mapped_column(nullable=True)
-    alias: Mapped[str] = mapped_column(nullable=False, unique=True)
+    alias: Mapped[str] = mapped_column(nullable=False)
     alias_len: Mapped[int] = mapped_column(nullable=False, index=True)
     available_after: Mapped[bool] = mapped_column(default=True)
     clicks: Mapped[int] = mapped_column(default=0)
+    # sha256 от original_url. Заполняется только в режиме дедупликации
+    # и только для ссылок без custom_alias.
+    original_url_hash: Mapped[bytes | None] = mapped_column(LargeBinary(32),
+                                                            nullable=True)
+    # None - ссылка бессрочная.
+    expires_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True),
+                                                        nullable=True)
+    last_clicked_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True),
+                                                             nullable=True)
+
+
+# Партиции горячих и холодных ссылок
+event.listen(ShortedUrl.__table__, "after_create", DDL(
+    "CREATE TABLE shorted_urls_hot PARTITION OF shorted_urls FOR VALUES IN (false)"
+))
+event.listen(ShortedUrl.__table__, "after_create", DDL(
+    "CREATE TABLE shorted_urls_cold PARTITION OF shorted_urls FOR VALUES IN (true)"
+))
+
+# Реестр алиасов всех партиций: UNIQUE(alias) на уровне базы, который
+# не может дать партиционированная по archived таблица. Ведется триггером,
+# поэтому покрывает любую запись в shorted_urls (в том числе COPY). Перенос
+# между партициями - это DELETE и INSERT строки, и запись в реестре
+# удаляется и добавляется заново.
+shorted_url_aliases_table = Table(
+    "shorted_url_aliases",
+    Base.metadata,
+    Column("alias", String, primary_key=True),
+)
+
+SHORTED_URL_ALIASES_FUNCTION_DDL = """
+CREATE OR REPLACE FUNCTION register_shorted_url_alias() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        DELETE FROM shorted_url_aliases WHERE alias = OLD.alias;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO shorted_url_aliases (alias) VALUES (NEW.alias);
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+SHORTED_URL_ALIASES_TRIGGER_DDL = """
+CREATE TRIGGER shorted_urls_register_alias
+    AFTER INSERT OR DELETE OR UPDATE OF alias ON shorted_urls
+    FOR EACH ROW EXECUTE FUNCTION register_shorted_url_alias()
+"""
+event.listen(ShortedUrl.__table__, "after_create",
+             DDL(SHORTED_URL_ALIASES_FUNCTION_DDL))
+event.listen(ShortedUrl.__table__, "after_create",
+             DDL(SHORTED_URL_ALIASES_TRIGGER_DDL))
+
+# Триграммный индекс для поиска по подстроке original_url. Расширение pg_trgm
+# есть не в каждой сборке Postgres: без него индекс не создается,
+# а поиск по подстроке работает полным просмотром.
+ORIGINAL_URL_TRGM_INDEX_DDL = """
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        CREATE INDEX IF NOT EXISTS idx_original_url_trgm
+            ON shorted_urls USING gin (original_url gin_trgm_ops);
+    ELSE
+        RAISE NOTICE 'pg_trgm is not available, idx_original_url_trgm is skipped';
+    END IF;
+END
+$$
+"""
+event.listen(ShortedUrl.__table__, "after_create", DDL(ORIGINAL_URL_TRGM_INDEX_DDL))
 
 # Смежный индекс для быстрого поиска
 Index("idx_alias_len_and_alias", ShortedUrl.alias_len, ShortedUrl.alias)
@@ -38,3 +137,73 @@ Index("idx_alias_len_and_alias", ShortedUrl.alias_len, ShortedUrl.alias)
 Index("idx_alias_len_desc_and_alias_desc",
     desc(ShortedUrl.alias_len),
     desc(ShortedUrl.alias))
+# Частичный индекс для поиска первой ссылки со свободным соседом:
+# таких ссылок мало, а полный индекс пришлось бы просматривать целиком.
+Index("idx_available_after_alias_len_and_alias",
+      ShortedUrl.alias_len, ShortedUrl.alias,
+      postgresql_where=ShortedUrl.available_after)
+# Покрывающие индексы для подсчета созданных с ip ссылок (лимит создания)
+# и списков ссылок по ip и времени создания с keyset пагинацией по
+# (created_at, id): страница id выбирается index only сканом. Остальные колонки
+# (в том числе часто обновляемый clicks) в индексы не входят, чтобы не
+# ломать HOT обновления переходов.
+Index("idx_created_by_ip_created_at_and_id",
+      ShortedUrl.created_by_ip, ShortedUrl.created_at, ShortedUrl.id)
+Index("idx_created_at_and_id", ShortedUrl.created_at, ShortedUrl.id)
+# Уникальный индекс для поиска уже сокращенного url (режим дедупликации)
+Index("idx_original_url_hash", ShortedUrl.original_url_hash, ShortedUrl.archived,
+      unique=True)
+# Индекс для поиска ссылок по хосту с keyset пагинацией по id
+Index("idx_original_host_and_id", ShortedUrl.original_host, ShortedUrl.id)
+# Частичный индекс для поиска истекших ссылок
+Index("idx_expires_at", ShortedUrl.expires_at,
+      postgresql_where=ShortedUrl.expires_at.isnot(None))
+
+
+# Лог событий переходов. Партиционирован по дням (партиции создаются при записи),
+# поэтому старые события удаляются целыми партициями.
+click_events_table = Table(
+    "click_events",
+    Base.metadata,
+    Column("shorted_url_id", Integer, nullable=False),
+    Column("occurred_at", DateTime(timezone=True), nullable=False),
+    Column("referrer_host", String, nullable=True),
+    Column("user_agent_class", SmallInteger, nullable=False),
+    postgresql_partition_by="RANGE (occurred_at)",
+)
+
+# Почасовые и дневные агрегаты переходов, обновляемые инкрементально.
+click_rollups_hourly_table = Table(
+    "click_rollups_hourly",
+    Base.metadata,
+    Column("shorted_url_id", Integer, primary_key=True),
+    Column("bucket", DateTime(timezone=True), primary_key=True),
+    Column("clicks", Integer, nullable=False),
+)
+# Для выборки top-K ссылок за последний час (прогрев кэша редиректов).
+Index("idx_click_rollups_hourly_bucket", click_rollups_hourly_table.c.bucket)
+
+click_rollups_daily_table = Table(
+    "click_rollups_daily",
+    Base.metadata,
+    Column("shorted_url_id", Integer, primary_key=True),
+    Column("bucket", DateTime(timezone=True), primary_key=True),
+    Column("clicks", Integer, nullable=False),
+)
+
+# HyperLogLog скетчи уникальных посетителей ссылок (регистры в bytea).
+shorted_url_visitor_sketches_table = Table(
+    "shorted_url_visitor_sketches",
+    Base.metadata,
+    Column("shorted_url_id", Integer, primary_key=True),
+    Column("registers", LargeBinary, nullable=False),
+)
+
+# Примененные сегменты журнала кликов: сегмент, примененный перед падением
+# воркера, но еще не удаленный с диска, не будет применен повторно.
+side_effects_journal_checkpoints_table = Table(
+    "side_effects_journal_checkpoints",
+    Base.metadata,
+    Column("segment", String, primary_key=True),
+    Column("applied_at", DateTime(timezone=True), nullable=False),
+)
@@ -1,11 +1,28 @@
 """Модуль запуска сервера приложения."""
+import asyncio
 from collections.abc import AsyncGenerator
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 
 from fastapi import FastAPI
+from fastapi.exceptions import RequestValidationError
 
 from api.routes import api_router
-from database.database import async_engine, init_async_engine
+from core.admission import AdmissionControlMiddleware
+from core.config import ADMISSION_MAX_CONCURRENCY, SERVER_TIMING_ENABLED
+from core.metrics import MetricsMiddleware, merge_dead_worker_metrics
+from core.scheduler import get_scheduler
+from core.shared_cache import get_shared_redirect_cache
+from core.tasks import (
+    apply_side_effects_journal,
+    register_background_jobs,
+    stop_background_tasks,
+)
+from core.timing import ServerTimingMiddleware
+from core.validators import short_url_validation_exception_handler
+from core.warmup import get_warmup_state, run_warmup
+from database import database
+from database.database import init_async_engine
+from internal.routes import internal_router
 from routes import main_router
 
 
@@ -18,13 +35,47 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None]: # noqa: ARG001
 
     """
     init_async_engine()
+    # Метрики воркеров, упавших до этого запуска, не копятся в METRICS_DIR.
+    merge_dead_worker_metrics()
+    warmup_state = get_warmup_state()
+    # Клики из журналов, оставшихся от прошлого запуска, применяются сразу
+    # (до фоновой задачи, применяющей журнал периодически).
+    await warmup_state.run_stage("side_effects_journal", apply_side_effects_journal)
+    # Остальной прогрев идет в фоне: /healthz отвечает сразу,
+    # а /readyz - только после прогрева.
+    warmup_task = asyncio.create_task(run_warmup(warmup_state))
+    scheduler = get_scheduler()
+    register_background_jobs(scheduler)
+    scheduler.start()
     yield
-    if async_engine is not None:
-        await async_engine.dispose()
+    # Балансировщик перестает слать трафик в останавливающийся воркер.
+    warmup_state.is_stopping = True
+    warmup_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await warmup_task
+    await stop_background_tasks(scheduler)
+    await get_shared_redirect_cache().close()
+    if database.async_engine is not None:
+        await database.async_engine.dispose()
 
 
 app = FastAPI(lifespan=lifespan)
 
+# Некорректные url и алиас - 400, как и раньше при проверке в сервисе
+app.add_exception_handler(RequestValidationError,
+                          short_url_validation_exception_handler)  # type: ignore
+
+# Отклонение запросов сверх лимитов с 503 вместо ожидания пула соединений
+if ADMISSION_MAX_CONCURRENCY > 0:
+    app.add_middleware(AdmissionControlMiddleware)
+
+# Гистограммы длительности запросов для /internal/metrics
+app.add_middleware(MetricsMiddleware)
+
+# Server-Timing со временем в базе и в ожидании пула для каждого ответа
+if SERVER_TIMING_ENABLED:
+    app.add_middleware(ServerTimingMiddleware)
+
 
 # Подключения метода /api
 app.include_router(
@@ -33,6 +84,13 @@ app.include_router(
     router=api_router,
 )
 
+# Подключения служебного метода /internal
+app.include_router(
+    prefix="/internal",
+    tags=["internal"],
+    router=internal_router,
+)
+
 # Подключения базового метода
 app.include_router(
     prefix="",
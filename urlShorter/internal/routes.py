@@ -0,0 +1,137 @@
+"""Модуль служебных методов /internal ."""
+import hmac
+from collections import Counter
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Header, Query, Response
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from core.config import HOT_LINKS_TOP_K, INTERNAL_API_TOKEN, PROFILER_MAX_SECONDS
+from core.exceptions import InternalApiForbiddenException
+from core.hot_links import get_hot_links_tracker
+from core.metrics import PROMETHEUS_CONTENT_TYPE, render_metrics
+from core.profiler import (
+    Stack,
+    get_request_profiles,
+    profile_event_loop,
+    render_collapsed,
+    render_speedscope,
+)
+from core.schemas import HotLinkResponseSchema
+
+internal_router = APIRouter()
+
+ProfileFormat = Literal["collapsed", "speedscope"]
+
+
+async def verify_internal_api_token(
+    authorization: str | None = Header(default=None)
+) -> None:
+    """Проверка токена служебных методов с доступом к процессу.
+
+    Args:
+        authorization (str | None, optional): Заголовок "Bearer <token>".
+            Defaults to Header(default=None).
+
+    Raises:
+        InternalApiForbiddenException: Если токен не задан или не совпал (403).
+
+    """
+    if not INTERNAL_API_TOKEN or authorization is None or not hmac.compare_digest(
+        authorization.encode(), f"Bearer {INTERNAL_API_TOKEN}".encode()
+    ):
+        raise InternalApiForbiddenException
+
+
+def _render_profile(
+    stacks: dict[Stack, int],
+    profile_format: ProfileFormat,
+    name: str
+) -> Response:
+    """Ответ с профилем в запрошенном формате."""
+    if profile_format == "speedscope":
+        return JSONResponse(render_speedscope(Counter(stacks), name))
+
+    return PlainTextResponse(render_collapsed(Counter(stacks)))
+
+
+@internal_router.get(
+    "/hot-links", status_code=200, dependencies=[Depends(verify_internal_api_token)]
+)
+async def get_hot_links(limit: int = HOT_LINKS_TOP_K) -> list[HotLinkResponseSchema]:
+    """Получение самых популярных ссылок текущего воркера.
+
+    Args:
+        limit (int, optional): Количество ссылок. Defaults to HOT_LINKS_TOP_K.
+
+    Returns:
+        list[HotLinkResponseSchema]: Популярные ссылки по убыванию переходов.
+
+    """
+    return [HotLinkResponseSchema(alias=alias, clicks=clicks, error=error)
+            for alias, clicks, error in get_hot_links_tracker().top(max(0, limit))]
+
+
+@internal_router.get(
+    "/metrics", status_code=200, dependencies=[Depends(verify_internal_api_token)]
+)
+async def get_metrics() -> Response:
+    """Получение метрик всех воркеров хоста в формате Prometheus.
+
+    Returns:
+        Response: Метрики в текстовом формате Prometheus.
+
+    """
+    return Response(render_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@internal_router.get(
+    "/profile", status_code=200, dependencies=[Depends(verify_internal_api_token)]
+)
+async def get_profile(
+    seconds: float = 5,
+    profile_format: ProfileFormat = Query("collapsed", alias="format"),
+) -> Response:
+    """Профилирование воркера, принявшего запрос, в течение seconds секунд.
+
+    Args:
+        seconds (float, optional): Длительность профилирования. Defaults to 5.
+        profile_format (ProfileFormat, optional): collapsed или speedscope.
+            Defaults to Query("collapsed", alias="format").
+
+    Returns:
+        Response: Профиль в запрошенном формате.
+
+    """
+    stacks = await profile_event_loop(min(max(0.0, seconds), PROFILER_MAX_SECONDS))
+
+    return _render_profile(stacks, profile_format, f"{seconds}s profile")
+
+
+@internal_router.get(
+    "/profile/requests",
+    status_code=200,
+    dependencies=[Depends(verify_internal_api_token)],
+)
+async def get_requests_profile(
+    *,
+    reset: bool = False,
+    profile_format: ProfileFormat = Query("collapsed", alias="format"),
+) -> Response:
+    """Получение стеков, накопленных при профилировании каждого N-го запроса.
+
+    Args:
+        reset (bool, optional): Очистить накопленные стеки. Defaults to False.
+        profile_format (ProfileFormat, optional): collapsed или speedscope.
+            Defaults to Query("collapsed", alias="format").
+
+    Returns:
+        Response: Профиль в запрошенном формате.
+
+    """
+    request_profiles = get_request_profiles()
+    stacks = dict(request_profiles)
+    if reset:
+        request_profiles.clear()
+
+    return _render_profile(stacks, profile_format, "sampled requests")
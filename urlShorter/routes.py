@@ -1,48 +1,236 @@
 """Модуль метода / ."""
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
 from fastapi.responses import RedirectResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from core.cache import CachedRedirect, get_redirect_cache
+from core.clicks import get_click_events_buffer
+from core.config import (
+    REDIRECT_CACHE_CONTROL,
+    REDIRECT_SNAPSHOT_DB_FALLBACK,
+    VISITOR_SKETCHES_FLUSH_INTERVAL_SECONDS,
+)
+from core.edge_cache import (
+    get_not_found_edge_cache_headers,
+    get_redirect_edge_cache_headers,
+    is_edge_cache_purge_request,
+)
 from core.exceptions import AliasNotFoundException
-from core.services import get_urls_service
+from core.hot_links import get_hot_links_tracker
+from core.http_cache import get_cache_headers
+from core.journal import get_side_effects_journal
+from core.profiler import profile_every_nth_request
+from core.schemas import HealthResponseSchema, WarmupStageSchema
+from core.services import UrlsService, get_urls_service, is_expired
+from core.shared_cache import get_shared_redirect_cache
+from core.snapshot import get_redirect_snapshot
+from core.visitors import get_visitor_sketches
+from core.warmup import WarmupState, get_warmup_state
 from database.database import get_db
 from database.models import ShortedUrl
 
 main_router = APIRouter()
 
 
-@main_router.get("/{alias}", status_code=301)
+def _get_health_response(
+    status: str,
+    warmup_state: WarmupState
+) -> HealthResponseSchema:
+    """Ответ с состоянием воркера и этапами его прогрева."""
+    return HealthResponseSchema(status=status, stages=[
+        WarmupStageSchema.model_validate(stage._asdict())
+        for stage in warmup_state.stages
+    ])
+
+
+# /healthz и /readyz объявлены до /{alias}, иначе они считались бы алиасами.
+@main_router.get("/healthz", status_code=200)
+async def get_liveness() -> HealthResponseSchema:
+    """Проверка того, что воркер жив (не зависит от базы и прогрева).
+
+    Returns:
+        HealthResponseSchema: Состояние воркера и этапы прогрева.
+
+    """
+    return _get_health_response("ok", get_warmup_state())
+
+
+@main_router.get("/readyz", status_code=200)
+async def get_readiness(response: Response) -> HealthResponseSchema:
+    """Проверка готовности воркера принимать трафик.
+
+    Args:
+        response (Response): Ответ (503, пока воркер не прогрет или останавливается).
+
+    Returns:
+        HealthResponseSchema: Состояние воркера и этапы прогрева.
+
+    """
+    warmup_state = get_warmup_state()
+    if not warmup_state.is_ready:
+        response.status_code = 503
+        return _get_health_response("not_ready", warmup_state)
+
+    return _get_health_response("ready", warmup_state)
+
+
+async def _get_redirect(alias: str, urls_service: UrlsService) -> CachedRedirect | None:
+    """Получение редиректа из кэша воркера, затем из общего кэша и из базы.
+
+    Запись кэша воркера раз в REDIRECT_CACHE_REVALIDATE_SECONDS перепроверяется
+    по надгробию общего кэша: ссылку могли удалить в другом воркере.
+
+    Args:
+        alias (str): Алиас короткой ссылки.
+        urls_service (UrlsService): Сервис для работы с ссылками.
+
+    Returns:
+        CachedRedirect | None: Редирект или None, если alias не найден.
+
+    """
+    redirect_cache = get_redirect_cache()
+    shared_redirect_cache = get_shared_redirect_cache()
+    cached_redirect = redirect_cache.get(alias)
+    if cached_redirect is not None:
+        if not redirect_cache.needs_revalidation(alias):
+            return cached_redirect
+        # Удаление в другом воркере не очищает кэш этого воркера,
+        # но оставляет надгробие в общем кэше.
+        if await shared_redirect_cache.is_deleted(alias):
+            redirect_cache.invalidate(alias)
+            return None
+        redirect_cache.mark_revalidated(alias)
+        return cached_redirect
+
+    cached_redirect = await shared_redirect_cache.get(alias)
+    if cached_redirect is not None:
+        redirect_cache.set(alias, cached_redirect)
+        return cached_redirect
+
+    shorted_url: ShortedUrl | None = (
+        await urls_service.get_redirect_shorted_url_by_alias(alias)
+    )
+    if shorted_url is None:
+        return None
+
+    cached_redirect = CachedRedirect(
+        shorted_url.id, shorted_url.original_url, shorted_url.expires_at
+    )
+    redirect_cache.set(alias, cached_redirect)
+    # Не поверх надгробия: ссылку могли удалить после чтения из базы.
+    await shared_redirect_cache.set_if_absent(alias, cached_redirect)
+
+    return cached_redirect
+
+
+@main_router.get(
+    "/{alias}", status_code=301, dependencies=[Depends(profile_every_nth_request)]
+)
 async def get_shorted_url(
     alias: str,
+    request: Request,
     db: AsyncSession = Depends(get_db)
 ) -> RedirectResponse:
     """Переход по короткой ссылке.
 
     Args:
         alias (str): Алиас короткой ссылки.
+        request (Request): Запрос клиента (заголовки для аналитики переходов).
         db (AsyncSession, optional): Сессия базы данных. Defaults to Depends(get_db).
 
     Raises:
-        AliasNotFoundException: Если alias не найден (404).
+        AliasNotFoundException: Если alias не найден или ссылка истекла (404).
 
     Returns:
         RedirectResponse: Редирект на оригинальный url.
 
     """
+    # Очистка кэша прокси: ответ не считается переходом.
+    is_edge_cache_purge = is_edge_cache_purge_request(request)
+
+    # На edge-воркерах редирект отдается из снимка без обращения к базе.
+    redirect_snapshot = get_redirect_snapshot()
+    if redirect_snapshot is not None:
+        snapshot_redirect = redirect_snapshot.get_redirect(alias)
+        if snapshot_redirect is not None:
+            # Ссылка истекла после компиляции снимка.
+            if is_expired(snapshot_redirect.expires_at):
+                raise AliasNotFoundException(get_not_found_edge_cache_headers())
+            # Переход учитывается только в буферах и журнале: база на чтении
+            # не нужна, а клик без журнала не записывается.
+            if not is_edge_cache_purge \
+                    and snapshot_redirect.shorted_url_id is not None:
+                _record_redirect(alias, snapshot_redirect.shorted_url_id, request)
+            return RedirectResponse(
+                snapshot_redirect.original_url, status_code=301, headers={
+                    **get_cache_headers(None, REDIRECT_CACHE_CONTROL),
+                    **get_redirect_edge_cache_headers(snapshot_redirect.expires_at),
+                },
+            )
+        # Без загруженного снимка редирект всегда берется из базы.
+        if not REDIRECT_SNAPSHOT_DB_FALLBACK and redirect_snapshot.is_loaded:
+            raise AliasNotFoundException(get_not_found_edge_cache_headers())
+
+    # Ответ на очистку кэша прокси берется из базы.
+    if is_edge_cache_purge:
+        get_redirect_cache().invalidate(alias)
+        await get_shared_redirect_cache().delete([alias])
+
     urls_service = get_urls_service(db)
-    shorted_url: ShortedUrl | None = await urls_service.get_shorted_url_by_alias(alias)
+    cached_redirect = await _get_redirect(alias, urls_service)
 
     # Если не нашлась коротка ссылка с данным алиасом
-    if shorted_url is None:
-        raise AliasNotFoundException
-
-    # В идеале использовать celery для добавления к количеству кликов.
-    # Так как при падении приложения celery сохранит таску и сможет к ней вернуться.
-    # Но это требует большего времени и настройки.
-    # Проблема asyncio.create_task в том,
-    # что сессия базы данных закрывается при тестировании, поэтому просто добавим клик.
-    await urls_service.add_click_to_shorted_url(shorted_url)
-    # Возможно при огромном количестве запросов лучше будет перейти на логику:
-    # Сбор кликов в памяти Redis, затем каждые N миллисекунд отправлять их в clickhouse.
-
-    return RedirectResponse(shorted_url.original_url, status_code=301)
+    # или она истекла, но еще не удалена фоновой задачей.
+    if cached_redirect is None or is_expired(cached_redirect.expires_at):
+        raise AliasNotFoundException(get_not_found_edge_cache_headers())
+
+    redirect_headers = {
+        **get_cache_headers(None, REDIRECT_CACHE_CONTROL),
+        **get_redirect_edge_cache_headers(cached_redirect.expires_at),
+    }
+    if is_edge_cache_purge:
+        return RedirectResponse(
+            cached_redirect.original_url, status_code=301, headers=redirect_headers
+        )
+
+    # Без журнала клик коммитится в базу на редиректе.
+    if not _record_redirect(alias, cached_redirect.shorted_url_id, request):
+        await urls_service.add_click_to_shorted_url(cached_redirect.shorted_url_id)
+
+    return RedirectResponse(
+        cached_redirect.original_url, status_code=301, headers=redirect_headers
+    )
+
+
+def _record_redirect(alias: str, shorted_url_id: int, request: Request) -> bool:
+    """Учет перехода в буферах в памяти воркера и в журнале кликов.
+
+    Args:
+        alias (str): Алиас короткой ссылки.
+        shorted_url_id (int): id ссылки.
+        request (Request): Запрос клиента (заголовки для аналитики переходов).
+
+    Returns:
+        bool: True, если клик записан в журнал, False, если журнала нет.
+
+    """
+    get_hot_links_tracker().add(alias)
+
+    # Событие для аналитики только кладется в буфер в памяти,
+    # в базу его пачкой запишет фоновая задача.
+    get_click_events_buffer().add(
+        shorted_url_id,
+        request.headers.get("referer"),
+        request.headers.get("user-agent"),
+    )
+    if VISITOR_SKETCHES_FLUSH_INTERVAL_SECONDS > 0 and request.client is not None:
+        get_visitor_sketches().add(shorted_url_id, request.client.host)
+
+    # Клик дописывается в локальный журнал, а в базу его применит фоновая задача:
+    # в отличие от asyncio.create_task клик не теряется при падении воркера.
+    side_effects_journal = get_side_effects_journal()
+    if side_effects_journal is None:
+        return False
+
+    side_effects_journal.append_click(shorted_url_id)
+    return True
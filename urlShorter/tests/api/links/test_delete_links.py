@@ -0,0 +1,148 @@
+"""Модуль тестирования пакетного удаления ссылок."""
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import core.services
+from core.services import UrlsService, get_alias_numeric_service, get_urls_service
+from database.models import ShortedUrl
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_api_delete_links(
+    unauthorized_client: AsyncClient,
+    session: AsyncSession,
+) -> None:
+    """Тестирование POST /api/links/delete с соседними и отсутствующими алиасами."""
+    urls_service = get_urls_service(session)
+    for alias in ("BLKa", "BLKb", "BLKc", "BLKd"):
+        await urls_service.create_new_url_with_lock("https://bulk.delete/", alias)
+
+    response = await unauthorized_client.post("/api/links/delete", json={
+        "aliases": ["BLKc", "BLKb", "NOPE_bulk", "bad,alias", "BLKb"]
+    })
+    assert response.status_code == 200
+    assert sorted(response.json()["deleted"]) == ["BLKb", "BLKc"]
+    assert response.json()["missing"] == ["NOPE_bulk", "bad,alias"]
+
+    rows = (await session.execute(
+        select(ShortedUrl.alias, ShortedUrl.available_after)
+        .where(ShortedUrl.alias.in_(("BLKa", "BLKb", "BLKc", "BLKd")))
+        .order_by(ShortedUrl.alias)
+    )).all()
+    await session.commit()
+    # Освобожденные алиасы возвращены аллокатору через предыдущую ссылку.
+    assert [tuple(row) for row in rows] == [("BLKa", True), ("BLKd", True)]
+
+    response = await unauthorized_client.get("/BLKb")
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_api_delete_links_unproccessable_entity(
+    unauthorized_client: AsyncClient,
+) -> None:
+    """Тестирование POST /api/links/delete с пустым списком."""
+    response = await unauthorized_client.post("/api/links/delete",
+                                              json={"aliases": []})
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_delete_links_in_batches(
+    session: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Тестирование удаления пачками в отдельных транзакциях."""
+    monkeypatch.setattr(core.services, "BULK_DELETE_BATCH_SIZE", 2)
+    urls_service = get_urls_service(session)
+    aliases = ["BTCHa", "BTCHb", "BTCHc", "BTCHd", "BTCHe"]
+    for alias in aliases:
+        await urls_service.create_new_url_with_lock("https://bulk.batch/", alias)
+
+    batches: list[list[str]] = []
+
+    async def on_batch_deleted(batch_aliases: list[str]) -> None:
+        batches.append(batch_aliases)
+
+    deleted_aliases, failed_aliases = \
+        await urls_service.delete_urls_by_aliases_with_lock(
+            [*reversed(aliases), "NOPE_batch"], on_batch_deleted=on_batch_deleted
+        )
+    assert deleted_aliases == aliases
+    assert failed_aliases == []
+    assert batches == [["BTCHa", "BTCHb"], ["BTCHc", "BTCHd"], ["BTCHe"]]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_api_delete_links_reports_failed_batch(
+    unauthorized_client: AsyncClient,
+    session: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Тестирование очистки кэшей удаленных пачек при ошибке следующей пачки."""
+    monkeypatch.setattr(core.services, "BULK_DELETE_BATCH_SIZE", 2)
+    urls_service = get_urls_service(session)
+    for alias in ("FLDa", "FLDb", "FLDc"):
+        await urls_service.create_new_url_with_lock("https://bulk.failed/", alias)
+    # Редирект попадает в кэш воркера до удаления.
+    response = await unauthorized_client.get("/FLDa")
+    assert response.status_code == 301
+
+    delete_urls_batch_with_lock = UrlsService._delete_urls_batch_with_lock  # noqa: SLF001
+
+    async def failing_delete_urls_batch_with_lock(
+        self: UrlsService,
+        aliases: list[str]
+    ) -> list[str]:
+        if "FLDc" in aliases:
+            statement = "DELETE"
+            raise DBAPIError(statement, {}, Exception("connection lost"))
+        return await delete_urls_batch_with_lock(self, aliases)
+
+    monkeypatch.setattr(UrlsService, "_delete_urls_batch_with_lock",
+                        failing_delete_urls_batch_with_lock)
+
+    response = await unauthorized_client.post("/api/links/delete", json={
+        "aliases": ["FLDa", "FLDb", "FLDc", "NOPE_failed"]
+    })
+    assert response.status_code == 200
+    assert sorted(response.json()["deleted"]) == ["FLDa", "FLDb"]
+    # Про алиасы неудавшейся пачки неизвестно, были ли они.
+    assert response.json()["failed"] == ["FLDc", "NOPE_failed"]
+    assert response.json()["missing"] == []
+
+    # Первая пачка уже удалена из кэшей.
+    response = await unauthorized_client.get("/FLDa")
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_random_allocator_releases_failed_probe_locks(
+    session: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Тестирование того, что занятый алиас не оставляет блокировок аллокатора."""
+    urls_service = get_urls_service(session)
+    await urls_service.create_new_url_with_lock("https://bulk.probe/", "PRBtaken")
+
+    alias_numeric_service = get_alias_numeric_service()
+    probes = iter([
+        alias_numeric_service.get_alias_numeric_from_alias("PRBtaken"),
+        alias_numeric_service.get_alias_numeric_from_alias("PRBfree"),
+    ])
+    monkeypatch.setattr(core.services, "randint", lambda *_: next(probes))
+
+    alias_numeric = await urls_service._get_random_alias_numeric_with_lock()  # noqa: SLF001
+    assert alias_numeric == \
+        alias_numeric_service.get_alias_numeric_from_alias("PRBfree")
+
+    # Держатся только блокировки выбранного алиаса и его соседей.
+    advisory_locks_count = await session.scalar(text(
+        "SELECT count(*) FROM pg_locks "
+        "WHERE locktype = 'advisory' AND pid = pg_backend_pid()"
+    ))
+    await session.rollback()
+    assert advisory_locks_count == 3
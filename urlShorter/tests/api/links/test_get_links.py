@@ -1,10 +1,26 @@
 """Модуль тестирования получения списка ссылок."""
+from datetime import UTC, datetime, timedelta
+
 import pytest
+import pytest_asyncio
 from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.config import MAX_PER_PAGE_URLS_COUNT
+from core.services import get_urls_service
 from database.models import ShortedUrl
 
+FILTER_IP = "10.0.48.1"
+
+
+@pytest_asyncio.fixture(scope="session")
+async def existing_shorted_urls_for_filters(session: AsyncSession) -> list[str]:
+    """Возвращает alias'ы тестовых ссылок, созданных с одного ip (по порядку)."""
+    urls_service = get_urls_service(session)
+    return [(await urls_service.create_new_url_with_lock(
+        f"https://filters.test/{number}", created_by_ip=FILTER_IP
+    )).alias for number in range(5)]
+
 
 @pytest.mark.asyncio(loop_scope="session")
 @pytest.mark.parametrize(("page", "per_page"), [
@@ -57,3 +73,71 @@ async def test_api_links_alias_unproccessable_entity(
     assert response.status_code == 422
 
 
+@pytest.mark.asyncio(loop_scope="session")
+@pytest.mark.parametrize(("order_by", "reverse"), [
+    (None, True), ("-created_at", True), ("created_at", False),
+])
+async def test_api_links_filtered_by_ip_with_cursor(
+    unauthorized_client: AsyncClient,
+    existing_shorted_urls_for_filters: list[str],
+    order_by: str | None,
+    *,
+    reverse: bool,
+) -> None:
+    """Тестирование GET /api/links с фильтром по ip и keyset пагинацией."""
+    params: dict[str, str | int] = {"created_by_ip": FILTER_IP, "per_page": 3}
+    if order_by is not None:
+        params["order_by"] = order_by
+
+    response = await unauthorized_client.get("/api/links", params=params)
+    assert response.status_code == 200
+    aliases = [link["alias"] for link in response.json()]
+
+    response = await unauthorized_client.get("/api/links", params={
+        **params, "cursor": response.headers["x-next-cursor"],
+    })
+    assert response.status_code == 200
+    aliases += [link["alias"] for link in response.json()]
+    assert "x-next-cursor" not in response.headers
+
+    expected_aliases = existing_shorted_urls_for_filters[::-1] if reverse \
+        else existing_shorted_urls_for_filters
+    assert aliases == expected_aliases
+
+
+@pytest.mark.asyncio(loop_scope="session")
+@pytest.mark.usefixtures("existing_shorted_urls_for_filters")
+async def test_api_links_filtered_by_time_range(
+    unauthorized_client: AsyncClient,
+) -> None:
+    """Тестирование GET /api/links с окном времени создания."""
+    now = datetime.now(UTC)
+    response = await unauthorized_client.get("/api/links", params={
+        "created_by_ip": FILTER_IP,
+        "created_from": (now - timedelta(hours=1)).isoformat(),
+        "created_to": (now + timedelta(hours=1)).isoformat(),
+    })
+    assert response.status_code == 200
+    assert len(response.json()) == 5
+
+    response = await unauthorized_client.get("/api/links", params={
+        "created_by_ip": FILTER_IP,
+        "created_to": (now - timedelta(hours=1)).isoformat(),
+    })
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+@pytest.mark.asyncio(loop_scope="session")
+@pytest.mark.parametrize("params", [
+    {"created_by_ip": FILTER_IP, "order_by": "alias"},
+    {"cursor": "bm90LWEtY3Vyc29y"},
+    {"order_by": "created_at", "cursor": "not-a-cursor"},
+])
+async def test_api_links_filters_bad_request(
+    unauthorized_client: AsyncClient,
+    params: dict[str, str],
+) -> None:
+    """Тестирование GET /api/links с несовместимыми фильтрами и курсором."""
+    response = await unauthorized_client.get("/api/links", params=params)
+    assert response.status_code == 400
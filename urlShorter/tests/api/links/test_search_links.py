@@ -0,0 +1,123 @@
+"""Модуль тестирования поиска ссылок по оригинальному url."""
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import core.services
+from core.services import (
+    get_alias_numeric_service,
+    get_original_host,
+    get_urls_service,
+)
+from database.models import ShortedUrl
+
+
+@pytest_asyncio.fixture(scope="session")
+async def existing_shorted_urls_for_search(
+    session: AsyncSession
+) -> list[ShortedUrl]:
+    """Возвращает список тестовых ShortedUrl для поиска."""
+    urls_service = get_urls_service(session)
+    return [
+        *[await urls_service.create_new_url_with_lock(
+            f"https://WWW.Search-Host.test/promo/{number}"
+        ) for number in range(5)],
+        await urls_service.create_new_url_with_lock(
+            "https://other.search-host.test/promo_100%"
+        ),
+    ]
+
+
+def test_get_original_host() -> None:
+    """Тестирование нормализации хоста оригинального url."""
+    assert get_original_host("https://User@WWW.Example.COM.:8080/a?b") == "example.com"
+    assert get_original_host("http://sub.example.com") == "sub.example.com"
+    assert get_original_host("http://[::1") is None
+
+
+@pytest.mark.asyncio(loop_scope="session")
+@pytest.mark.usefixtures("existing_shorted_urls_for_search")
+async def test_search_links_by_host_with_cursor(
+    unauthorized_client: AsyncClient,
+) -> None:
+    """Тестирование поиска по хосту с keyset пагинацией."""
+    response = await unauthorized_client.get(
+        "/api/links/search", params={"host": "www.SEARCH-host.test", "limit": 3}
+    )
+    assert response.status_code == 200
+    first_page = [link["original_url"] for link in response.json()]
+    # Новые ссылки первыми.
+    assert first_page == [f"https://WWW.Search-Host.test/promo/{number}"
+                          for number in (4, 3, 2)]
+
+    response = await unauthorized_client.get("/api/links/search", params={
+        "host": "search-host.test", "limit": 3,
+        "cursor": response.headers["x-next-cursor"],
+    })
+    assert response.status_code == 200
+    assert [link["original_url"] for link in response.json()] == [
+        "https://WWW.Search-Host.test/promo/1", "https://WWW.Search-Host.test/promo/0",
+    ]
+    # Неполная страница - последняя.
+    assert "x-next-cursor" not in response.headers
+
+
+@pytest.mark.asyncio(loop_scope="session")
+@pytest.mark.usefixtures("existing_shorted_urls_for_search")
+async def test_search_links_by_substring(unauthorized_client: AsyncClient) -> None:
+    """Тестирование поиска по подстроке без учета регистра и спецсимволов LIKE."""
+    response = await unauthorized_client.get(
+        "/api/links/search", params={"q": "SEARCH-HOST.test/promo"}
+    )
+    assert response.status_code == 200
+    assert len(response.json()) == 6
+
+    # % и _ ищутся как есть.
+    response = await unauthorized_client.get(
+        "/api/links/search", params={"q": "promo_100%"}
+    )
+    assert [link["original_url"] for link in response.json()] == [
+        "https://other.search-host.test/promo_100%"
+    ]
+
+    response = await unauthorized_client.get(
+        "/api/links/search", params={"q": "promo", "host": "other.search-host.test"}
+    )
+    assert len(response.json()) == 1
+
+
+@pytest.mark.asyncio(loop_scope="session")
+@pytest.mark.parametrize("params", [{}, {"q": "ab"}, {"q": "", "host": ""}])
+async def test_search_links_bad_request(
+    unauthorized_client: AsyncClient,
+    params: dict[str, str],
+) -> None:
+    """Тестирование поиска без условий и со слишком короткой подстрокой."""
+    response = await unauthorized_client.get("/api/links/search", params=params)
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_random_allocator_skips_search_alias(
+    session: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Тестирование того, что рандомный аллокатор не выдает алиас search."""
+    alias_numeric_service = get_alias_numeric_service()
+    probes = iter([
+        alias_numeric_service.get_alias_numeric_from_alias("search"),
+        alias_numeric_service.get_alias_numeric_from_alias("SRCHfree"),
+    ])
+    monkeypatch.setattr(core.services, "randint", lambda *_: next(probes))
+
+    shorted_url = await get_urls_service(session).create_new_url_with_lock(
+        "https://search.reserved/"
+    )
+    assert shorted_url.alias == "SRCHfree"
+
+    with pytest.raises(ValueError, match="alias already taken"):
+        await get_urls_service(session).create_new_url_with_lock(
+            "https://search.reserved/", "search"
+        )
+    await session.rollback()
@@ -3,7 +3,9 @@ import pytest
 from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from api.shorten import routes
 from core.services import get_urls_service
+from core.validators import is_valid_alias, is_valid_original_url
 from database.models import ShortedUrl
 
 
@@ -56,6 +58,54 @@ async def test_api_shorten_fail_incorrect_url_or_custom_alias(
     assert response.status_code == 400
 
 
+@pytest.mark.parametrize(("url", "is_valid"), [
+    ("http://a", True),
+    ("https://" + "a" * 2040, True),
+    ("https://" + "a" * 2041, False),
+    # Старый паттерн не ограничивал длину http:// url.
+    ("http://" + "a" * 5000, False),
+    ("http://", False),
+    ("ftp://a.com/", False),
+    ("HTTPS://a.com/", False),
+    ("https://a.com/\n", False),
+])
+def test_is_valid_original_url(url: str, *, is_valid: bool) -> None:
+    """Тестирование проверки схемы и длины оригинального url."""
+    assert is_valid_original_url(url) is is_valid
+
+
+def test_is_valid_alias() -> None:
+    """Тестирование проверки длины и символов алиаса."""
+    assert is_valid_alias("AA-_09zz")
+    assert not is_valid_alias("AAAA\n")
+    assert not is_valid_alias("AAAA" * 10)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_api_shorten_invalid_body_skips_database(
+    unauthorized_client: AsyncClient,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Тестирование того, что некорректное тело отклоняется до базы данных."""
+    def get_urls_service_unreachable(*_: object) -> None:
+        msg = "database must not be touched"
+        raise AssertionError(msg)
+
+    monkeypatch.setattr(routes, "get_urls_service", get_urls_service_unreachable)
+
+    response = await unauthorized_client.post("/api/shorten", json={
+        "url": "https://" + "a" * 100_000, "custom_alias": "AAAA"
+    })
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("url must match pattern")
+
+    response = await unauthorized_client.post("/api/shorten", json={
+        "url": "https://CorrectOk.com/", "custom_alias": "A,A,"
+    })
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("custom_alias must match pattern")
+
+
 @pytest.mark.asyncio(loop_scope="session")
 @pytest.mark.parametrize(("url", "custom_alias"), [
     ("https://wikipedia.ru/", "QQQQ"),
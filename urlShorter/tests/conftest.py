@@ -15,6 +15,8 @@ from sqlalchemy.ext.asyncio import (
 
 from core.config import DATABASE_URL_SUFFIX, TEST_DATABASE_NAME
 from core.services import get_urls_service
+from core.timing import TimedAsyncAdaptedQueuePool, install_timing_events
+from database import database
 from database.database import get_db
 from database.models import Base, ShortedUrl
 from fast import app
@@ -25,9 +27,12 @@ from fast import app
 @pytest_asyncio.fixture(scope="session", autouse=True)
 async def async_engine() -> AsyncGenerator[AsyncEngine]:
     """Фикстура для создания async_engine'а."""
-    yield create_async_engine("postgresql+asyncpg" + \
+    engine = create_async_engine("postgresql+asyncpg" + \
                                 DATABASE_URL_SUFFIX.format(TEST_DATABASE_NAME), \
-                                echo=False, future=True)
+                                echo=False, future=True,
+                                poolclass=TimedAsyncAdaptedQueuePool)
+    install_timing_events(engine.sync_engine)
+    yield engine
 
 
 @pytest_asyncio.fixture(scope="session", autouse=True)
@@ -64,6 +69,9 @@ async def override_get_db(
         async with async_session_local() as db:
             yield db
     app.dependency_overrides[get_db] = _get_test_db
+    # Фоновые задачи приложения тоже должны работать с тестовой базой данных.
+    database.DATABASE_ASYNC_URL = "postgresql+asyncpg" + \
+        DATABASE_URL_SUFFIX.format(TEST_DATABASE_NAME)
 
 # ----------------------------------------------------------------------
 
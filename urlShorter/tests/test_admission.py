@@ -0,0 +1,134 @@
+"""Модуль тестирования контроля допуска запросов."""
+import asyncio
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from starlette.types import Receive, Scope, Send
+
+from core.admission import (
+    API_ROUTE_CLASS,
+    REDIRECT_ROUTE_CLASS,
+    SHORTEN_ROUTE_CLASS,
+    AdmissionController,
+    AdmissionControlMiddleware,
+    RouteClass,
+    get_route_class,
+)
+
+REDIRECT = RouteClass("redirect", 0, 2, 10, 1)
+SHORTEN = RouteClass("shorten", 1, 1, 1, 0.05)
+
+
+def test_get_route_class() -> None:
+    """Тестирование классификации запросов по пути и методу."""
+    def scope(method: str, path: str) -> Scope:
+        return {"type": "http", "method": method, "path": path}
+
+    assert get_route_class(scope("GET", "/ABBA")) == REDIRECT_ROUTE_CLASS
+    assert get_route_class(scope("POST", "/api/shorten")) == SHORTEN_ROUTE_CLASS
+    assert get_route_class(scope("GET", "/api/links")) == API_ROUTE_CLASS
+    assert get_route_class(scope("DELETE", "/api/links/ABBA")) == API_ROUTE_CLASS
+    assert get_route_class(scope("GET", "/internal/metrics")) is None
+    assert get_route_class(scope("GET", "/openapi.json")) is None
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_admission_priority() -> None:
+    """Тестирование того, что освободившееся место первым получает редирект."""
+    controller = AdmissionController(1, [SHORTEN, REDIRECT])
+    assert await controller.acquire(REDIRECT)
+
+    shorten_task = asyncio.create_task(controller.acquire(SHORTEN))
+    redirect_task = asyncio.create_task(controller.acquire(REDIRECT))
+    await asyncio.sleep(0)
+
+    controller.release(REDIRECT)
+    assert await redirect_task
+    # Место занято редиректом, и бюджет ожидания shorten истекает.
+    assert not await shorten_task
+    assert not any(controller.waiters.values())
+
+    controller.release(REDIRECT)
+    assert controller.active_count == 0
+    assert await controller.acquire(SHORTEN)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_admission_class_limit_and_queue_size() -> None:
+    """Тестирование лимита класса и отклонения при заполненной очереди."""
+    controller = AdmissionController(10, [SHORTEN, REDIRECT])
+    assert await controller.acquire(SHORTEN)
+    # Лимит класса не мешает другому классу.
+    assert await controller.acquire(REDIRECT)
+
+    queued_task = asyncio.create_task(controller.acquire(SHORTEN))
+    await asyncio.sleep(0)
+    # Очередь shorten (1 место) заполнена: отказ без ожидания.
+    assert not await controller.acquire(SHORTEN)
+
+    controller.release(SHORTEN)
+    assert await queued_task
+    assert controller.active_counts == {"shorten": 1, "redirect": 1}
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_class_waiting_on_own_limit_does_not_block_others() -> None:
+    """Тестирование отсутствия блокировки очереди классом, упершимся в лимит."""
+    controller = AdmissionController(10, [SHORTEN, REDIRECT])
+    assert await controller.acquire(REDIRECT)
+    assert await controller.acquire(REDIRECT)
+
+    queued_task = asyncio.create_task(controller.acquire(REDIRECT))
+    await asyncio.sleep(0)
+    # Редирект ждет места в своем лимите, общий лимит свободен.
+    assert await controller.acquire(SHORTEN)
+
+    controller.release(REDIRECT)
+    assert await queued_task
+    assert controller.active_counts == {"shorten": 1, "redirect": 2}
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_cancelled_waiter_does_not_leak_slot() -> None:
+    """Тестирование того, что отмененное ожидание не занимает место."""
+    controller = AdmissionController(1, [REDIRECT])
+    assert await controller.acquire(REDIRECT)
+
+    waiting_task = asyncio.create_task(controller.acquire(REDIRECT))
+    await asyncio.sleep(0)
+    waiting_task.cancel()
+    controller.release(REDIRECT)
+    with pytest.raises(asyncio.CancelledError):
+        await waiting_task
+
+    assert controller.active_count == 0
+    assert not controller.waiters["redirect"]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_admission_middleware_rejects_with_retry_after() -> None:
+    """Тестирование ответа 503 с Retry-After при перегрузке."""
+    release_request = asyncio.Event()
+
+    async def slow_app(scope: Scope, receive: Receive, send: Send) -> None:  # noqa: ARG001
+        await release_request.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    controller = AdmissionController(1, [
+        REDIRECT_ROUTE_CLASS, SHORTEN_ROUTE_CLASS, API_ROUTE_CLASS,
+    ])
+    middleware = AdmissionControlMiddleware(slow_app, controller)
+    async with AsyncClient(transport=ASGITransport(app=middleware),
+                           base_url="http://test") as client:
+        slow_request = asyncio.create_task(client.get("/SLOW"))
+        await asyncio.sleep(0.01)
+
+        response = await client.get("/api/links")
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "1"
+
+        release_request.set()
+        assert (await slow_request).status_code == 200
+
+    assert controller.active_count == 0
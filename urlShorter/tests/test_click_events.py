@@ -0,0 +1,145 @@
+"""Модуль тестирования лога событий переходов и агрегатов."""
+from datetime import UTC, datetime
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import routes
+from core.clicks import (
+    ClickEventsBuffer,
+    UserAgentClass,
+    get_click_events_service,
+    get_known_click_events_partitions,
+    get_referrer_host,
+    get_user_agent_class,
+)
+from core.services import get_urls_service
+from database.models import click_events_table
+
+
+def test_click_event_classification() -> None:
+    """Тестирование определения хоста Referer и класса User-Agent."""
+    assert get_referrer_host("https://News.Example.com/a?b=c") == "news.example.com"
+    assert get_referrer_host(None) is None
+    assert get_user_agent_class("Googlebot/2.1") == UserAgentClass.BOT
+    assert get_user_agent_class(
+        "Mozilla/5.0 (iPhone; CPU iPhone OS 17_0) Mobile/15E148"
+    ) == UserAgentClass.MOBILE
+    assert get_user_agent_class("Mozilla/5.0 (X11; Linux x86_64)") \
+        == UserAgentClass.DESKTOP
+    assert get_user_agent_class(None) == UserAgentClass.UNKNOWN
+
+
+def test_click_events_buffer_overflow() -> None:
+    """Тестирование вытеснения старых событий при переполнении буфера."""
+    click_events_buffer = ClickEventsBuffer(2)
+    for shorted_url_id in range(3):
+        click_events_buffer.add(shorted_url_id, None, None)
+
+    assert click_events_buffer.dropped_count == 1
+    events = click_events_buffer.drain()
+    assert [event[0] for event in events] == [1, 2]
+
+    click_events_buffer.restore(events)
+    assert click_events_buffer.drain() == events
+
+
+def test_click_events_buffer_restore_into_full_buffer() -> None:
+    """Тестирование возврата событий в заполнившийся во время записи буфер."""
+    click_events_buffer = ClickEventsBuffer(3)
+    for shorted_url_id in range(3):
+        click_events_buffer.add(shorted_url_id, None, None)
+    events = click_events_buffer.drain()
+
+    # Пока пачка писалась, пришли новые события.
+    for shorted_url_id in range(3, 5):
+        click_events_buffer.add(shorted_url_id, None, None)
+    click_events_buffer.restore(events)
+
+    # Вытеснены самые старые из возвращенных, новые события сохранены.
+    assert click_events_buffer.dropped_count == 2
+    assert [event[0] for event in click_events_buffer.drain()] == [2, 3, 4]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_click_events_flush_and_stats(
+    unauthorized_client: AsyncClient,
+    session: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Тестирование записи событий переходов и GET /api/links/{alias}/stats."""
+    # Отдельный буфер, чтобы фоновая задача приложения не забрала события теста.
+    click_events_buffer = ClickEventsBuffer(100)
+    monkeypatch.setattr(routes, "get_click_events_buffer", lambda: click_events_buffer)
+
+    shorted_url = await get_urls_service(session).create_new_url_with_lock(
+        "https://click.events/", "CLICK_EVENTS"
+    )
+    shorted_url_id = shorted_url.id
+
+    for _ in range(3):
+        response = await unauthorized_client.get(
+            "CLICK_EVENTS",
+            headers={"Referer": "https://ref.example/page",
+                     "User-Agent": "Mozilla/5.0 (X11; Linux x86_64)"},
+        )
+        assert response.status_code == 301
+
+    events = click_events_buffer.drain()
+    assert len(events) == 3
+
+    click_events_service = get_click_events_service(session)
+    assert await click_events_service.write_click_events(events) == 3
+
+    stored_count = await session.scalar(select(func.count()).where(
+        click_events_table.c.shorted_url_id == shorted_url_id,
+        click_events_table.c.referrer_host == "ref.example",
+        click_events_table.c.user_agent_class == UserAgentClass.DESKTOP,
+    ))
+    assert stored_count == 3
+
+    # Повторная запись тех же событий инкрементально увеличивает агрегаты.
+    await click_events_service.write_click_events(events[:1])
+
+    response = await unauthorized_client.get("/api/links/CLICK_EVENTS/stats")
+    assert response.status_code == 200
+    stats = response.json()
+    assert stats["alias"] == "CLICK_EVENTS"
+    assert sum(bucket["clicks"] for bucket in stats["hourly"]) == 4
+    assert sum(bucket["clicks"] for bucket in stats["daily"]) == 4
+
+    response = await unauthorized_client.get("/api/links/NO_CLICK_EVENTS/stats")
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_click_events_partition_not_cached_after_rollback(
+    session: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Тестирование того, что откаченная партиция не считается созданной."""
+    click_events_service = get_click_events_service(session)
+    # Далекий день, партиции которого точно нет.
+    occurred_at = 4_000_000_000.0
+    day = datetime.fromtimestamp(occurred_at, UTC).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+
+    async def failing_upsert_rollups(*_: object) -> None:
+        msg = "rollups failed"
+        raise RuntimeError(msg)
+
+    monkeypatch.setattr(click_events_service, "_upsert_rollups",
+                        failing_upsert_rollups)
+    with pytest.raises(RuntimeError):
+        await click_events_service.write_click_events([(1, occurred_at, None, None)])
+    await session.rollback()
+    assert day not in get_known_click_events_partitions()
+
+    monkeypatch.undo()
+    assert await click_events_service.write_click_events(
+        [(1, occurred_at, None, None)]
+    ) == 1
+    assert day in get_known_click_events_partitions()
@@ -0,0 +1,51 @@
+"""Модуль тестирования режима дедупликации оригинальных url."""
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core import services
+from core.services import get_urls_service
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_deduplication_returns_existing_url(
+    session: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Тестирование повторного сокращения url в режиме дедупликации."""
+    monkeypatch.setattr(services, "URL_DEDUPLICATION_ENABLED", True)
+    urls_service = get_urls_service(session)
+
+    # Атрибуты запоминаются сразу, так как следующий коммит их expire'ит.
+    first_alias = (
+        await urls_service.create_new_url_with_lock("https://dedup.me/")
+    ).alias
+    second_alias = (
+        await urls_service.create_new_url_with_lock("https://dedup.me/")
+    ).alias
+    other_alias = (
+        await urls_service.create_new_url_with_lock("https://dedup.me/other")
+    ).alias
+
+    assert second_alias == first_alias
+    assert other_alias != first_alias
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_deduplication_skipped_for_custom_alias(
+    session: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Тестирование того, что custom_alias всегда создает новую ссылку."""
+    monkeypatch.setattr(services, "URL_DEDUPLICATION_ENABLED", True)
+    urls_service = get_urls_service(session)
+
+    deduplicated_alias = (
+        await urls_service.create_new_url_with_lock("https://dedup.custom/")
+    ).alias
+    custom_url = await urls_service.create_new_url_with_lock(
+        "https://dedup.custom/", "DEDUP_CUSTOM"
+    )
+
+    assert custom_url.alias == "DEDUP_CUSTOM"
+    assert custom_url.alias != deduplicated_alias
+    assert custom_url.original_url_hash is None
@@ -0,0 +1,94 @@
+"""Модуль тестирования кэша редиректов на прокси и его очистки."""
+import httpx
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import api.links.routes
+from core import edge_cache
+from core.edge_cache import NginxEdgeCachePurger
+from core.hot_links import get_hot_links_tracker
+from core.services import get_urls_service
+from database.models import ShortedUrl
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_redirect_edge_cache_headers(
+    unauthorized_client: AsyncClient,
+    existing_shorted_url: ShortedUrl,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Тестирование X-Accel-Expires редиректа, 404 и запроса очистки."""
+    response = await unauthorized_client.get(existing_shorted_url.alias)
+    assert "x-accel-expires" not in response.headers
+
+    monkeypatch.setattr(edge_cache, "EDGE_CACHE_REDIRECT_SECONDS", 30)
+    response = await unauthorized_client.get(existing_shorted_url.alias)
+    assert response.status_code == 301
+    assert response.headers["x-accel-expires"] == "30"
+
+    response = await unauthorized_client.get("EDGE_MISSING")
+    assert response.status_code == 404
+    assert response.headers["x-accel-expires"] == "1"
+
+    # Заголовок без верного токена - обычный переход.
+    monkeypatch.setattr(edge_cache, "EDGE_CACHE_PURGE_TOKEN", "purge-secret")
+    hot_links_tracker = get_hot_links_tracker()
+    clicks = hot_links_tracker.counts.get(existing_shorted_url.alias, 0)
+    response = await unauthorized_client.get(
+        existing_shorted_url.alias, headers={"X-Edge-Purge": "1"}
+    )
+    assert response.status_code == 301
+    assert hot_links_tracker.counts[existing_shorted_url.alias] == clicks + 1
+
+    # Запрос очистки не считается переходом.
+    response = await unauthorized_client.get(
+        existing_shorted_url.alias, headers={"X-Edge-Purge": "purge-secret"}
+    )
+    assert response.status_code == 301
+    assert hot_links_tracker.counts[existing_shorted_url.alias] == clicks + 1
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_delete_link_purges_edge_cache(
+    unauthorized_client: AsyncClient,
+    session: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Тестирование очистки кэша прокси при удалении ссылки."""
+    await get_urls_service(session).create_new_url_with_lock(
+        "https://edge.cache/", "EDGE_DEL"
+    )
+    purge_requests: list[httpx.Request] = []
+
+    def handle_purge(request: httpx.Request) -> httpx.Response:
+        purge_requests.append(request)
+        return httpx.Response(404)
+
+    purger = NginxEdgeCachePurger(
+        ["http://edge-1/", "http://edge-2"], "purge-secret", 1,
+        transport=httpx.MockTransport(handle_purge),
+    )
+    monkeypatch.setattr(api.links.routes, "get_edge_cache_purger", lambda: purger)
+
+    response = await unauthorized_client.delete("/api/links/EDGE_DEL")
+    assert response.status_code == 204
+    assert sorted(str(request.url) for request in purge_requests) == [
+        "http://edge-1/EDGE_DEL", "http://edge-2/EDGE_DEL"
+    ]
+    assert all(request.headers["x-edge-purge"] == "purge-secret"
+               for request in purge_requests)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_edge_cache_purge_errors_are_ignored() -> None:
+    """Тестирование того, что недоступный прокси не ломает удаление."""
+    def refuse_connection(request: httpx.Request) -> httpx.Response:
+        msg = "Connection refused"
+        raise httpx.ConnectError(msg, request=request)
+
+    purger = NginxEdgeCachePurger(
+        ["http://edge-down"], "purge-secret", 1,
+        transport=httpx.MockTransport(refuse_connection),
+    )
+    await purger.purge(["EDGE_DOWN"])
@@ -0,0 +1,122 @@
+"""Модуль тестирования истечения срока жизни ссылок."""
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text, update
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from core.cache import get_redirect_cache
+from core.services import get_alias_numeric_service, get_urls_service
+from database.models import ShortedUrl
+from fast import app
+
+
+async def _expire_shorted_url(session: AsyncSession, alias: str) -> None:
+    """Перевод срока жизни ссылки в прошлое."""
+    await session.execute(update(ShortedUrl).where(ShortedUrl.alias == alias).values(
+        expires_at=datetime.now(UTC) - timedelta(minutes=1)
+    ))
+    await session.commit()
+    # Изменение в обход сервиса: кэш редиректов о нем не знает.
+    get_redirect_cache().invalidate(alias)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_api_shorten_fail_expires_at_in_past(
+    unauthorized_client: AsyncClient,
+) -> None:
+    """Тестирование POST /api/shorten с уже прошедшим expires_at."""
+    data = {
+        "url": "https://expired.already/",
+        "expires_at": (datetime.now(UTC) - timedelta(days=1)).isoformat(),
+    }
+
+    # Отдельный IP, чтобы не упереться в лимит создания ссылок других тестов.
+    async with AsyncClient(
+        transport=ASGITransport(app=app, client=("10.0.0.28", 123)),
+        base_url=unauthorized_client.base_url,
+    ) as client:
+        response = await client.post("/api/shorten", json=data)
+
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_goto_expired_shorted_url(
+    unauthorized_client: AsyncClient,
+    session: AsyncSession,
+) -> None:
+    """Тестирование GET /{alias} с истекшей, но еще не удаленной ссылкой."""
+    shorted_url = await get_urls_service(session).create_new_url_with_lock(
+        "https://expires.soon/", "EXP_GOTO",
+        expires_at=datetime.now(UTC) + timedelta(days=1),
+    )
+
+    response = await unauthorized_client.get(shorted_url.alias)
+    assert response.status_code == 301
+
+    await _expire_shorted_url(session, "EXP_GOTO")
+
+    response = await unauthorized_client.get("EXP_GOTO")
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_delete_expired_urls_with_lock(
+    session: AsyncSession,
+) -> None:
+    """Тестирование пакетного удаления истекших ссылок."""
+    urls_service = get_urls_service(session)
+
+    # EXPR и EXPS - соседние alias_numeric.
+    previous_url = await urls_service.create_new_url_with_lock(
+        "https://expires.previous/", "EXPR"
+    )
+    await urls_service.create_new_url_with_lock(
+        "https://expires.next/", "EXPS",
+        expires_at=datetime.now(UTC) + timedelta(days=1),
+    )
+    await session.refresh(previous_url)
+    assert previous_url.available_after is False
+
+    await _expire_shorted_url(session, "EXPS")
+
+    deleted_aliases = await urls_service.delete_expired_urls_with_lock(1000)
+    assert "EXPS" in deleted_aliases
+
+    assert await urls_service.get_shorted_url_by_alias("EXPS") is None
+    await session.refresh(previous_url)
+    assert previous_url.available_after is True
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_delete_expired_urls_skips_locked_aliases(
+    session: AsyncSession,
+    async_engine: AsyncEngine,
+) -> None:
+    """Тестирование пропуска истекших ссылок, заблокированных другой транзакцией."""
+    urls_service = get_urls_service(session)
+    for alias in ("EXPLCK", "EXPFRE"):
+        await urls_service.create_new_url_with_lock(
+            f"https://expires.{alias.lower()}/", alias,
+            expires_at=datetime.now(UTC) + timedelta(days=1),
+        )
+        await _expire_shorted_url(session, alias)
+
+    locked_alias_numeric = get_alias_numeric_service().get_alias_numeric_from_alias(
+        "EXPLCK"
+    )
+    async with async_engine.connect() as other_connection:
+        # Другая транзакция (например, создание соседней ссылки) держит блокировку.
+        await other_connection.execute(text(
+            f"SELECT pg_advisory_xact_lock({locked_alias_numeric});"
+        ))
+
+        deleted_aliases = await urls_service.delete_expired_urls_with_lock(1000)
+        assert "EXPFRE" in deleted_aliases
+        assert "EXPLCK" not in deleted_aliases
+
+        await other_connection.rollback()
+
+    assert await urls_service.delete_expired_urls_with_lock(1000) == ["EXPLCK"]
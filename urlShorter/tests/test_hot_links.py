@@ -0,0 +1,94 @@
+"""Модуль тестирования популярных ссылок и кэша редиректов."""
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import internal.routes
+from core.cache import CachedRedirect, RedirectCache, get_redirect_cache
+from core.hot_links import SpaceSavingTopK, get_hot_links_tracker
+from core.services import get_urls_service
+from core.tasks import warm_up_redirect_cache
+from database.models import ShortedUrl
+
+
+def test_space_saving_top_k() -> None:
+    """Тестирование поиска популярных алиасов в ограниченной памяти."""
+    tracker = SpaceSavingTopK(10)
+    for i in range(1_000):
+        tracker.add("HOT")
+        if i % 2 == 0:
+            tracker.add("WARM")
+        tracker.add(f"COLD_{i}")
+
+    assert len(tracker.counts) == 10
+    top = tracker.top(2)
+    assert [alias for alias, _, _ in top] == ["HOT", "WARM"]
+    # Счетчик завышен не больше, чем на погрешность.
+    hot_alias, hot_count, hot_error = top[0]
+    assert hot_count - hot_error <= 1_000 <= hot_count
+
+    tracker.decay()
+    assert tracker.top(1)[0][0] == "HOT"
+    assert sum(len(bucket) for bucket in tracker.buckets.values()) \
+        == len(tracker.counts)
+
+
+def test_redirect_cache_lru_and_pinning() -> None:
+    """Тестирование вытеснения и закрепления алиасов в кэше."""
+    redirect_cache = RedirectCache(2, 60)
+    redirect_cache.pin({"PINNED": CachedRedirect(1, "https://pinned/", None)})
+    for i in range(3):
+        redirect_cache.set(f"ALIAS_{i}", CachedRedirect(i, f"https://{i}/", None))
+
+    assert redirect_cache.get("ALIAS_0") is None
+    assert redirect_cache.get("ALIAS_2") is not None
+    assert redirect_cache.get("PINNED") == CachedRedirect(1, "https://pinned/", None)
+
+    redirect_cache.invalidate("PINNED")
+    assert redirect_cache.get("PINNED") is None
+
+    expired_cache = RedirectCache(2, -1)
+    expired_cache.set("EXPIRED", CachedRedirect(1, "https://expired/", None))
+    assert expired_cache.get("EXPIRED") is None
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_hot_links_warmup(
+    unauthorized_client: AsyncClient,
+    session: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Тестирование прогрева кэша популярными ссылками и GET /internal/hot-links."""
+    await get_urls_service(session).create_new_url_with_lock(
+        "https://hot.link/", "HOT_LINK"
+    )
+
+    for _ in range(5):
+        response = await unauthorized_client.get("HOT_LINK")
+        assert response.status_code == 301
+
+    response = await unauthorized_client.get("/internal/hot-links")
+    assert response.status_code == 403
+
+    monkeypatch.setattr(internal.routes, "INTERNAL_API_TOKEN", "secret")
+    response = await unauthorized_client.get(
+        "/internal/hot-links", headers={"Authorization": "Bearer secret"}
+    )
+    assert response.status_code == 200
+    hot_links = {hot_link["alias"]: hot_link for hot_link in response.json()}
+    assert hot_links["HOT_LINK"]["clicks"] >= 5
+
+    get_redirect_cache().invalidate("HOT_LINK")
+    await warm_up_redirect_cache()
+    assert "HOT_LINK" in get_redirect_cache().pinned_entries
+    assert "HOT_LINK" in {alias for alias, _, _ in get_hot_links_tracker().top(100)}
+
+    # Закрепленная ссылка отдается из кэша без чтения из базы.
+    await session.execute(update(ShortedUrl).where(
+        ShortedUrl.alias == "HOT_LINK"
+    ).values(original_url="https://changed.link/"))
+    await session.commit()
+
+    response = await unauthorized_client.get("HOT_LINK")
+    assert response.headers["location"] == "https://hot.link/"
@@ -0,0 +1,117 @@
+"""Модуль тестирования условных запросов (ETag, If-None-Match)."""
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import routes
+from core.services import get_urls_service
+from core.visitors import get_visitor_sketches
+from database.models import ShortedUrl
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_link_detail_conditional_request(
+    unauthorized_client: AsyncClient,
+    existing_shorted_url: ShortedUrl,
+) -> None:
+    """Тестирование 304 для GET /api/links/{alias} и смены ETag после клика."""
+    url = f"/api/links/{existing_shorted_url.alias}"
+    response = await unauthorized_client.get(url)
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "no-cache"
+    etag = response.headers["etag"]
+    assert etag.startswith('W/"')
+
+    response = await unauthorized_client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+    # Сильный вариант того же тега тоже совпадает (слабое сравнение).
+    response = await unauthorized_client.get(
+        url, headers={"If-None-Match": f'"other", {etag.removeprefix("W/")}'}
+    )
+    assert response.status_code == 304
+
+    response = await unauthorized_client.get(existing_shorted_url.alias)
+    assert response.status_code == 301
+
+    response = await unauthorized_client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_link_detail_etag_changes_with_visitors_and_expiry(
+    unauthorized_client: AsyncClient,
+    session: AsyncSession,
+) -> None:
+    """Тестирование смены ETag ссылки без кликов: по скетчу и сроку жизни."""
+    shorted_url = await get_urls_service(session).create_new_url_with_lock(
+        "https://etag.visitors/"
+    )
+    url = f"/api/links/{shorted_url.alias}"
+    response = await unauthorized_client.get(url)
+    etag = response.headers["etag"]
+    assert response.json()["unique_visitors"] == 0
+
+    # Изменился только скетч посетителей.
+    get_visitor_sketches().add(shorted_url.id, "10.0.41.1")
+    response = await unauthorized_client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["unique_visitors"] == 1
+    etag = response.headers["etag"]
+
+    # Изменился только срок жизни.
+    await session.execute(
+        update(ShortedUrl).where(ShortedUrl.id == shorted_url.id)
+        .values(expires_at=datetime.now(UTC) + timedelta(days=1))
+    )
+    await session.commit()
+    response = await unauthorized_client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["expires_at"] is not None
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_links_list_conditional_request(
+    unauthorized_client: AsyncClient,
+    existing_shorted_url_for_get_links: list[ShortedUrl],
+) -> None:
+    """Тестирование 304 для GET /api/links по версии страницы."""
+    params = {"page": 1, "per_page": 5}
+    response = await unauthorized_client.get("/api/links", params=params)
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+
+    response = await unauthorized_client.get(
+        "/api/links", params=params, headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 304
+
+    response = await unauthorized_client.get(
+        "/api/links", params={"page": 2, "per_page": 5},
+        headers={"If-None-Match": etag},
+    )
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert len(response.json()) == min(5, len(existing_shorted_url_for_get_links))
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_redirect_cache_control(
+    unauthorized_client: AsyncClient,
+    existing_shorted_url: ShortedUrl,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Тестирование настраиваемого Cache-Control редиректа."""
+    response = await unauthorized_client.get(existing_shorted_url.alias)
+    assert response.status_code == 301
+    assert "cache-control" not in response.headers
+
+    monkeypatch.setattr(routes, "REDIRECT_CACHE_CONTROL", "private, max-age=60")
+    response = await unauthorized_client.get(existing_shorted_url.alias)
+    assert response.headers["cache-control"] == "private, max-age=60"
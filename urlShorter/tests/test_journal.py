@@ -0,0 +1,94 @@
+"""Модуль тестирования локального журнала кликов."""
+import fcntl
+import os
+from pathlib import Path
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import routes
+from core.journal import (
+    SideEffectsJournal,
+    get_side_effects_journal_service,
+    iter_click_records,
+    pack_click_record,
+)
+from core.services import get_urls_service
+
+
+def test_click_records_torn_tail() -> None:
+    """Тестирование чтения записей с недописанной последней записью."""
+    data = pack_click_record(1, 10.0) + pack_click_record(2, 20.0)
+
+    assert list(iter_click_records(data + data[:5])) == [(1, 10.0), (2, 20.0)]
+    assert list(iter_click_records(b"\0" * len(data))) == []
+
+
+def test_segment_is_locked_before_visible(tmp_path: Path) -> None:
+    """Тестирование того, что видимый сегмент уже заблокирован пишущим воркером."""
+    # Временный сегмент воркера, упавшего до переименования.
+    (tmp_path / "1-1.journal.tmp").write_bytes(b"")
+
+    journal = SideEffectsJournal(str(tmp_path))
+    journal.append_click(1)
+    journal.sync()
+    journal.rotate()
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted(
+        path.name for path in (*journal.get_sealed_segments(), journal.segment_path)
+    )
+    fd = os.open(journal.segment_path, os.O_RDONLY)
+    try:
+        with pytest.raises(BlockingIOError):
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    finally:
+        os.close(fd)
+    assert len(journal.get_sealed_segments()) == 1
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_journal_redirect_and_replay(
+    unauthorized_client: AsyncClient,
+    session: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    """Тестирование кликов через журнал и применения сегмента упавшего воркера."""
+    journal = SideEffectsJournal(str(tmp_path))
+    monkeypatch.setattr(routes, "get_side_effects_journal", lambda: journal)
+
+    shorted_url = await get_urls_service(session).create_new_url_with_lock(
+        "https://journal.clicks/", "JOURNAL_CLICKS"
+    )
+    shorted_url_id = shorted_url.id
+
+    for _ in range(3):
+        response = await unauthorized_client.get("JOURNAL_CLICKS")
+        assert response.status_code == 301
+
+    # Сегмент воркера, упавшего посреди записи.
+    orphan_segment = tmp_path / "1-1.journal"
+    orphan_segment.write_bytes(
+        pack_click_record(shorted_url_id, 1.0) * 2 + b"\1\2\3"
+    )
+
+    await session.refresh(shorted_url)
+    assert shorted_url.clicks == 0
+
+    journal.rotate()
+    journal_service = get_side_effects_journal_service(session)
+    for segment_path in journal.get_sealed_segments():
+        await journal_service.apply_segment(segment_path)
+
+    assert journal.get_sealed_segments() == []
+    await session.refresh(shorted_url)
+    assert shorted_url.clicks == 5
+    assert shorted_url.last_clicked_at is not None
+
+    # Сегмент, уже примененный до падения, повторно не применяется.
+    orphan_segment.write_bytes(pack_click_record(shorted_url_id, 1.0))
+    await journal_service.apply_segment(orphan_segment)
+    await session.refresh(shorted_url)
+    assert shorted_url.clicks == 5
+    assert not orphan_segment.exists()
@@ -0,0 +1,108 @@
+"""Модуль тестирования метрик /internal/metrics."""
+import json
+import re
+from pathlib import Path
+
+import pytest
+from httpx import AsyncClient
+
+import internal.routes
+from core import metrics
+from database.models import ShortedUrl
+
+AUTHORIZATION = {"Authorization": "Bearer secret"}
+
+
+def _get_sample(body: str, sample: str) -> float:
+    """Получение значения строки метрики из текстового формата Prometheus."""
+    match = re.search(rf"^{re.escape(sample)} (\S+)$", body, re.MULTILINE)
+    assert match is not None, sample
+    return float(match.group(1))
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_metrics_endpoint(
+    unauthorized_client: AsyncClient,
+    existing_shorted_url: ShortedUrl,
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    """Тестирование метрик текущего воркера и агрегации с другими воркерами."""
+    response = await unauthorized_client.get(existing_shorted_url.alias)
+    assert response.status_code == 301
+
+    monkeypatch.setattr(metrics, "METRICS_DIR", str(tmp_path))
+    own_probes = metrics.ALLOCATOR_PROBES.values.get(("random",), 0.0)
+    # Метрики другого воркера того же хоста.
+    (tmp_path / "1.json").write_text(json.dumps({
+        "alias_allocator_probes_total": [[["random"], 7]],
+        "http_request_duration_seconds": [
+            [["GET", "/{alias}"], [1] + [0] * len(metrics.DEFAULT_BUCKETS) + [0.001]]
+        ],
+    }))
+
+    own_redirects = metrics.HTTP_REQUEST_DURATION.values[("GET", "/{alias}")]
+    response = await unauthorized_client.get("/internal/metrics")
+    assert response.status_code == 403
+
+    monkeypatch.setattr(internal.routes, "INTERNAL_API_TOKEN", "secret")
+    response = await unauthorized_client.get("/internal/metrics",
+                                             headers=AUTHORIZATION)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+
+    assert _get_sample(
+        body, 'alias_allocator_probes_total{strategy="random"}'
+    ) == own_probes + 7
+    assert _get_sample(
+        body, 'http_request_duration_seconds_count{method="GET",route="/{alias}"}'
+    ) == sum(own_redirects[:-1]) + 1
+    assert _get_sample(
+        body,
+        'http_request_duration_seconds_bucket{method="GET",route="/{alias}",le="+Inf"}'
+    ) == sum(own_redirects[:-1]) + 1
+    assert _get_sample(
+        body,
+        'urls_service_method_duration_seconds_count'
+        '{method="create_new_url_with_lock"}'
+    ) >= 1
+    assert 'redirect_cache_requests_total{result="hit"}' in body
+    assert "click_events_dropped_total " in body
+    assert "# TYPE advisory_lock_wait_seconds histogram" in body
+
+
+def test_dead_worker_metrics_are_merged(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    """Тестирование слияния метрик завершившихся воркеров в dead.json."""
+    monkeypatch.setattr(metrics, "METRICS_DIR", str(tmp_path))
+    # PID больше максимально возможного: такого процесса нет.
+    dead_pids = (99999998, 99999999)
+    for dead_pid in dead_pids:
+        (tmp_path / f"{dead_pid}.json").write_text(json.dumps({
+            "alias_allocator_probes_total": [[["random"], 3]],
+            "db_pool_connections": [[[str(dead_pid), "checked_out"], 1]],
+        }))
+    (tmp_path / f"{dead_pids[0]}.tmp").write_text("{")
+
+    metrics.merge_dead_worker_metrics()
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        metrics.DEAD_METRICS_FILE, metrics.DEAD_METRICS_LOCK_FILE,
+    ]
+
+    aggregated = metrics.get_aggregated_metrics()
+    own_probes = metrics.ALLOCATOR_PROBES.values.get(("random",), 0.0)
+    # Счетчики мертвых воркеров сохраняются, их gauge метрики - нет.
+    assert aggregated["alias_allocator_probes_total"][("random",)] == own_probes + 6
+    assert all(labelvalues[0] not in {str(pid) for pid in dead_pids}
+               for labelvalues in aggregated["db_pool_connections"])
+
+    # Останавливающийся воркер сливает свои метрики туда же.
+    metrics.mark_worker_metrics_dead()
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        metrics.DEAD_METRICS_FILE, metrics.DEAD_METRICS_LOCK_FILE,
+    ]
+    dead_dump = json.loads((tmp_path / metrics.DEAD_METRICS_FILE).read_text())
+    assert dead_dump["alias_allocator_probes_total"] == [[["random"], own_probes + 6]]
@@ -0,0 +1,74 @@
+"""Модуль тестирования семплирующего профилировщика."""
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+
+import internal.routes
+from core import profiler
+from database.models import ShortedUrl
+
+AUTHORIZATION = {"Authorization": "Bearer secret"}
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_profile_endpoint(
+    unauthorized_client: AsyncClient,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Тестирование GET /internal/profile."""
+    response = await unauthorized_client.get("/internal/profile?seconds=0")
+    assert response.status_code == 403
+
+    monkeypatch.setattr(internal.routes, "INTERNAL_API_TOKEN", "secret")
+    response = await unauthorized_client.get(
+        "/internal/profile?seconds=0", headers={"Authorization": "Bearer wrong"}
+    )
+    assert response.status_code == 403
+
+    # Пока идет первый профиль, второй отклоняется.
+    first_response, second_response = await asyncio.gather(
+        unauthorized_client.get("/internal/profile?seconds=0.1",
+                                headers=AUTHORIZATION),
+        unauthorized_client.get("/internal/profile?seconds=0.1&format=speedscope",
+                                headers=AUTHORIZATION),
+    )
+    assert first_response.status_code == 200
+    assert second_response.status_code == 409
+
+    lines = first_response.text.splitlines()
+    assert lines
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert any("asyncio" in line for line in lines)
+
+    response = await unauthorized_client.get(
+        "/internal/profile?seconds=0.05&format=speedscope", headers=AUTHORIZATION
+    )
+    assert response.status_code == 200
+    speedscope_profile = response.json()
+    assert speedscope_profile["profiles"][0]["type"] == "sampled"
+    assert speedscope_profile["shared"]["frames"]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_profile_every_nth_request(
+    unauthorized_client: AsyncClient,
+    existing_shorted_url: ShortedUrl,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Тестирование профилирования каждого N-го редиректа."""
+    monkeypatch.setattr(internal.routes, "INTERNAL_API_TOKEN", "secret")
+    monkeypatch.setattr(profiler, "PROFILE_EVERY_NTH_REQUEST", 1)
+    monkeypatch.setattr(profiler, "PROFILER_SAMPLE_INTERVAL_MS", 0.01)
+    profiler.get_request_profiles().clear()
+
+    for _ in range(5):
+        response = await unauthorized_client.get(existing_shorted_url.alias)
+        assert response.status_code == 301
+
+    response = await unauthorized_client.get(
+        "/internal/profile/requests?reset=true", headers=AUTHORIZATION
+    )
+    assert response.status_code == 200
+    assert response.text
+    assert not profiler.get_request_profiles()
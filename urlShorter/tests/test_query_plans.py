@@ -0,0 +1,296 @@
+"""Модуль проверки планов запросов UrlsService.
+
+Каждый метод сервиса вызывается на тестовой базе, заполненной реалистичным
+количеством ссылок (QUERY_PLAN_SEED_ROWS, по умолчанию 100 000), все его
+запросы перехватываются и для каждого выполняется EXPLAIN (FORMAT JSON).
+Тест падает, если запрос читает партицию shorted_urls последовательным
+сканированием (кроме явно разрешенных) или его стоимость выше бюджета.
+
+Заполнение и вызовы выполняются в одной транзакции, которая затем
+откатывается, поэтому остальные тесты данных не видят.
+"""
+import os
+import random
+from collections.abc import AsyncGenerator, Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import String, any_, bindparam, event, select, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+
+from core.services import UrlsService, get_alias_numeric_service, get_urls_service
+from database.models import ShortedUrl
+
+QUERY_PLAN_SEED_ROWS = int(os.getenv("QUERY_PLAN_SEED_ROWS", "100000"))
+# Бюджет стоимости (в единицах планировщика) одного запроса по умолчанию.
+DEFAULT_COST_BUDGET = 1000.0
+SHORTED_URLS_PARTITIONS = {"shorted_urls", "shorted_urls_hot", "shorted_urls_cold"}
+SEED_IPS_COUNT = 1000
+
+ServiceCall = Callable[[UrlsService], Awaitable[Any]]
+
+# Метод сервиса: вызов, разрешенные последовательные сканирования, бюджет.
+SERVICE_CALLS: dict[str, tuple[ServiceCall, set[str], float]] = {
+    "get_shorted_url_by_alias": (
+        lambda service: service.get_shorted_url_by_alias("seed1"),
+        set(), DEFAULT_COST_BUDGET,
+    ),
+    # Первая ссылка заполнения в холодной партиции: проверяется и перенос.
+    "get_redirect_shorted_url_by_alias": (
+        lambda service: service.get_redirect_shorted_url_by_alias("seed"),
+        set(), DEFAULT_COST_BUDGET,
+    ),
+    "get_shorted_url_by_original_url": (
+        lambda service: service.get_shorted_url_by_original_url(
+            "https://seed.example/3"
+        ),
+        set(), DEFAULT_COST_BUDGET,
+    ),
+    "get_shorted_url_rows": (
+        lambda service: service.get_shorted_url_rows(page=10, per_page=50),
+        set(), DEFAULT_COST_BUDGET,
+    ),
+    "get_filtered_shorted_url_rows_by_ip": (
+        lambda service: service.get_filtered_shorted_url_rows(
+            created_by_ip="10.0.0.1", created_from=None, created_to=None,
+            descending=True, cursor=None, per_page=50,
+        ),
+        set(), DEFAULT_COST_BUDGET,
+    ),
+    "get_filtered_shorted_url_rows_by_time_range": (
+        lambda service: service.get_filtered_shorted_url_rows(
+            created_by_ip=None,
+            created_from=datetime.now(UTC) - timedelta(days=30),
+            created_to=datetime.now(UTC) - timedelta(days=7),
+            descending=False,
+            cursor=(datetime.now(UTC) - timedelta(days=10), 1),
+            per_page=50,
+        ),
+        set(), DEFAULT_COST_BUDGET,
+    ),
+    "search_shorted_url_rows": (
+        lambda service: service.search_shorted_url_rows(
+            None, "seed.example", QUERY_PLAN_SEED_ROWS // 2, 50
+        ),
+        set(), DEFAULT_COST_BUDGET,
+    ),
+    # Без pg_trgm подстрока ищется чтением партиций, бюджет не ограничен.
+    "search_shorted_url_rows_by_substring": (
+        lambda service: service.search_shorted_url_rows(
+            "seed.example/1", None, None, 50
+        ),
+        SHORTED_URLS_PARTITIONS, float("inf"),
+    ),
+    "get_shorted_urls_page_version_rows": (
+        lambda service: service.get_shorted_urls_page_version_rows(
+            page=10, per_page=50
+        ),
+        set(), DEFAULT_COST_BUDGET,
+    ),
+    "get_shorted_url_detail_row_by_alias": (
+        lambda service: service.get_shorted_url_detail_row_by_alias("seed1"),
+        set(), DEFAULT_COST_BUDGET,
+    ),
+    "get_ip_shorted_urls_created_count": (
+        lambda service: service.get_ip_shorted_urls_created_count(
+            "10.0.0.1", datetime.now(UTC) - timedelta(minutes=1)
+        ),
+        set(), DEFAULT_COST_BUDGET,
+    ),
+    "get_first_shorted_url_with_available_after": (
+        lambda service: service.get_first_shorted_url_with_available_after(),
+        set(), DEFAULT_COST_BUDGET,
+    ),
+    "create_new_url_with_lock": (
+        lambda service: service.create_new_url_with_lock(
+            "https://query-plans.example/", created_by_ip="10.0.0.1"
+        ),
+        set(), DEFAULT_COST_BUDGET,
+    ),
+    "delete_url_by_alias_with_lock": (
+        lambda service: service.delete_url_by_alias_with_lock("seed4"),
+        set(), DEFAULT_COST_BUDGET,
+    ),
+    "delete_urls_by_aliases_with_lock": (
+        lambda service: service.delete_urls_by_aliases_with_lock(
+            ["seed6", "seed7", "seed9"]
+        ),
+        set(), DEFAULT_COST_BUDGET,
+    ),
+    "delete_expired_urls_with_lock": (
+        lambda service: service.delete_expired_urls_with_lock(100),
+        set(), DEFAULT_COST_BUDGET,
+    ),
+    # Кандидаты на архивацию намеренно ищутся чтением горячей партиции.
+    "archive_cold_urls_with_lock": (
+        lambda service: service.archive_cold_urls_with_lock(
+            datetime.now(UTC) - timedelta(days=365), 100
+        ),
+        {"shorted_urls_hot"}, float("inf"),
+    ),
+    "add_click_to_shorted_url": (
+        lambda service: service.add_click_to_shorted_url(1),
+        set(), DEFAULT_COST_BUDGET,
+    ),
+}
+
+# Методы, выбирающие страницу id index only сканом покрывающего индекса.
+INDEX_ONLY_SERVICE_CALLS = {
+    "get_filtered_shorted_url_rows_by_ip",
+    "get_filtered_shorted_url_rows_by_time_range",
+}
+
+# Методы, которые не должны искать подстроку обратным сканом первичного ключа.
+TRIGRAM_SERVICE_CALLS = {"search_shorted_url_rows_by_substring"}
+
+
+async def _seed_shorted_urls(connection: AsyncConnection, count: int) -> None:
+    """Заполнение shorted_urls count ссылками, похожими на настоящие.
+
+    Алиасы идут подряд (как их выдает последовательный аллокатор), каждая
+    десятая ссылка в холодной партиции, каждая двадцатая со сроком жизни.
+    """
+    alias_numeric_service = get_alias_numeric_service()
+    # Начало с 4 символов, как у рандомного аллокатора.
+    first_alias_numeric = alias_numeric_service.get_alias_numeric_from_alias("seed")
+    aliases = [
+        alias_numeric_service.get_alias_from_alias_numeric(first_alias_numeric + i)
+        for i in range(count)
+    ]
+    seed_random = random.Random(0)
+    now = datetime.now(UTC)
+
+    # Алиасы, случайно выданные другим тестам, пропускаются. Этот запрос
+    # также открывает транзакцию: без него COPY через драйвер выполнился бы
+    # вне откатываемой транзакции.
+    existing_aliases = set(await connection.scalars(
+        select(ShortedUrl.alias).where(ShortedUrl.alias == any_(
+            bindparam("aliases", aliases, type_=ARRAY(String))
+        ))
+    ))
+    aliases = [alias for alias in aliases if alias not in existing_aliases]
+    raw_connection = await connection.get_raw_connection()
+    await raw_connection.driver_connection.copy_records_to_table(  # type: ignore
+        "shorted_urls",
+        columns=["archived", "original_url", "original_host", "created_by_ip",
+                 "alias", "alias_len",
+                 "available_after", "clicks", "expires_at", "created_at",
+                 "last_clicked_at"],
+        records=[(
+            i % 10 == 0,
+            f"https://seed.example/{i}",
+            "seed.example",
+            f"10.{i % SEED_IPS_COUNT // 256}.{i % 256}.1",
+            alias,
+            len(alias),
+            i == count - 1,
+            seed_random.randrange(1000),
+            now + timedelta(days=seed_random.randrange(-30, 30))
+            if i % 20 == 0 else None,
+            now - timedelta(seconds=seed_random.randrange(90 * 24 * 3600)),
+            now - timedelta(seconds=seed_random.randrange(30 * 24 * 3600))
+            if i % 3 else None,
+        ) for i, alias in enumerate(aliases)],
+    )
+    await connection.execute(text("ANALYZE shorted_urls"))
+
+
+def _iter_plan_nodes(plan: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    """Обход всех узлов плана."""
+    yield plan
+    for subplan in plan.get("Plans", ()):
+        yield from _iter_plan_nodes(subplan)
+
+
+@contextmanager
+def _capture_statements(engine: AsyncEngine) -> Iterator[list[tuple[str, Any]]]:
+    """Перехват DML запросов, выполняемых через engine."""
+    statements: list[tuple[str, Any]] = []
+
+    def before_cursor_execute(
+        _conn: object,
+        _cursor: object,
+        statement: str,
+        parameters: Any,  # noqa: ANN401
+        _context: object,
+        executemany: bool,  # noqa: FBT001
+    ) -> None:
+        if not executemany and statement.lstrip().split(None, 1)[0].upper() in {
+            "SELECT", "INSERT", "UPDATE", "DELETE", "WITH"
+        }:
+            statements.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute",
+                     before_cursor_execute)
+
+
+@pytest_asyncio.fixture(scope="module", loop_scope="session")
+async def seeded_connection(
+    async_engine: AsyncEngine
+) -> AsyncGenerator[AsyncConnection]:
+    """Подключение с заполненной shorted_urls внутри откатываемой транзакции."""
+    async with async_engine.connect() as connection:
+        transaction = await connection.begin()
+        try:
+            await _seed_shorted_urls(connection, QUERY_PLAN_SEED_ROWS)
+            yield connection
+        finally:
+            await transaction.rollback()
+
+
+@pytest.mark.asyncio(loop_scope="session")
+@pytest.mark.parametrize("method_name", SERVICE_CALLS)
+async def test_service_query_plans(
+    method_name: str,
+    seeded_connection: AsyncConnection,
+    async_engine: AsyncEngine,
+) -> None:
+    """Запросы метода UrlsService используют индексы и укладываются в бюджет."""
+    service_call, allowed_seq_scans, cost_budget = SERVICE_CALLS[method_name]
+    # Коммиты сервиса становятся освобождением точек сохранения.
+    session = AsyncSession(bind=seeded_connection,
+                           join_transaction_mode="create_savepoint")
+
+    with _capture_statements(async_engine) as statements:
+        await service_call(get_urls_service(session))
+    await session.close()
+
+    assert statements
+    has_pg_trgm = await seeded_connection.scalar(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')"
+    ))
+    raw_connection = await seeded_connection.get_raw_connection()
+    for statement, parameters in statements:
+        # Соединение SQLAlchemy само декодирует json.
+        explain = await raw_connection.driver_connection.fetchval(  # type: ignore
+            f"EXPLAIN (FORMAT JSON) {statement}", *parameters
+        )
+        plan = explain[0]["Plan"]
+        seq_scans = {
+            node["Relation Name"] for node in _iter_plan_nodes(plan)
+            if node["Node Type"] == "Seq Scan"
+            and node["Relation Name"] in SHORTED_URLS_PARTITIONS
+        }
+
+        assert seq_scans <= allowed_seq_scans, (statement, plan)
+        assert plan["Total Cost"] <= cost_budget, (statement, plan)
+        if method_name in INDEX_ONLY_SERVICE_CALLS:
+            assert any(node["Node Type"] == "Index Only Scan"
+                       for node in _iter_plan_nodes(plan)), (statement, plan)
+        if method_name in TRIGRAM_SERVICE_CALLS:
+            assert not any(
+                node["Node Type"] in {"Index Scan", "Index Only Scan"}
+                and node["Index Name"].endswith("_pkey")
+                for node in _iter_plan_nodes(plan)
+            ), (statement, plan)
+            if has_pg_trgm:
+                assert any(node["Node Type"] == "Bitmap Index Scan"
+                           for node in _iter_plan_nodes(plan)), (statement, plan)
@@ -0,0 +1,88 @@
+"""Модуль тестирования планировщика фоновых задач и выбора лидера."""
+import asyncio
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.metrics import SCHEDULER_JOB_RUNS
+from core.scheduler import Scheduler
+
+# Ключ, отличный от ключа планировщика приложения, запущенного в тестах.
+TEST_LEADER_LOCK_KEY = 4046
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_run_job_results() -> None:
+    """Тестирование результатов запусков: ok, failed, timeout и skipped."""
+    scheduler = Scheduler(0.1, 5, TEST_LEADER_LOCK_KEY)
+    runs: list[str] = []
+
+    async def ok_job() -> None:
+        runs.append("ok")
+
+    async def failed_job() -> None:
+        msg = "job failed"
+        raise RuntimeError(msg)
+
+    async def slow_job() -> None:
+        await asyncio.sleep(1)
+
+    scheduler.register("test_ok", ok_job, 1)
+    scheduler.register("test_failed", failed_job, 1)
+    scheduler.register("test_slow", slow_job, 1, timeout_seconds=0.01)
+    scheduler.register("test_singleton", ok_job, 1, singleton=True)
+    # Нулевой интервал выключает задачу.
+    scheduler.register("test_disabled", ok_job, 0)
+    assert [job.name for job in scheduler.jobs] == [
+        "test_ok", "test_failed", "test_slow", "test_singleton"
+    ]
+
+    for scheduled_job in scheduler.jobs:
+        await scheduler.run_job(scheduled_job)
+
+    assert runs == ["ok"]
+    assert SCHEDULER_JOB_RUNS.values[("test_ok", "ok")] == 1
+    assert SCHEDULER_JOB_RUNS.values[("test_failed", "failed")] == 1
+    assert SCHEDULER_JOB_RUNS.values[("test_slow", "timeout")] == 1
+    assert SCHEDULER_JOB_RUNS.values[("test_singleton", "skipped")] == 1
+
+    assert all(0.9 <= scheduler._get_delay(10) / 10 <= 1.1 for _ in range(100))  # noqa: SLF001
+
+
+# Движок приложения создается в lifespan, который запускает клиент.
+@pytest.mark.usefixtures("unauthorized_client")
+@pytest.mark.asyncio(loop_scope="session")
+async def test_leader_election_and_handover(session: AsyncSession) -> None:
+    """Тестирование единственного лидера и передачи лидерства при его падении."""
+    first_scheduler = Scheduler(0.1, 5, TEST_LEADER_LOCK_KEY)
+    second_scheduler = Scheduler(0.1, 5, TEST_LEADER_LOCK_KEY)
+    try:
+        assert await first_scheduler.elect_leader()
+        assert not await second_scheduler.elect_leader()
+        # Лидер остается лидером при повторных проверках.
+        assert await first_scheduler.elect_leader()
+
+        # Остановка лидера сразу освобождает блокировку.
+        await first_scheduler.stop()
+        assert await second_scheduler.elect_leader()
+        assert not await first_scheduler.elect_leader()
+
+        # Падение лидера (обрыв соединения) тоже освобождает блокировку.
+        assert second_scheduler.leader_connection is not None
+        leader_pid = await second_scheduler.leader_connection.scalar(
+            text("SELECT pg_backend_pid()")
+        )
+        await second_scheduler.leader_connection.commit()
+        await session.execute(text("SELECT pg_terminate_backend(:pid)"),
+                              {"pid": leader_pid})
+        await session.commit()
+
+        for _ in range(50):
+            if await first_scheduler.elect_leader():
+                break
+            await asyncio.sleep(0.1)
+        assert first_scheduler.is_leader
+    finally:
+        await first_scheduler.stop()
+        await second_scheduler.stop()
@@ -0,0 +1,297 @@
+"""Модуль тестирования общего кэша редиректов на RESP сервере."""
+import asyncio
+from collections.abc import AsyncGenerator
+from datetime import UTC, datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+
+import api.links.routes
+import api.shorten.routes
+import routes
+from core.cache import CachedRedirect, RedirectCache, get_redirect_cache
+from core.shared_cache import (
+    TOMBSTONE,
+    RespClient,
+    RespSharedRedirectCache,
+    decode_cached_redirect,
+    encode_cached_redirect,
+)
+from fast import app
+
+
+class StubRespServer:
+    """Локальный RESP сервер в памяти: GET, SET, DEL и PING."""
+
+    def __init__(self) -> None:
+        """Инициализация сервера."""
+        self.store: dict[bytes, bytes] = {}
+        self.ttls: dict[bytes, int] = {}
+        # Если False, сервер читает команды, но не отвечает (для таймаутов).
+        self.responding = True
+        self.server: asyncio.Server | None = None
+
+    @property
+    def url(self) -> str:
+        """Адрес сервера для RespClient."""
+        assert self.server is not None
+        host, port = self.server.sockets[0].getsockname()[:2]
+        return f"redis://{host}:{port}/0"
+
+    async def start(self) -> None:
+        """Запуск сервера на свободном порту."""
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+
+    async def stop(self) -> None:
+        """Остановка сервера."""
+        assert self.server is not None
+        self.server.close()
+
+    async def _read_command(self, reader: asyncio.StreamReader) -> list[bytes]:
+        """Чтение команды (массива bulk строк)."""
+        count = int((await reader.readuntil(b"\r\n"))[1:-2])
+        args = []
+        for _ in range(count):
+            length = int((await reader.readuntil(b"\r\n"))[1:-2])
+            args.append((await reader.readexactly(length + 2))[:-2])
+
+        return args
+
+    def _execute(self, args: list[bytes]) -> bytes:
+        """Выполнение команды и кодирование ответа."""
+        command, *keys = args
+        command = command.upper()
+        if command == b"GET":
+            value = self.store.get(keys[0])
+            return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value),
+                                                                       value)
+        if command == b"SET":
+            if b"NX" in keys[2:] and keys[0] in self.store:
+                return b"$-1\r\n"
+            self.store[keys[0]] = keys[1]
+            self.ttls[keys[0]] = int(keys[3])
+            return b"+OK\r\n"
+        if command == b"DEL":
+            deleted = [self.store.pop(key, None) for key in keys]
+            return b":%d\r\n" % sum(value is not None for value in deleted)
+        if command == b"PING":
+            return b"+PONG\r\n"
+
+        return b"-ERR unknown command\r\n"
+
+    async def _handle(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter
+    ) -> None:
+        """Обработка одного подключения."""
+        try:
+            while True:
+                args = await self._read_command(reader)
+                if self.responding:
+                    writer.write(self._execute(args))
+                    await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+
+
+@pytest_asyncio.fixture(loop_scope="session")
+async def stub_resp_server() -> AsyncGenerator[StubRespServer]:
+    """Фикстура локального RESP сервера."""
+    server = StubRespServer()
+    await server.start()
+    yield server
+    await server.stop()
+
+
+@pytest_asyncio.fixture(loop_scope="session")
+async def shared_cache(
+    stub_resp_server: StubRespServer,
+    monkeypatch: pytest.MonkeyPatch,
+) -> AsyncGenerator[RespSharedRedirectCache]:
+    """Фикстура общего кэша на локальном сервере, подключенного к приложению."""
+    cache = RespSharedRedirectCache(
+        RespClient(stub_resp_server.url, 2), 0.2, 300, 5, "redirect:"
+    )
+    for module in (routes, api.shorten.routes, api.links.routes):
+        monkeypatch.setattr(module, "get_shared_redirect_cache", lambda: cache)
+    yield cache
+    await cache.close()
+
+
+def test_cached_redirect_encoding() -> None:
+    """Тестирование сериализации редиректа и поврежденных записей."""
+    cached_redirect = CachedRedirect(
+        1, "https://shared.cache/", datetime(2030, 1, 1, tzinfo=UTC)
+    )
+    assert decode_cached_redirect(encode_cached_redirect(cached_redirect)) == \
+        cached_redirect
+    assert decode_cached_redirect(b"not json") is None
+    assert decode_cached_redirect(b"[1, 2]") is None
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_shared_cache_get_set_delete(
+    shared_cache: RespSharedRedirectCache,
+    stub_resp_server: StubRespServer,
+) -> None:
+    """Тестирование чтения, записи и удаления с TTL по сроку жизни ссылки."""
+    stub_resp_server.store.clear()
+    assert await shared_cache.get("SHARED_A") is None
+
+    cached_redirect = CachedRedirect(1, "https://shared.cache/a", None)
+    await shared_cache.set("SHARED_A", cached_redirect)
+    assert await shared_cache.get("SHARED_A") == cached_redirect
+    assert stub_resp_server.ttls[b"redirect:SHARED_A"] == 300
+
+    expiring_redirect = CachedRedirect(
+        2, "https://shared.cache/b", datetime.now(UTC) + timedelta(seconds=30)
+    )
+    await shared_cache.set("SHARED_B", expiring_redirect)
+    assert stub_resp_server.ttls[b"redirect:SHARED_B"] <= 30
+
+    # Истекшая ссылка в кэш не попадает.
+    await shared_cache.set("SHARED_C", CachedRedirect(
+        3, "https://shared.cache/c", datetime.now(UTC) - timedelta(seconds=1)
+    ))
+    assert b"redirect:SHARED_C" not in stub_resp_server.store
+
+    await shared_cache.delete(["SHARED_A", "SHARED_B"])
+    assert stub_resp_server.store == {b"redirect:SHARED_A": TOMBSTONE,
+                                      b"redirect:SHARED_B": TOMBSTONE}
+    assert stub_resp_server.ttls[b"redirect:SHARED_A"] == 60
+    assert await shared_cache.get("SHARED_A") is None
+    assert (shared_cache.hits, shared_cache.misses, shared_cache.errors) == (1, 2, 0)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_shared_cache_fill_does_not_overwrite_tombstone(
+    shared_cache: RespSharedRedirectCache,
+    stub_resp_server: StubRespServer,
+) -> None:
+    """Тестирование того, что заполнение из базы после удаления не вернет ссылку."""
+    cached_redirect = CachedRedirect(1, "https://shared.cache/deleted", None)
+    # Редирект прочитан из базы, затем ссылка удалена, затем запись в кэш.
+    await shared_cache.delete(["SHARED_RACE"])
+    await shared_cache.set_if_absent("SHARED_RACE", cached_redirect)
+    assert stub_resp_server.store[b"redirect:SHARED_RACE"] == TOMBSTONE
+    assert await shared_cache.get("SHARED_RACE") is None
+
+    # Новая ссылка с тем же алиасом перезаписывает надгробие.
+    await shared_cache.set("SHARED_RACE", cached_redirect)
+    assert await shared_cache.get("SHARED_RACE") == cached_redirect
+
+    # Без надгробия заполнение из базы пишет в кэш.
+    await shared_cache.set_if_absent("SHARED_FILL", cached_redirect)
+    assert await shared_cache.get("SHARED_FILL") == cached_redirect
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_shared_cache_timeout_falls_through(
+    unauthorized_client: AsyncClient,
+    shared_cache: RespSharedRedirectCache,
+    stub_resp_server: StubRespServer,
+) -> None:
+    """Тестирование того, что зависший кэш не ломает редирект."""
+    async with AsyncClient(
+        transport=ASGITransport(app=app, client=("10.0.43.1", 123)),
+        base_url=unauthorized_client.base_url,
+    ) as client:
+        response = await client.post("/api/shorten", json={
+            "url": "https://shared.cache/timeout", "custom_alias": "SHARED_SLOW"
+        })
+    assert response.status_code == 200
+
+    stub_resp_server.responding = False
+    get_redirect_cache().invalidate("SHARED_SLOW")
+    response = await unauthorized_client.get("SHARED_SLOW")
+    assert response.status_code == 301
+    assert response.headers["location"] == "https://shared.cache/timeout"
+    assert shared_cache.errors == 1
+
+    # После ошибки кэш не опрашивается и не добавляет таймаут к редиректам.
+    get_redirect_cache().invalidate("SHARED_SLOW")
+    response = await unauthorized_client.get("SHARED_SLOW")
+    assert response.status_code == 301
+    assert shared_cache.errors == 1
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_redirect_uses_shared_cache(
+    unauthorized_client: AsyncClient,
+    shared_cache: RespSharedRedirectCache,
+    stub_resp_server: StubRespServer,
+) -> None:
+    """Тестирование записи при создании, чтения до базы и удаления ссылки."""
+    async with AsyncClient(
+        transport=ASGITransport(app=app, client=("10.0.43.2", 123)),
+        base_url=unauthorized_client.base_url,
+    ) as client:
+        response = await client.post("/api/shorten", json={
+            "url": "https://shared.cache/created", "custom_alias": "SHARED_NEW"
+        })
+    assert response.status_code == 200
+
+    key = b"redirect:SHARED_NEW"
+    cached_redirect = decode_cached_redirect(stub_resp_server.store[key])
+    assert cached_redirect is not None
+    assert cached_redirect.original_url == "https://shared.cache/created"
+
+    # Редирект из общего кэша: другой воркер не идет в базу.
+    stub_resp_server.store[key] = encode_cached_redirect(
+        cached_redirect._replace(original_url="https://shared.cache/from-l2")
+    )
+    get_redirect_cache().invalidate("SHARED_NEW")
+    response = await unauthorized_client.get("SHARED_NEW")
+    assert response.status_code == 301
+    assert response.headers["location"] == "https://shared.cache/from-l2"
+    assert shared_cache.hits == 1
+
+    response = await unauthorized_client.delete("/api/links/SHARED_NEW")
+    assert response.status_code == 204
+    assert stub_resp_server.store[key] == TOMBSTONE
+
+    response = await unauthorized_client.get("SHARED_NEW")
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio(loop_scope="session")
+@pytest.mark.usefixtures("shared_cache")
+async def test_delete_in_other_worker_revalidates_redirect_cache(
+    unauthorized_client: AsyncClient,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Тестирование того, что удаление в одном воркере видно кэшу другого."""
+    # Кэши двух воркеров, перепроверяющие записи при каждом обращении.
+    worker_caches = [RedirectCache(10, 60, 0), RedirectCache(10, 60, 0)]
+    current_worker = [0]
+    for module in (routes, api.links.routes):
+        monkeypatch.setattr(module, "get_redirect_cache",
+                            lambda: worker_caches[current_worker[0]])
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app, client=("10.0.32.1", 123)),
+        base_url=unauthorized_client.base_url,
+    ) as client:
+        response = await client.post("/api/shorten", json={
+            "url": "https://shared.cache/workers", "custom_alias": "SHARED_WRK"
+        })
+    assert response.status_code == 200
+
+    # Второй воркер кэширует редирект.
+    current_worker[0] = 1
+    response = await unauthorized_client.get("SHARED_WRK")
+    assert response.status_code == 301
+    assert worker_caches[1].get("SHARED_WRK") is not None
+
+    # Первый воркер удаляет ссылку: кэш второго он не очищает.
+    current_worker[0] = 0
+    response = await unauthorized_client.delete("/api/links/SHARED_WRK")
+    assert response.status_code == 204
+    assert worker_caches[1].get("SHARED_WRK") is not None
+
+    current_worker[0] = 1
+    response = await unauthorized_client.get("SHARED_WRK")
+    assert response.status_code == 404
+    assert worker_caches[1].get("SHARED_WRK") is None
@@ -0,0 +1,199 @@
+"""Модуль тестирования снимка редиректов."""
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import routes
+from core import edge_cache
+from core.clicks import ClickEventsBuffer
+from core.hot_links import SpaceSavingTopK
+from core.journal import SideEffectsJournal, get_side_effects_journal_service
+from core.services import get_urls_service
+from core.snapshot import (
+    RedirectSnapshot,
+    SnapshotRedirect,
+    compile_redirect_snapshot,
+    compile_redirect_snapshot_delta,
+)
+from core.visitors import VisitorSketches
+from database.models import ShortedUrl
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_snapshot_get_original_url(
+    session: AsyncSession,
+    existing_shorted_url: ShortedUrl,
+    tmp_path: Path,
+) -> None:
+    """Тестирование поиска по скомпилированному снимку."""
+    snapshot_path = tmp_path / "redirects.snapshot"
+
+    count = await compile_redirect_snapshot(session, snapshot_path)
+    snapshot = RedirectSnapshot(snapshot_path)
+
+    assert snapshot.count == count
+    assert snapshot.get_original_url(existing_shorted_url.alias) \
+        == existing_shorted_url.original_url
+    assert snapshot.get_original_url("PIOEHfowhfiwheifwefwefwefwefwef") is None
+    assert snapshot.get_original_url(",,,,,") is None
+
+    snapshot.close()
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_snapshot_delta(
+    session: AsyncSession,
+    tmp_path: Path,
+) -> None:
+    """Тестирование наложения дельта-лога на снимок."""
+    snapshot_path = tmp_path / "redirects.snapshot"
+    delta_path = tmp_path / "redirects.delta"
+
+    urls_service = get_urls_service(session)
+    deleted_url = await urls_service.create_new_url_with_lock(
+        "https://snapshot.deleted/", "SNAP_DEL"
+    )
+    await compile_redirect_snapshot(session, snapshot_path)
+
+    await urls_service.delete_url_by_alias_with_lock(deleted_url.alias)
+    created_url = await urls_service.create_new_url_with_lock(
+        "https://snapshot.created/", "SNAP_NEW"
+    )
+
+    snapshot = RedirectSnapshot(snapshot_path, delta_path)
+    assert snapshot.get_original_url("SNAP_DEL") == "https://snapshot.deleted/"
+    assert snapshot.get_original_url("SNAP_NEW") is None
+
+    assert await compile_redirect_snapshot_delta(
+        session, snapshot_path, delta_path
+    ) == 2
+    snapshot.refresh()
+
+    assert snapshot.get_original_url("SNAP_DEL") is None
+    assert snapshot.get_original_url("SNAP_NEW") == created_url.original_url
+    snapshot_redirect = snapshot.get_redirect("SNAP_NEW")
+    assert snapshot_redirect is not None
+    assert snapshot_redirect.shorted_url_id == created_url.id
+
+    snapshot.close()
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_missing_snapshot_falls_back_to_database(
+    unauthorized_client: AsyncClient,
+    session: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    """Тестирование пустого снимка до первой компиляции и редиректа из базы."""
+    snapshot_path = tmp_path / "redirects.snapshot"
+    snapshot = RedirectSnapshot(snapshot_path)
+    assert not snapshot.is_loaded
+    assert snapshot.get_original_url("SNAP_MISSING") is None
+
+    await get_urls_service(session).create_new_url_with_lock(
+        "https://snapshot.missing/", "SNAP_MISSING"
+    )
+    monkeypatch.setattr(routes, "get_redirect_snapshot", lambda: snapshot)
+    monkeypatch.setattr(routes, "REDIRECT_SNAPSHOT_DB_FALLBACK", False)
+    response = await unauthorized_client.get("SNAP_MISSING")
+    assert response.status_code == 301
+    assert response.headers["location"] == "https://snapshot.missing/"
+
+    await compile_redirect_snapshot(session, snapshot_path)
+    snapshot.refresh()
+    assert snapshot.is_loaded
+    assert snapshot.get_original_url("SNAP_MISSING") == "https://snapshot.missing/"
+
+    snapshot.close()
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_snapshot_redirect_expiration(
+    unauthorized_client: AsyncClient,
+    session: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    """Тестирование срока жизни ссылки в снимке и в кэше прокси."""
+    snapshot_path = tmp_path / "redirects.snapshot"
+    delta_path = tmp_path / "redirects.delta"
+    expires_at = datetime.now(UTC) + timedelta(seconds=20)
+    expiring_url = await get_urls_service(session).create_new_url_with_lock(
+        "https://snapshot.expiring/", "SNAP_EXP", expires_at=expires_at
+    )
+    await compile_redirect_snapshot(session, snapshot_path)
+    # Ссылка, истекшая после компиляции снимка.
+    delta_path.write_text(
+        '["SNAP_GONE", "https://snapshot.gone/", 1]\n'
+        '["SNAP_OLD", "https://snapshot.old/"]\n'
+    )
+    snapshot = RedirectSnapshot(snapshot_path, delta_path)
+    assert snapshot.get_redirect("SNAP_EXP") == SnapshotRedirect(
+        "https://snapshot.expiring/", expires_at.replace(microsecond=0),
+        expiring_url.id,
+    )
+    assert snapshot.get_redirect("SNAP_OLD") == SnapshotRedirect(
+        "https://snapshot.old/", None, None
+    )
+
+    monkeypatch.setattr(routes, "get_redirect_snapshot", lambda: snapshot)
+    monkeypatch.setattr(edge_cache, "EDGE_CACHE_REDIRECT_SECONDS", 300)
+    response = await unauthorized_client.get("SNAP_EXP")
+    assert response.status_code == 301
+    assert 0 < int(response.headers["x-accel-expires"]) <= 20
+
+    response = await unauthorized_client.get("SNAP_GONE")
+    assert response.status_code == 404
+
+    snapshot.close()
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_snapshot_redirect_records_analytics(
+    unauthorized_client: AsyncClient,
+    session: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    """Тестирование учета переходов по редиректам из снимка."""
+    snapshot_path = tmp_path / "redirects.snapshot"
+    shorted_url = await get_urls_service(session).create_new_url_with_lock(
+        "https://snapshot.analytics/", "SNAP_STATS"
+    )
+    shorted_url_id = shorted_url.id
+    await compile_redirect_snapshot(session, snapshot_path)
+    snapshot = RedirectSnapshot(snapshot_path)
+
+    journal = SideEffectsJournal(str(tmp_path / "journal"))
+    click_events_buffer = ClickEventsBuffer(10)
+    visitor_sketches = VisitorSketches(10)
+    hot_links_tracker = SpaceSavingTopK(10)
+    monkeypatch.setattr(routes, "get_redirect_snapshot", lambda: snapshot)
+    monkeypatch.setattr(routes, "get_side_effects_journal", lambda: journal)
+    monkeypatch.setattr(routes, "get_click_events_buffer", lambda: click_events_buffer)
+    monkeypatch.setattr(routes, "get_visitor_sketches", lambda: visitor_sketches)
+    monkeypatch.setattr(routes, "get_hot_links_tracker", lambda: hot_links_tracker)
+
+    for _ in range(2):
+        response = await unauthorized_client.get("SNAP_STATS")
+        assert response.status_code == 301
+        assert response.headers["location"] == "https://snapshot.analytics/"
+
+    assert [event[0] for event in click_events_buffer.drain()] == \
+        [shorted_url_id, shorted_url_id]
+    assert shorted_url_id in visitor_sketches.drain()
+    assert hot_links_tracker.top(1)[0][:2] == ("SNAP_STATS", 2)
+
+    # Клики применяются к базе фоновой задачей журнала.
+    journal.rotate()
+    journal_service = get_side_effects_journal_service(session)
+    for segment_path in journal.get_sealed_segments():
+        await journal_service.apply_segment(segment_path)
+    await session.refresh(shorted_url)
+    assert shorted_url.clicks == 2
+
+    snapshot.close()
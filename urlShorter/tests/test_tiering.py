@@ -0,0 +1,73 @@
+"""Модуль тестирования переноса ссылок между горячей и холодной партициями."""
+from datetime import datetime, timedelta
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.services import get_urls_service
+from database.models import ShortedUrl, shorted_url_aliases_table
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_archive_and_promote_shorted_url(
+    unauthorized_client: AsyncClient,
+    session: AsyncSession,
+) -> None:
+    """Тестирование переноса в холодную партицию и возврата при клике."""
+    urls_service = get_urls_service(session)
+    await urls_service.create_new_url_with_lock("https://tiering.cold/", "TIER_COLD")
+
+    await session.execute(update(ShortedUrl).where(
+        ShortedUrl.alias == "TIER_COLD"
+    ).values(created_at=datetime.now() - timedelta(days=30)))
+    await session.commit()
+
+    archived_count = await urls_service.archive_cold_urls_with_lock(
+        datetime.now() - timedelta(days=7), 100_000
+    )
+    assert archived_count >= 1
+
+    assert await urls_service.get_hot_shorted_url_by_alias("TIER_COLD") is None
+    archived_url = await urls_service.get_shorted_url_by_alias("TIER_COLD")
+    assert archived_url is not None
+    assert archived_url.archived is True
+
+    response = await unauthorized_client.get("TIER_COLD")
+    assert response.status_code == 301
+
+    session.expunge_all()
+    promoted_url = await urls_service.get_hot_shorted_url_by_alias("TIER_COLD")
+    assert promoted_url is not None
+    assert promoted_url.clicks == 1
+    assert promoted_url.last_clicked_at is not None
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_alias_is_unique_across_partitions(session: AsyncSession) -> None:
+    """Тестирование уникальности alias между партициями на уровне базы."""
+    urls_service = get_urls_service(session)
+    await urls_service.create_new_url_with_lock("https://tiering.unique/", "TIER_UNIQ")
+
+    # Запись в холодную партицию в обход блокировок alias_numeric.
+    with pytest.raises(IntegrityError):
+        await session.execute(insert(ShortedUrl).values(
+            archived=True, original_url="https://tiering.unique/dup",
+            alias="TIER_UNIQ", alias_len=9,
+        ))
+    await session.rollback()
+
+    # Перенос между партициями сохраняет запись в реестре, удаление ее убирает.
+    await session.execute(update(ShortedUrl).where(
+        ShortedUrl.alias == "TIER_UNIQ"
+    ).values(archived=True))
+    await session.commit()
+    select_registered_stmt = select(shorted_url_aliases_table.c.alias).where(
+        shorted_url_aliases_table.c.alias == "TIER_UNIQ"
+    )
+    assert await session.scalar(select_registered_stmt) == "TIER_UNIQ"
+
+    await urls_service.delete_url_by_alias_with_lock("TIER_UNIQ")
+    assert await session.scalar(select_registered_stmt) is None
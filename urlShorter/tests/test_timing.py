@@ -0,0 +1,63 @@
+"""Модуль тестирования заголовка Server-Timing и лога запросов."""
+import logging
+import re
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from core import timing
+from database.models import ShortedUrl
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_server_timing_header(
+    unauthorized_client: AsyncClient,
+    existing_shorted_url: ShortedUrl,
+    monkeypatch: pytest.MonkeyPatch,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    """Тестирование Server-Timing и лога медленного запроса."""
+    monkeypatch.setattr(timing, "SLOW_REQUEST_THRESHOLD_MS", 0)
+    alias = existing_shorted_url.alias
+
+    with caplog.at_level(logging.INFO, logger=timing.__name__):
+        response = await unauthorized_client.get(f"/api/links/{alias}")
+
+    assert response.status_code == 200
+    server_timing = response.headers["server-timing"]
+    statements_count = re.search(r'db;dur=[\d.]+;desc="(\d+) statements"',
+                                 server_timing)
+    assert statements_count is not None
+    assert int(statements_count.group(1)) >= 1
+    assert "pool;dur=" in server_timing
+    assert "app;dur=" in server_timing
+
+    slow_records = [record for record in caplog.records
+                    if record.levelno == logging.WARNING
+                    and f"path=/api/links/{alias}" in record.getMessage()]
+    assert len(slow_records) == 1
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_failed_statement_is_timed(async_engine: AsyncEngine) -> None:
+    """Тестирование учета statement'а, завершившегося ошибкой."""
+    timings = timing.RequestTimings()
+    token = timing.request_timings.set(timings)
+    try:
+        async with async_engine.connect() as connection:
+            with pytest.raises(DBAPIError):
+                await connection.execute(text("SELECT 1 / 0"))
+            await connection.rollback()
+            await connection.execute(text("SELECT 1"))
+            query_started_at = (await connection.get_raw_connection()).info[
+                "query_started_at"
+            ]
+    finally:
+        timing.request_timings.reset(token)
+
+    assert timings.statements_count == 2
+    # Время начала упавшего statement'а не остается в соединении пула.
+    assert query_started_at == {}
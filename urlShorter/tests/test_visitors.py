@@ -0,0 +1,64 @@
+"""Модуль тестирования подсчета уникальных посетителей."""
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import routes
+from core.services import get_urls_service
+from core.visitors import HyperLogLog, VisitorSketches, get_visitor_sketches_service
+from fast import app
+
+
+def test_hyperloglog_estimate_and_merge() -> None:
+    """Тестирование точности оценки и объединения скетчей."""
+    first_sketch, second_sketch = HyperLogLog(), HyperLogLog()
+    for visitor in range(10_000):
+        first_sketch.add(f"10.0.{visitor}")
+        # Половина посетителей второго скетча пересекается с первым.
+        second_sketch.add(f"10.0.{visitor + 5_000}")
+
+    assert abs(first_sketch.estimate() - 10_000) < 10_000 * 0.05
+
+    first_sketch.merge(second_sketch.registers)
+    assert abs(first_sketch.estimate() - 15_000) < 15_000 * 0.05
+
+    assert HyperLogLog().estimate() == 0
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_unique_visitors(
+    unauthorized_client: AsyncClient,
+    session: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Тестирование учета посетителей на редиректе и unique_visitors в деталях."""
+    # Отдельный накопитель, чтобы фоновая задача приложения не забрала скетчи теста.
+    visitor_sketches = VisitorSketches(100)
+    monkeypatch.setattr(routes, "get_visitor_sketches", lambda: visitor_sketches)
+
+    shorted_url = await get_urls_service(session).create_new_url_with_lock(
+        "https://unique.visitors/", "UNIQUE_VISITORS"
+    )
+    shorted_url_id = shorted_url.id
+
+    for visitor in ("10.1.0.1", "10.1.0.2", "10.1.0.2"):
+        async with AsyncClient(
+            transport=ASGITransport(app=app, client=(visitor, 123)),
+            base_url=unauthorized_client.base_url,
+        ) as client:
+            response = await client.get("UNIQUE_VISITORS")
+        assert response.status_code == 301
+
+    # Слияние повторяется, как при сливах из разных воркеров.
+    visitors_service = get_visitor_sketches_service(session)
+    await visitors_service.merge_visitor_sketches(visitor_sketches.drain())
+    another_worker_sketch = HyperLogLog()
+    another_worker_sketch.add("10.1.0.1")
+    another_worker_sketch.add("10.1.0.3")
+    await visitors_service.merge_visitor_sketches(
+        {shorted_url_id: another_worker_sketch}
+    )
+
+    response = await unauthorized_client.get("/api/links/UNIQUE_VISITORS")
+    assert response.status_code == 200
+    assert response.json()["unique_visitors"] == 3
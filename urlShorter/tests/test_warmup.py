@@ -0,0 +1,108 @@
+"""Модуль тестирования прогрева воркера, /healthz и /readyz."""
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+import core.services
+import routes
+from core import warmup
+from core.services import get_alias_numeric_service
+from core.warmup import WarmupState, run_warmup
+from fast import app
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_healthz(unauthorized_client: AsyncClient) -> None:
+    """Тестирование liveness (не алиас и не зависит от прогрева)."""
+    response = await unauthorized_client.get("/healthz")
+    assert response.status_code == 200
+    assert response.json()["status"] == "ok"
+    assert response.json()["stages"][0]["name"] == "side_effects_journal"
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_readyz_after_warmup(
+    unauthorized_client: AsyncClient,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Тестирование готовности только после прогрева и этапов с их временем."""
+    # Тестовая база создается без Alembic.
+    monkeypatch.setattr(warmup, "WARMUP_CHECK_ALEMBIC_HEAD", False)
+    warmup_state = WarmupState()
+    monkeypatch.setattr(routes, "get_warmup_state", lambda: warmup_state)
+
+    response = await unauthorized_client.get("/readyz")
+    assert response.status_code == 503
+    assert response.json() == {"status": "not_ready", "stages": []}
+
+    await run_warmup(warmup_state)
+
+    response = await unauthorized_client.get("/readyz")
+    assert response.status_code == 200
+    assert response.json()["status"] == "ready"
+    stages = {stage["name"]: stage for stage in response.json()["stages"]}
+    assert [stages[name]["status"] for name in (
+        "pool", "statements", "alembic", "hot_links"
+    )] == ["ok", "ok", "skipped", "ok"]
+    assert stages["pool"]["seconds"] > 0
+
+    warmup_state.is_stopping = True
+    response = await unauthorized_client.get("/readyz")
+    assert response.status_code == 503
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_readyz_fails_without_alembic_head(
+    unauthorized_client: AsyncClient,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Тестирование того, что немигрированная база не дает готовности."""
+    monkeypatch.setattr(warmup, "WARMUP_POOL_CONNECTIONS", 0)
+    warmup_state = WarmupState()
+    monkeypatch.setattr(routes, "get_warmup_state", lambda: warmup_state)
+
+    await run_warmup(warmup_state)
+
+    response = await unauthorized_client.get("/readyz")
+    assert response.status_code == 503
+    stages = {stage["name"]: stage for stage in response.json()["stages"]}
+    assert stages["pool"]["status"] == "skipped"
+    assert stages["alembic"]["status"] == "failed"
+    assert stages["alembic"]["error"]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_reserved_alias(unauthorized_client: AsyncClient) -> None:
+    """Тестирование того, что алиас не может занять путь служебного метода."""
+    # Отдельный IP, чтобы не упереться в лимит создания ссылок других тестов.
+    async with AsyncClient(
+        transport=ASGITransport(app=app, client=("10.0.45.1", 123)),
+        base_url=unauthorized_client.base_url,
+    ) as client:
+        response = await client.post("/api/shorten", json={
+            "url": "https://reserved.alias/", "custom_alias": "readyz"
+        })
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_random_allocator_skips_reserved_alias(
+    unauthorized_client: AsyncClient,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Тестирование того, что рандомный аллокатор пропускает служебный алиас."""
+    alias_numeric_service = get_alias_numeric_service()
+    probes = iter([
+        alias_numeric_service.get_alias_numeric_from_alias("healthz"),
+        alias_numeric_service.get_alias_numeric_from_alias("RSVfree"),
+    ])
+    monkeypatch.setattr(core.services, "randint", lambda *_: next(probes))
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app, client=("10.0.45.2", 123)),
+        base_url=unauthorized_client.base_url,
+    ) as client:
+        response = await client.post("/api/shorten", json={
+            "url": "https://reserved.random/"
+        })
+    assert response.status_code == 200
+    assert response.json()["alias"] == "RSVfree"